@@ -1,18 +1,24 @@
 import streamlit as st
 from jobtracker.config import configure_page
 from jobtracker.auth import require_login
-from jobtracker.db import get_conn, init_db
-from jobtracker.ui import render_app
 
 def main():
     configure_page()
     require_login()
 
-    conn = get_conn()
-    init_db(conn)
+    # imported after login so the login screen paints before psycopg2/pandas load
+    from jobtracker.db import end_reads, get_session_conn
+    from jobtracker.notify import attach_session
+    from jobtracker.ui import render_app
 
-    # DO NOT close the connection
-    render_app(conn)
+    # reused across reruns (keeps prepared statements warm); DO NOT close it
+    conn = get_session_conn()
+    attach_session(conn)
+    try:
+        render_app(conn)
+    finally:
+        # nothing left open between reruns: its locks would hold up the API's and worker's DDL
+        end_reads(conn)
 
 if __name__ == "__main__":
     main()
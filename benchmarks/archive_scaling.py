@@ -0,0 +1,77 @@
+"""
+Default (active-only) fetch_df latency against the include-archived read as
+closed applications pile up. Adds scratch rows in steps, times both reads
+at each size, then deletes them. Needs DATABASE_URL.
+
+    python -m benchmarks.archive_scaling [max_archived]
+"""
+import statistics
+import sys
+import time
+
+import psycopg2.extras
+
+from jobtracker.db import get_conn, init_db
+from jobtracker.repository import analyze_tables, fetch_df
+from jobtracker.service import ARCHIVED_STATUSES
+
+ACTIVE = 200
+RUNS = 15
+
+
+def _insert(conn, start: int, n: int, statuses):
+    rows = [
+        (f"__bench__ {i}", "Benchmark", statuses[i % len(statuses)], f"2030-{1 + i % 12:02d}-{1 + i % 28:02d}",
+         "notes " * 20, "2030-01-01", "2030-01-01")
+        for i in range(start, start + n)
+    ]
+    with conn.cursor() as cur:
+        psycopg2.extras.execute_values(
+            cur,
+            "INSERT INTO applications (company, role, status, next_action_date, notes, created_at, updated_at) "
+            "VALUES %s",
+            rows,
+            page_size=1000,
+        )
+    conn.commit()
+
+
+def _median_ms(fn) -> float:
+    fn()
+    samples = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main(max_archived: int):
+    conn = get_conn()
+    init_db(conn)
+    _insert(conn, 0, ACTIVE, ["Applied", "Interviewing", "Saved"])
+    archived, step = 0, 1000
+    print(f"{'archived rows':>13} {'active-only ms':>15} {'with archived ms':>17} {'rows':>7}")
+    try:
+        while True:
+            analyze_tables(conn, ("applications",))
+            hot = _median_ms(lambda: fetch_df(conn))
+            full = _median_ms(lambda: fetch_df(conn, include_archived=True))
+            print(f"{archived:>13} {hot:>15.2f} {full:>17.2f} {len(fetch_df(conn, include_archived=True)):>7}")
+            if archived >= max_archived:
+                break
+            n = min(step, max_archived - archived)
+            _insert(conn, ACTIVE + archived, n, list(ARCHIVED_STATUSES))
+            archived += n
+            step *= 3
+    finally:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM applications WHERE company LIKE '\\_\\_bench\\_\\_ %' RETURNING id")
+            ids = [r["id"] for r in cur.fetchall()]
+            cur.execute("DELETE FROM application_events WHERE application_id = ANY(%s)", (ids,))
+        conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,106 @@
+"""
+Write overhead of the application_events audit trigger: update_app and
+quick_update_status timed with the trigger enabled and disabled. Runs on
+copies of the tables a write touches, in a scratch schema that is dropped
+afterwards, so the live table's trigger is never switched off. Needs
+DATABASE_URL and CREATE rights on the database.
+
+    python -m benchmarks.audit_overhead [updates]
+"""
+import statistics
+import sys
+import time
+
+from jobtracker.db import get_conn, init_db
+from jobtracker.repository import insert_app, update_app, quick_update_status
+
+STATUSES = ["Applied", "Interviewing", "Offered", "Rejected"]
+SCRATCH = "jt_bench_audit"
+
+
+def _row(i: int) -> dict:
+    return {
+        "company": f"__bench__ {i % 7}", "role": "Benchmark", "status": STATUSES[i % len(STATUSES)],
+        "location": "Remote", "notes": f"note {i}", "next_action": "Follow up",
+        "next_action_date": f"2030-01-{1 + i % 28:02d}", "priority": "Medium",
+    }
+
+
+def _timed(fn, n: int):
+    samples = []
+    for i in range(n):
+        started = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _scratch_schema(conn):
+    """
+    Empty copies of the tables an update writes to, with the triggers that
+    fire on them (except notifications, which would wake live sessions), put
+    first on this connection's search_path.
+    """
+    with conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {SCRATCH} CASCADE")
+        cur.execute(f"CREATE SCHEMA {SCRATCH}")
+        for table in ("applications", "application_tombstones", "application_dedupe"):
+            cur.execute(f"CREATE TABLE {SCRATCH}.{table} (LIKE public.{table} INCLUDING ALL)")
+        cur.execute(f"CREATE SEQUENCE {SCRATCH}.applications_id_seq OWNED BY {SCRATCH}.applications.id")
+        cur.execute(f"ALTER TABLE {SCRATCH}.applications ALTER COLUMN id SET DEFAULT nextval('{SCRATCH}.applications_id_seq')")
+        cur.execute(f"""
+            CREATE TABLE {SCRATCH}.application_events (LIKE public.application_events INCLUDING ALL)
+            PARTITION BY RANGE (at)
+        """)
+        cur.execute(f"CREATE TABLE {SCRATCH}.application_events_default PARTITION OF {SCRATCH}.application_events DEFAULT")
+        for name, when, fn in (
+            ("applications_row_version_trg", "BEFORE INSERT OR UPDATE", "jt_stamp_row_version"),
+            ("applications_overdue_trg", "BEFORE INSERT OR UPDATE", "jt_flag_overdue"),
+            ("applications_tombstone_trg", "AFTER DELETE", "jt_application_tombstone"),
+            ("applications_event_trg", "AFTER INSERT OR UPDATE OR DELETE", "jt_application_event"),
+        ):
+            cur.execute(f"CREATE TRIGGER {name} {when} ON {SCRATCH}.applications FOR EACH ROW EXECUTE FUNCTION public.{fn}()")
+        # the trigger functions name their tables unqualified, so they write to the copies too
+        cur.execute(f"SET search_path TO {SCRATCH}, public")
+    conn.commit()
+
+
+def _set_trigger(conn, enabled: bool):
+    with conn.cursor() as cur:
+        cur.execute(f"ALTER TABLE {SCRATCH}.applications {'ENABLE' if enabled else 'DISABLE'} TRIGGER applications_event_trg")
+    conn.commit()
+
+
+def main(n: int):
+    conn = get_conn()
+    init_db(conn)
+    _scratch_schema(conn)
+    ids = [insert_app(conn, _row(i)) for i in range(20)]
+    try:
+        def full(i):
+            update_app(conn, ids[i % len(ids)], _row(i + 1))
+
+        def status(i):
+            quick_update_status(conn, ids[i % len(ids)], STATUSES[(i + 2) % len(STATUSES)])
+
+        results = {}
+        for enabled in (False, True, False, True):   # interleaved to even out cache effects
+            _set_trigger(conn, enabled)
+            results.setdefault(("update_app", enabled), []).extend(_timed(full, n))
+            results.setdefault(("quick_update_status", enabled), []).extend(_timed(status, n))
+    finally:
+        conn.rollback()
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA {SCRATCH} CASCADE")
+        conn.commit()
+        conn.close()
+
+    print(f"{'statement':<22} {'without ms':>11} {'with ms':>9} {'overhead ms':>12}   (median of {2 * n})")
+    for name in ("update_app", "quick_update_status"):
+        off = statistics.median(results[(name, False)])
+        on = statistics.median(results[(name, True)])
+        print(f"{name:<22} {off:>11.3f} {on:>9.3f} {on - off:>12.3f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
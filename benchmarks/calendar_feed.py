@@ -0,0 +1,86 @@
+"""
+Cost of serving the ICS feed as the number of dated applications grows:
+a from-scratch build, a poll with nothing changed, and a poll after one
+application was edited (only that one is formatted again). Scratch rows
+are deleted afterwards. Needs DATABASE_URL.
+
+    python -m benchmarks.calendar_feed [max_rows]
+"""
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+import psycopg2.extras
+
+from jobtracker.db import get_conn, init_db
+from jobtracker.ics import CalendarFeed
+from jobtracker.repository import quick_update_status
+
+POLLS = 50
+
+
+def _insert(conn, start: int, n: int):
+    today = date.today()
+    rows = []
+    for i in range(start, start + n):
+        day = (today + timedelta(days=i % 60)).isoformat()
+        rows.append((f"Calendar Co {i}", "Engineer", "Interviewing", day, "Onsite", "Follow up", day,
+                     "__bench__ calendar", "2030-01-01", "2030-01-01"))
+    with conn.cursor() as cur:
+        ids = [r["id"] for r in psycopg2.extras.execute_values(
+            cur,
+            "INSERT INTO applications (company, role, status, interview_date, interview_stage, next_action, "
+            "next_action_date, notes, created_at, updated_at) VALUES %s RETURNING id",
+            rows, page_size=1000, fetch=True,
+        )]
+    conn.commit()
+    return ids
+
+
+def _ms(fn, n: int = POLLS) -> float:
+    samples = []
+    for _ in range(n):
+        t = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t) * 1000)
+    return statistics.median(samples)
+
+
+def main(max_rows: int):
+    conn = get_conn()
+    init_db(conn)
+    ids = []
+    print(f"{'rows':>7} {'full build ms':>14} {'unchanged ms':>13} {'one edit ms':>12} {'body KB':>8}")
+    try:
+        size = 100
+        while True:
+            ids.extend(_insert(conn, len(ids), size - len(ids)))
+            conn.rollback()
+
+            full = _ms(lambda: CalendarFeed().render(conn), 5)
+            feed = CalendarFeed()
+            body = feed.render(conn)
+            unchanged = _ms(lambda: feed.render(conn))
+            samples = []
+            for i in range(POLLS):
+                quick_update_status(conn, ids[0], "Offered" if i % 2 else "Interviewing")
+                t = time.perf_counter()
+                feed.render(conn)
+                samples.append((time.perf_counter() - t) * 1000)
+            edited = statistics.median(samples)
+            print(f"{len(ids):>7} {full:>14.2f} {unchanged:>13.2f} {edited:>12.2f} {len(body) / 1024:>8.0f}")
+            if size >= max_rows:
+                break
+            size = min(size * 10, max_rows)
+    finally:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM applications WHERE notes = '__bench__ calendar' RETURNING id")
+            deleted = [r["id"] for r in cur.fetchall()]
+            cur.execute("DELETE FROM application_events WHERE application_id = ANY(%s)", (deleted,))
+        conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
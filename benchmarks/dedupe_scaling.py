@@ -0,0 +1,139 @@
+"""
+Duplicate detection as the table grows: find_duplicates latency (one
+Add-form check) and the worker's full key refresh + clustering, on
+synthetic applications where every 20th row is a respelled copy of an
+earlier one ("Acme, Inc." / "Sr." / a typo). Reports how many planted
+copies landed in their original's cluster and how many clusters mix
+different applications. Scratch rows are deleted afterwards. Needs
+DATABASE_URL.
+
+    python -m benchmarks.dedupe_scaling [max_rows]
+"""
+import random
+import statistics
+import sys
+import time
+
+import psycopg2.extras
+
+from jobtracker.db import get_conn, init_db
+from jobtracker.dedupe import UnionFind, cluster
+from jobtracker.repository import analyze_tables, find_duplicates, iter_dedupe_keys, refresh_dedupe_keys
+
+CONSONANTS = "bcdfghjklmnprstvwz"
+VOWELS = "aeiou"
+SUFFIXES = ["", " Inc.", " LLC", " Ltd", ", Inc", " GmbH", " Corp"]
+ROLES = [
+    "Backend Engineer", "Frontend Engineer", "Data Scientist", "Product Manager", "Site Reliability Engineer",
+    "Machine Learning Engineer", "Engineering Manager", "Data Engineer", "Security Engineer", "Designer",
+]
+RESPELL = [("Senior ", "Sr. "), ("Engineer", "Eng"), ("Manager", "Mgr"), ("Machine Learning", "ML")]
+COPY_EVERY = 20
+LOOKUPS = 200
+
+
+def _company(rnd) -> str:
+    # random pronounceable names, so planted copies are the only near-identical companies
+    n = rnd.randint(4, 6)
+    return "".join(rnd.choice(CONSONANTS) + rnd.choice(VOWELS) for _ in range(n)).capitalize()
+
+
+def _typo(rnd, s: str) -> str:
+    i = rnd.randrange(1, len(s) - 1)
+    return s[:i] + s[i + 1:]
+
+
+def _rows(rnd, start: int, n: int, originals: list):
+    """Synthetic (company, role) rows; returns them with {copy index: original index}."""
+    rows, copies = [], {}
+    for i in range(start, start + n):
+        if i % COPY_EVERY == COPY_EVERY - 1 and originals:
+            j = rnd.randrange(len(originals))
+            company, role = originals[j]
+            company = company.split(",")[0].split(" ")[0] + rnd.choice(SUFFIXES)
+            for a, b in RESPELL:
+                role = role.replace(a, b)
+            if rnd.random() < 0.5:
+                company = _typo(rnd, company) if len(company) > 6 else company
+            copies[i] = j
+        else:
+            company = f"{_company(rnd)}{rnd.choice(SUFFIXES)}"
+            role = ("Senior " if rnd.random() < 0.3 else "") + rnd.choice(ROLES)
+        rows.append((company, role))
+    return rows, copies
+
+
+def _insert(conn, rows):
+    with conn.cursor() as cur:
+        ids = [r["id"] for r in psycopg2.extras.execute_values(
+            cur,
+            "INSERT INTO applications (company, role, status, notes, created_at, updated_at) VALUES %s RETURNING id",
+            [(c, r, "Applied", "__bench__ dedupe", "2030-01-01", "2030-01-01") for c, r in rows],
+            page_size=1000, fetch=True,
+        )]
+    conn.commit()
+    return ids
+
+
+def main(max_rows: int):
+    conn = get_conn()
+    init_db(conn)
+    rnd = random.Random(7)
+    originals, ids, copies = [], [], {}
+    print(f"{'rows':>7} {'lookup ms':>10} {'refresh s':>10} {'cluster s':>10} {'clusters':>9} "
+          f"{'copies found':>13} {'mixed clusters':>15}")
+    try:
+        size = 1000
+        while True:
+            rows, new_copies = _rows(rnd, len(ids), size - len(ids), originals)
+            new_ids = _insert(conn, rows)
+            for k, j in new_copies.items():
+                copies[new_ids[k - len(ids)]] = ids[j]
+            originals.extend(rows)
+            ids.extend(new_ids)
+
+            started = time.perf_counter()
+            refresh_dedupe_keys(conn)
+            refresh_s = time.perf_counter() - started
+            analyze_tables(conn, ("applications", "application_dedupe"))
+
+            samples = []
+            for _ in range(LOOKUPS):
+                company, role = rnd.choice(originals)
+                t = time.perf_counter()
+                find_duplicates(conn, company, role)
+                samples.append((time.perf_counter() - t) * 1000)
+
+            started = time.perf_counter()
+            mine = set(ids)
+            clusters = cluster(r for r in iter_dedupe_keys(conn) if r[0] in mine)
+            cluster_s = time.perf_counter() - started
+
+            uf = UnionFind()
+            for group in clusters:
+                for app_id in group[1:]:
+                    uf.union(group[0], app_id)
+            found = sum(uf.find(c) == uf.find(o) for c, o in copies.items())
+            # a planted copy and its original belong together; anything else sharing a cluster is a false merge
+            def origin(a):
+                while a in copies:
+                    a = copies[a]
+                return a
+            mixed = sum(len({origin(a) for a in g}) > 1 for g in clusters)
+
+            print(f"{len(ids):>7} {statistics.median(samples):>10.2f} {refresh_s:>10.2f} {cluster_s:>10.2f} "
+                  f"{len(clusters):>9} {found:>6}/{len(copies):<6} {mixed:>15}")
+            if size >= max_rows:
+                break
+            size = min(size * 10, max_rows)
+    finally:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM applications WHERE notes = '__bench__ dedupe' RETURNING id")
+            ids = [r["id"] for r in cur.fetchall()]
+            cur.execute("DELETE FROM application_events WHERE application_id = ANY(%s)", (ids,))
+        conn.commit()
+        conn.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
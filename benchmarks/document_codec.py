@@ -0,0 +1,137 @@
+"""
+Bytes saved by jobtracker.codec per document type, and decode throughput
+per codec, on a synthetic corpus of the attachments the app stores.
+
+    python -m benchmarks.document_codec [copies]
+    python -m benchmarks.document_codec --db     # report on the live documents table
+"""
+import io
+import os
+import random
+import sys
+import time
+import zipfile
+import zlib
+
+from jobtracker import codec
+
+WORDS = (
+    "application interview recruiter engineer backend platform team offer salary remote "
+    "experience python postgres streamlit deadline follow up thanks regards schedule call "
+    "role company hiring manager technical round onsite feedback next steps"
+).split()
+
+
+def _prose(rnd, n_words: int) -> str:
+    return " ".join(rnd.choice(WORDS) for _ in range(n_words))
+
+
+def _eml(rnd) -> bytes:
+    body = "".join(f"<p>{_prose(rnd, 60)}</p>\n" for _ in range(40))
+    return (
+        "From: recruiter@example.com\r\nTo: me@example.com\r\nSubject: Next steps\r\n"
+        "MIME-Version: 1.0\r\nContent-Type: text/html; charset=utf-8\r\n\r\n"
+        f"<html><body>{body}</body></html>"
+    ).encode()
+
+
+def _docx(rnd) -> bytes:
+    paras = "".join(f"<w:p><w:r><w:t>{_prose(rnd, 40)}</w:t></w:r></w:p>" for _ in range(150))
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("word/document.xml", f"<w:document><w:body>{paras}</w:body></w:document>")
+    return buf.getvalue()
+
+
+def _pdf(rnd, flate: bool) -> bytes:
+    ops = "".join(f"BT /F1 10 Tf 72 {700 - i * 12} Td ({_prose(rnd, 12)}) Tj ET\n" for i in range(400)).encode()
+    stream = zlib.compress(ops) if flate else ops
+    filt = b"/Filter /FlateDecode " if flate else b""
+    return (
+        b"%PDF-1.4\n1 0 obj << /Length " + str(len(stream)).encode() + b" " + filt + b">>\nstream\n"
+        + stream + b"\nendstream\nendobj\ntrailer << >>\n%%EOF\n"
+    )
+
+
+def synthetic_corpus(copies: int, seed: int = 7):
+    rnd = random.Random(seed)
+    docs = []
+    for _ in range(copies):
+        docs += [
+            ("message/rfc822", _eml(rnd)),
+            ("text/plain", _prose(rnd, 4000).encode()),
+            ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", _docx(rnd)),
+            ("application/pdf", _pdf(rnd, flate=False)),
+            ("application/pdf", _pdf(rnd, flate=True)),
+            ("image/jpeg", os.urandom(200_000)),
+        ]
+    return docs
+
+
+def decode_throughput(name: str, payloads, original_bytes: int, rounds: int = 5) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for p in payloads:
+            dec = codec.StreamDecoder(name)
+            for i in range(0, len(p), 256 * 1024):
+                dec.feed(p[i:i + 256 * 1024])
+            dec.feed(b"")
+    return original_bytes * rounds / (time.perf_counter() - started) / 2**20
+
+
+def main(copies: int):
+    docs = synthetic_corpus(copies)
+
+    by_mime = {}
+    for mime, content in docs:
+        name, stored = codec.encode(mime, content)
+        s = by_mime.setdefault(mime, [0, 0, set()])
+        s[0] += len(content)
+        s[1] += len(stored)
+        s[2].add(name)
+
+    print(f"{'mime type':<72} {'original':>10} {'stored':>10} {'saved':>7}  codec")
+    total_in = total_out = 0
+    for mime, (orig, stored, names) in by_mime.items():
+        total_in += orig
+        total_out += stored
+        print(f"{mime:<72} {orig:>10} {stored:>10} {1 - stored / orig:>7.1%}  {'/'.join(sorted(names))}")
+    print(f"{'total':<72} {total_in:>10} {total_out:>10} {1 - total_out / total_in:>7.1%}")
+    print()
+
+    text = [c for m, c in docs if m in ("message/rfc822", "text/plain")]
+    size = sum(len(c) for c in text)
+    available = [codec.GZIP] + ([codec.ZSTD] if codec.zstandard is not None else [])
+    print(f"decode throughput, {len(text)} text documents, 256 KiB chunks:")
+    print(f"  {codec.NONE:<5} {decode_throughput(codec.NONE, text, size):9.0f} MiB/s")
+    for name in available:
+        packed = [codec.compress(name, c) for c in text]
+        print(f"  {name:<5} {decode_throughput(name, packed, size):9.0f} MiB/s")
+    if codec.zstandard is None:
+        print("  (zstandard not installed; zstd skipped, new documents use gzip)")
+
+
+def report_db():
+    from jobtracker.db import get_conn
+    from jobtracker.repository import storage_report
+
+    conn = get_conn()
+    try:
+        rows = storage_report(conn)
+    finally:
+        conn.close()
+    total_in = total_out = 0
+    for r in rows:
+        orig, stored = int(r["original_bytes"] or 0), int(r["stored_bytes"] or 0)
+        total_in += orig
+        total_out += stored
+        print(f"{r['codec']:<5} {r['mime_type'] or '?':<60} {r['docs']:>6} {orig:>12} {stored:>12}")
+    if total_in:
+        print(f"bytes saved: {total_in - total_out} ({1 - total_out / total_in:.1%})")
+
+
+if __name__ == "__main__":
+    if "--db" in sys.argv[1:]:
+        report_db()
+    else:
+        main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,73 @@
+"""
+Memory per row of the applications frame: the old dict-per-row
+pd.DataFrame(RealDictCursor rows) against frame.build_frame(tuple rows).
+
+    python -m benchmarks.frame_memory [rows]
+"""
+import random
+import sys
+from datetime import date, timedelta
+
+import pandas as pd
+
+from jobtracker.frame import build_frame
+
+COLUMNS = [
+    "id", "company", "role", "location", "job_url", "source", "status", "applied_date", "followup_date",
+    "salary", "contact", "notes", "created_at", "updated_at",
+    "work_model", "salary_range", "interview_stage", "interview_date", "next_action", "next_action_date",
+    "priority", "company_research", "phone_screen_notes", "row_version",
+]
+
+
+def synthetic_rows(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    start = date(2024, 1, 1)
+
+    def d():
+        return (start + timedelta(days=rnd.randint(0, 700))).strftime("%Y-%m-%d")
+
+    def maybe(v, p=0.5):
+        return v if rnd.random() < p else None
+
+    rows = []
+    for i in range(1, n + 1):
+        rows.append((
+            i,
+            f"Company {rnd.randint(1, 5000)}",
+            rnd.choice(["Backend Engineer", "Data Engineer", "SRE", "ML Engineer", "Frontend Engineer"]),
+            maybe(rnd.choice(["Berlin", "Remote", "London", "NYC", "Bangalore"]), 0.8),
+            maybe(f"https://jobs.example.com/{i}", 0.7),
+            maybe(rnd.choice(["LinkedIn", "Referral", "Company site", "Indeed"]), 0.9),
+            rnd.choice(["Saved", "Applied", "Interviewing", "Offered", "Rejected", "Ghosted", "Withdrawn"]),
+            d(), maybe(d(), 0.3),
+            None, maybe("recruiter@example.com", 0.4), maybe("notes " * rnd.randint(1, 40), 0.6),
+            d(), d(),
+            maybe(rnd.choice(["Remote", "Hybrid", "On-site"]), 0.8), maybe("100-120k", 0.3),
+            maybe(rnd.choice(["Not started", "Screening Call", "Technical Round", "Onsite"]), 0.6),
+            maybe(d(), 0.3), maybe("Follow up", 0.5), maybe(d(), 0.5),
+            maybe(rnd.choice(["Low", "Medium", "High"]), 0.7), maybe("research " * 20, 0.2), None,
+            rnd.randint(1000, 10**9),
+        ))
+    return rows
+
+
+def bytes_per_row(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / max(len(df), 1)
+
+
+def main(n: int):
+    rows = synthetic_rows(n)
+
+    old = pd.DataFrame([dict(zip(COLUMNS, r)) for r in rows])
+    new = build_frame(COLUMNS, rows)
+
+    before, after = bytes_per_row(old), bytes_per_row(new)
+    print(f"rows:               {n}")
+    print(f"dict rows -> frame: {before:8.0f} B/row  ({before * n / 2**20:7.1f} MiB)")
+    print(f"build_frame:        {after:8.0f} B/row  ({after * n / 2**20:7.1f} MiB)")
+    print(f"reduction:          {1 - after / before:8.1%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
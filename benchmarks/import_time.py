@@ -0,0 +1,56 @@
+"""
+Cold import cost of each entry point, from `python -X importtime`, and
+which heavy libraries each one drags in.
+
+    python -m benchmarks.import_time [runs]
+
+"login" is what app.py imports before auth.require_login renders; the
+rest of the app is imported only after a successful login.
+"""
+import statistics
+import subprocess
+import sys
+
+ENTRY_POINTS = {
+    "login": "jobtracker.config, jobtracker.auth",
+    "app (after login)": "jobtracker.ui",
+    "api": "jobtracker.api",
+    "worker": "jobtracker.worker",
+}
+HEAVY = ("streamlit", "pandas", "numpy", "pyarrow", "matplotlib", "psycopg2", "tornado", "PIL")
+
+
+def profile(modules: str):
+    """(total import µs, {heavy top-level package: cumulative µs})"""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modules}"],
+        capture_output=True, text=True, check=True,
+    ).stderr
+
+    total, heavy = 0, {}
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # nesting is shown by indenting the name; only count top-level imports in the total
+        depth = len(name) - len(name.lstrip()) - 1
+        name = name.strip()
+        if depth == 0:
+            total += int(cumulative)
+        if name in HEAVY:
+            heavy.setdefault(name, int(cumulative))
+    return total, heavy
+
+
+def main(runs: int):
+    print(f"{'entry point':<20} {'median ms':>10}  heavy packages (ms)")
+    for label, modules in ENTRY_POINTS.items():
+        samples = [profile(modules) for _ in range(runs)]
+        total = statistics.median(t for t, _ in samples)
+        heavy = samples[-1][1]
+        listed = ", ".join(f"{k} {v / 1000:.0f}" for k, v in sorted(heavy.items(), key=lambda kv: -kv[1]))
+        print(f"{label:<20} {total / 1000:>10.0f}  {listed or '-'}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
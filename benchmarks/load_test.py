@@ -0,0 +1,385 @@
+"""
+Concurrent sessions against one app process. Starts `streamlit run app.py`
+and drives N sessions over its websocket the way a browser does (login,
+dashboard, search, a board move, an upload), then reports rerun latency
+percentiles, database connections, server RSS per session and what the
+app itself accounts to each session (jobtracker.memory, read back from
+/_stcore/metrics).
+
+    python -m benchmarks.load_test [--sessions 1,5,10,20] [--rounds 3] [--think 0.5]
+
+Each level gets a fresh server so its memory starts from the same
+baseline. Scratch applications are seeded for the sessions to search,
+move and attach files to, and deleted afterwards. Needs DATABASE_URL; the
+server is started with throwaway credentials and XSRF protection off so
+the harness can upload without a browser cookie.
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+from urllib.request import urlopen
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.Common_pb2 import FileURLs, FileUploaderState, UploadedFileInfo
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.httpclient import AsyncHTTPClient
+from tornado.websocket import websocket_connect
+
+from jobtracker.db import get_conn, init_db
+from jobtracker.repository import insert_app
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+SCRATCH = "__bench__ load"
+WIDGETS = ("text_input", "button", "radio", "selectbox", "checkbox", "file_uploader")
+DONE = {ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY,
+        ForwardMsg.FINISHED_WITH_COMPILE_ERROR}
+
+
+# ---------------- Server ----------------
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, user: str, password: str):
+    env = dict(
+        os.environ,
+        JOBTRACKER_USER=user,
+        JOBTRACKER_PASS_SHA256=hashlib.sha256(password.encode()).hexdigest(),
+        PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(APP), os.environ.get("PYTHONPATH")])),
+    )
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP,
+         "--server.headless", "true", "--server.port", str(port), "--server.address", "127.0.0.1",
+         "--server.enableXsrfProtection", "false", "--server.fileWatcherType", "none",
+         "--browser.gatherUsageStats", "false"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as resp:
+                if resp.status == 200:
+                    return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("streamlit server did not come up")
+
+
+def rss_mb(pid: int) -> float:
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / 2**20
+    except ImportError:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+async def session_memory(base: str) -> dict:
+    """{part: bytes} summed over the live sessions, from the app's jobtracker_session metrics."""
+    resp = await AsyncHTTPClient().fetch(f"{base}/_stcore/metrics")
+    parts = defaultdict(int)
+    for line in resp.body.decode().splitlines():
+        if 'cache_type="jobtracker_session"' in line:
+            labels, value = line.rsplit(" ", 1)
+            part = labels.split('cache="', 1)[1].split(":", 1)[1].rstrip('"}')
+            parts[part] += int(value)
+    return parts
+
+
+def db_connections(conn) -> int:
+    conn.rollback()   # pg_stat_activity is a per-transaction snapshot
+    with conn.cursor() as cur:
+        cur.execute("""
+            SELECT count(*) AS n FROM pg_stat_activity
+             WHERE datname = current_database() AND backend_type = 'client backend' AND pid <> pg_backend_pid()
+        """)
+        return int(cur.fetchone()["n"])
+
+
+# ---------------- One browser session ----------------
+class Session:
+    """A websocket client speaking Streamlit's BackMsg/ForwardMsg protocol, like the browser does."""
+
+    def __init__(self, base: str):
+        self.base = base
+        self.ws = None
+        self.session_id = None
+        self.page_hash = ""
+        self.widgets = {}   # id -> (kind, proto, fragment_id)
+        self.states = {}    # id -> WidgetState sent with every rerun
+        self.errors = []
+        self.pushed = 0     # reruns the server started on its own (another session's write)
+        self._idle = asyncio.Event()
+        self._finished = None
+        self._file_urls = {}
+        self._reader = None
+
+    async def connect(self):
+        self.ws = await websocket_connect(self.base.replace("http", "ws", 1) + "/_stcore/stream",
+                                          subprotocols=["streamlit"], max_message_size=256 * 2**20)
+        self._reader = asyncio.ensure_future(self._read())
+
+    async def close(self):
+        self.ws.close()
+        await asyncio.gather(self._reader, return_exceptions=True)
+
+    async def _read(self):
+        while True:
+            raw = await self.ws.read_message()
+            if raw is None:
+                return
+            msg = ForwardMsg()
+            msg.ParseFromString(raw)
+            kind = msg.WhichOneof("type")
+            if kind == "new_session":
+                self._idle.clear()   # may arrive before the "running" status
+                self.session_id = msg.new_session.initialize.session_id
+                self.page_hash = msg.new_session.page_script_hash
+                if not msg.new_session.fragment_ids_this_run:
+                    self.widgets = {}
+                    if self._finished is None or self._finished.done():
+                        self.pushed += 1
+            elif kind == "session_status_changed":
+                if msg.session_status_changed.script_is_running:
+                    self._idle.clear()
+                else:
+                    self._idle.set()
+            elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                el = msg.delta.new_element
+                el_kind = el.WhichOneof("type")
+                if el_kind in WIDGETS:
+                    w = getattr(el, el_kind)
+                    self.widgets[w.id] = (el_kind, w, msg.delta.fragment_id)
+                elif el_kind == "exception":
+                    self.errors.append(el.exception.message)
+            elif kind == "script_finished" and msg.script_finished in DONE:
+                if self._finished is not None and not self._finished.done():
+                    self._finished.set_result(msg.script_finished)
+            elif kind == "file_urls_response":
+                resp = msg.file_urls_response
+                fut = self._file_urls.pop(resp.response_id, None)
+                if fut is not None and resp.file_urls:
+                    fut.set_result(resp.file_urls[0])
+                elif fut is not None:
+                    fut.set_exception(RuntimeError(resp.error_msg or "empty file_urls_response"))
+
+    async def find(self, kind: str, label: str = None, option: str = None):
+        """A widget on the current page, once any rerun the server pushed in the meantime has drawn it."""
+        while True:
+            await asyncio.wait_for(self._idle.wait(), timeout=120)
+            for wid, (k, w, fragment_id) in self.widgets.items():
+                if k == kind and (label is None or w.label.startswith(label)) \
+                        and (option is None or option in getattr(w, "options", ())):
+                    return wid, w, fragment_id
+            await asyncio.sleep(0.3)
+            if self._idle.is_set():
+                raise LookupError(f"no {kind} {label or option!r} on the page")
+
+    def set(self, wid: str, **value):
+        self.states[wid] = WidgetState(id=wid, **value)
+
+    async def rerun(self, fragment_id: str = "") -> float:
+        """Sends the widget states, waits for the run (and any st.rerun it triggers) to finish; returns ms."""
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.page_script_hash = self.page_hash
+        if fragment_id:
+            msg.rerun_script.fragment_id = fragment_id
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        # buttons fire once
+        self.states = {k: v for k, v in self.states.items() if v.WhichOneof("value") != "trigger_value"}
+
+        self._finished = asyncio.get_running_loop().create_future()
+        started = time.perf_counter()
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+        await asyncio.wait_for(self._finished, timeout=120)
+        return (time.perf_counter() - started) * 1000
+
+    async def upload(self, wid: str, name: str, mime: str, data: bytes):
+        """What the browser does on a file drop: ask for an upload URL, PUT the file, point the widget at it."""
+        for attempt in range(5):
+            # a rerun starting meanwhile drops queued replies, the response included; ask again
+            await asyncio.wait_for(self._idle.wait(), timeout=120)
+            request_id = uuid.uuid4().hex
+            fut = asyncio.get_running_loop().create_future()
+            self._file_urls[request_id] = fut
+            msg = BackMsg()
+            msg.file_urls_request.request_id = request_id
+            msg.file_urls_request.session_id = self.session_id
+            msg.file_urls_request.file_names.append(name)
+            await self.ws.write_message(msg.SerializeToString(), binary=True)
+            try:
+                urls = await asyncio.wait_for(fut, timeout=5)
+                break
+            except asyncio.TimeoutError:
+                self._file_urls.pop(request_id, None)
+        else:
+            raise TimeoutError("no upload URL from the server")
+
+        boundary = uuid.uuid4().hex
+        body = (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{name}"\r\n'
+            f"Content-Type: {mime}\r\n\r\n".encode() + data + f"\r\n--{boundary}--\r\n".encode()
+        )
+        await AsyncHTTPClient().fetch(self.base + urls.upload_url, method="PUT", body=body,
+                                      headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+        state = FileUploaderState(uploaded_file_info=[UploadedFileInfo(
+            name=name, size=len(data), file_id=urls.file_id,
+            file_urls=FileURLs(file_id=urls.file_id, upload_url=urls.upload_url, delete_url=urls.delete_url),
+        )])
+        self.set(wid, file_uploader_state_value=state)
+
+
+# ---------------- Flows ----------------
+async def go_to(session: Session, page: str) -> float:
+    wid, w, _ = await session.find("radio", option=page)
+    session.set(wid, int_value=list(w.options).index(page))
+    return await session.rerun()
+
+
+async def run_session(n: int, base: str, user: str, password: str, rounds: int, think: float, timings):
+    rnd = random.Random(n)
+    session = Session(base)
+    await session.connect()
+
+    async def step(name, coro):
+        timings[name].append(await coro)
+        await asyncio.sleep(rnd.uniform(0, 2 * think))
+
+    await step("open", session.rerun())
+    session.set((await session.find("text_input", "Username"))[0], string_value=user)
+    session.set((await session.find("text_input", "Password"))[0], string_value=password)
+    session.set((await session.find("button", "Login"))[0], trigger_value=True)
+    await step("login", session.rerun())
+
+    for r in range(rounds):
+        await step("dashboard", go_to(session, "Dashboard"))
+
+        wid, w, _ = await session.find("selectbox", "Search")
+        scratch = [o for o in w.options if o.startswith(SCRATCH)] or list(w.options)
+        session.set(wid, string_value=rnd.choice(scratch))
+        await step("search", session.rerun())
+
+        await step("board", go_to(session, "Board"))
+        wid, w, fragment_id = await session.find("selectbox", "Move")
+        current = w.options[w.default] if w.HasField("default") else None
+        # between two board columns, so the card is still there for the next round's search
+        session.set(wid, string_value="Interviewing" if current != "Interviewing" else "Applied")
+        await step("board move", session.rerun(fragment_id))
+
+        await step("add / edit", go_to(session, "Add / Edit"))
+        wid, _, fragment_id = await session.find("file_uploader", "Upload files")
+        data = f"session {n} round {r}\n".encode() + secrets.token_hex(64 * 1024).encode()
+        await session.upload(wid, f"notes-{n}-{r}.txt", "text/plain", data)
+        await step("upload", session.rerun(fragment_id))
+    return session
+
+
+def _pct(samples, p: float) -> float:
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(round(p / 100 * (len(s) - 1))))] if s else float("nan")
+
+
+async def run_level(sessions: int, rounds: int, think: float, conn):
+    port = _free_port()
+    user, password = "load", secrets.token_hex(8)
+    proc = start_server(port, user, password)
+    base = f"http://127.0.0.1:{port}"
+    try:
+        conns_before, rss_before = db_connections(conn), rss_mb(proc.pid)
+        timings = defaultdict(list)
+        started = [run_session(i, base, user, password, rounds, think, timings) for i in range(sessions)]
+        done = await asyncio.gather(*started, return_exceptions=True)
+        # every session still connected, as with real users idling on a tab
+        conns, rss = db_connections(conn), rss_mb(proc.pid)
+        memory = await session_memory(base)
+        failed = [d for d in done if isinstance(d, BaseException)]
+        live = [d for d in done if not isinstance(d, BaseException)]
+        errors = sum(len(s.errors) for s in live)
+        pushed = sum(s.pushed for s in live)
+        for s in live:
+            await s.close()
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+    for f in failed[:3]:
+        print(f"  session failed: {f!r}", file=sys.stderr)
+    return {
+        "timings": timings, "failed": len(failed), "errors": errors, "pushed": pushed,
+        "conns": conns - conns_before, "rss": rss, "rss_delta": rss - rss_before, "memory": memory,
+    }
+
+
+def seed(conn, rows: int):
+    for i in range(rows):
+        insert_app(conn, {"company": f"{SCRATCH} {i:03d}", "role": "Load test", "status": "Applied",
+                          "next_action_date": "2030-01-01"})
+
+
+def cleanup(conn):
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM applications WHERE company LIKE %s RETURNING id", (SCRATCH + " %",))
+        ids = [r["id"] for r in cur.fetchall()]
+        cur.execute("DELETE FROM application_events WHERE application_id = ANY(%s)", (ids,))
+    conn.commit()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sessions", default="1,5,10,20", help="comma-separated concurrency levels")
+    ap.add_argument("--rounds", type=int, default=3, help="flows per session")
+    ap.add_argument("--think", type=float, default=0.5, help="mean think time between steps, seconds")
+    ap.add_argument("--rows", type=int, default=100, help="scratch applications to seed")
+    args = ap.parse_args()
+
+    conn = get_conn()
+    init_db(conn)
+    cleanup(conn)
+    seed(conn, args.rows)
+    results = {}
+    try:
+        for n in [int(x) for x in args.sessions.split(",")]:
+            results[n] = asyncio.run(run_level(n, args.rounds, args.think, conn))
+    finally:
+        cleanup(conn)
+        conn.close()
+
+    print(f"{'sessions':>8} {'reruns':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'db conns':>9} "
+          f"{'conns/sess':>10} {'RSS MB':>8} {'MB/sess':>8} {'KB/sess':>8} {'upl KB':>7} {'pushed':>7} {'failed':>7} "
+          f"{'app errors':>10}")
+    for n, res in results.items():
+        every = [t for ts in res["timings"].values() for t in ts]
+        print(f"{n:>8} {len(every):>7} {_pct(every, 50):>8.0f} {_pct(every, 95):>8.0f} {_pct(every, 99):>8.0f} "
+              f"{res['conns']:>9} {res['conns'] / n:>10.1f} {res['rss']:>8.0f} {res['rss_delta'] / n:>8.1f} "
+              f"{sum(res['memory'].values()) / n / 1024:>8.0f} {res['memory']['uploads'] / n / 1024:>7.0f} "
+              f"{res['pushed']:>7} {res['failed']:>7} {res['errors']:>10}")
+
+    print()
+    print(f"{'step':<12}" + "".join(f" {f'p50/p95/p99 @{n}':>20}" for n in results))
+    steps = next(iter(results.values()))["timings"].keys() if results else []
+    for name in steps:
+        cells = []
+        for res in results.values():
+            ts = res["timings"].get(name, [])
+            cells.append(f"{_pct(ts, 50):.0f}/{_pct(ts, 95):.0f}/{_pct(ts, 99):.0f}")
+        print(f"{name:<12}" + "".join(f" {c:>20}" for c in cells))
+
+
+if __name__ == "__main__":
+    main()
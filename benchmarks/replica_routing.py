@@ -0,0 +1,68 @@
+"""
+Where reads land under a mixed read/write workload on one routed session
+connection: replica, primary (read-your-writes window) or primary
+(replica unusable). Needs DATABASE_URL and DATABASE_READ_URL.
+
+    python -m benchmarks.replica_routing [seconds]
+
+A local standby to point DATABASE_READ_URL at (as the server's OS user):
+
+    pg_basebackup -c fast -R -X stream -h <primary socket dir> -D /tmp/replica
+    echo "port = 5433" >> /tmp/replica/postgresql.auto.conf
+    pg_ctl -D /tmp/replica -o "-k /tmp/replica" start
+    DATABASE_READ_URL="postgresql://postgres@/jt?host=/tmp/replica&port=5433"
+"""
+import collections
+import sys
+import time
+
+from jobtracker import db
+from jobtracker.repository import delete_app, fetch_df, insert_app, list_documents, quick_update_status
+
+WRITE_EVERY = 150   # one write per this many reads (~10 s), like a user browsing and occasionally editing
+
+
+def _server(conn) -> str:
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_is_in_recovery() AS standby")
+        return "replica" if cur.fetchone()["standby"] else "primary"
+
+
+def main(seconds: float):
+    if not db.get_read_urls():
+        sys.exit("DATABASE_READ_URL is not set")
+    conn = db.get_conn()
+    db.init_db(conn)
+    where = db.read_only(_server)
+    app_id = insert_app(conn, {"company": "__bench__ replica", "role": "Benchmark", "status": "Applied"})
+
+    landed = collections.Counter()
+    latency = collections.defaultdict(list)
+    reads = 0
+    deadline = time.monotonic() + seconds
+    try:
+        while time.monotonic() < deadline:
+            if reads % WRITE_EVERY == 0:
+                quick_update_status(conn, app_id, "Interviewing" if reads % (2 * WRITE_EVERY) else "Applied")
+            sticky = conn.write_clock.recent()
+            server = where(conn)
+            label = server if server == "replica" else ("primary (own write)" if sticky else "primary (fallback)")
+            started = time.perf_counter()
+            fetch_df(conn)
+            list_documents(conn, app_id)
+            latency[label].append((time.perf_counter() - started) * 1000)
+            landed[label] += 1
+            reads += 1
+            time.sleep(0.05)
+    finally:
+        delete_app(conn, app_id)
+        conn.close()
+
+    print(f"{'served by':<22} {'reads':>6} {'share':>7} {'median ms':>10}")
+    for label, n in landed.most_common():
+        ms = sorted(latency[label])[len(latency[label]) // 2]
+        print(f"{label:<22} {n:>6} {n / reads:>7.1%} {ms:>10.2f}")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 30)
@@ -0,0 +1,83 @@
+"""
+WAL written per edit-form save: every column rewritten (what update_app
+used to send) against the diff-only UPDATE, for a one-word notes change
+on rows carrying long research/screen notes. Scratch rows are deleted
+afterwards. Needs DATABASE_URL.
+
+    python -m benchmarks.update_wal [saves]
+"""
+import random
+import sys
+import time
+
+from jobtracker.db import get_conn, init_db
+from jobtracker.repository import APP_COLUMNS, delete_app, get_app, insert_app, update_app
+
+WORDS = "series funding engineers postgres python stack rotation weekly remote hybrid salary equity team".split()
+
+
+def _long(seed: int) -> str:
+    # varied enough not to compress below the TOAST threshold, like real pasted notes
+    rnd = random.Random(seed)
+    return " ".join(rnd.choice(WORDS) + str(rnd.randrange(1000)) for _ in range(1200))
+
+
+def _row(i: int) -> dict:
+    return {
+        "company": f"__bench__ {i}", "role": "Benchmark", "status": "Applied", "location": "Remote",
+        "notes": "first call went well", "company_research": _long(i), "phone_screen_notes": _long(-i),
+        "next_action": "Follow up", "next_action_date": "2030-01-15", "priority": "Medium",
+    }
+
+
+def _full_update(conn, app_id: int, row: dict):
+    sets = ", ".join(f"{c}=%s" for c in APP_COLUMNS)
+    with conn.cursor() as cur:
+        cur.execute(f"UPDATE applications SET {sets}, updated_at=%s WHERE id=%s",
+                    [row.get(c) for c in APP_COLUMNS] + ["2030-01-01", app_id])
+    conn.commit()
+
+
+def _diff_update(conn, app_id: int, row: dict):
+    base = get_app(conn, app_id)
+    update_app(conn, app_id, row, base=base, expected_version=base["row_version"])
+
+
+def _wal_lsn(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_current_wal_lsn() AS lsn")
+        return cur.fetchone()["lsn"]
+
+
+def _wal_since(conn, lsn) -> int:
+    with conn.cursor() as cur:
+        cur.execute("SELECT pg_wal_lsn_diff(pg_current_wal_lsn(), %s) AS n", (lsn,))
+        return int(cur.fetchone()["n"])
+
+
+def main(n: int):
+    conn = get_conn()
+    init_db(conn)
+    rows = [_row(i) for i in range(20)]
+    ids = [insert_app(conn, row) for row in rows]
+    results = {}
+    try:
+        for label, fn in (("all columns", _full_update), ("changed only", _diff_update)):
+            lsn = _wal_lsn(conn)
+            started = time.perf_counter()
+            for i in range(n):
+                row = dict(rows[i % len(ids)], notes=f"first call went well ({label} {i})")
+                fn(conn, ids[i % len(ids)], row)
+            results[label] = (_wal_since(conn, lsn), (time.perf_counter() - started) * 1000 / n)
+    finally:
+        for app_id in ids:
+            delete_app(conn, app_id)
+        conn.close()
+
+    print(f"{'update':<14} {'WAL bytes/save':>15} {'ms/save':>9}   ({n} saves)")
+    for label, (wal, ms) in results.items():
+        print(f"{label:<14} {wal / n:>15.0f} {ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,429 @@
+"""
+Headless JSON API over the repository layer, without Streamlit.
+
+    JOBTRACKER_API_TOKEN=... python -m jobtracker.api --port 8600
+
+Every request needs `Authorization: Bearer <JOBTRACKER_API_TOKEN>`.
+
+  GET    /api/applications?search=&status=&overdue_only=1&include_archived=1&limit=50&offset=0
+  POST   /api/applications
+  GET    /api/applications/<id>
+  PATCH  /api/applications/<id>                (changed fields only; honours If-Match)
+  DELETE /api/applications/<id>
+  POST   /api/applications/bulk-status         {"ids": [...], "status": "..."}
+  GET    /api/applications/<id>/events           (audit timeline, oldest first)
+  GET    /api/applications/<id>/documents
+  POST   /api/applications/<id>/documents?filename=...&doc_type=Document   (raw file as body)
+  GET    /api/documents/search?q=take-home&limit=20
+  GET    /api/documents/<id>                   (honours a single `Range: bytes=` range)
+  DELETE /api/documents/<id>
+  GET    /api/stats
+  GET    /api/calendar.ics                     (interviews and next actions; also ?token=...)
+
+Lists leave out archived (Rejected / Withdrawn / Ghosted) applications unless
+include_archived=1 is passed or `status` names an archived status.
+
+List and stats responses carry an ETag derived from the data version, so a
+matching If-None-Match is answered with 304 before any query runs. A single
+application's ETag is its row_version; sending it back as If-Match on PATCH
+turns a concurrent edit into 412 instead of a lost update.
+
+The calendar feed uses the same data-version ETag, so a client polling it
+costs one index lookup until something changes. Calendar apps can't send
+headers, so that endpoint also takes the token as `?token=`.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date
+from urllib.parse import quote
+
+import psycopg2.errors
+import psycopg2.extensions
+import psycopg2.extras
+import psycopg2.pool
+import tornado.web
+from tornado.ioloop import IOLoop
+
+from jobtracker.db import RoutedConnection, WriteClock, get_db_url, get_read_urls, init_db
+from jobtracker.repository import (
+    APP_COLUMNS, ConflictError, DocumentStream,
+    fetch_page, get_app, insert_app, update_app, delete_app, bulk_update_status,
+    add_document, list_documents, get_document_meta, read_document_chunk, delete_document,
+    dashboard_stats, data_version, search_documents, application_timeline,
+)
+from jobtracker.ics import get_feed
+from jobtracker.service import validate_required
+
+log = logging.getLogger("jobtracker.api")
+
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+DOWNLOAD_CHUNK = 256 * 1024
+MAX_PAGE = 500
+
+
+class Database:
+    """A small connection pool plus a thread pool of the same size to run blocking calls on."""
+
+    def __init__(self, minconn: int, maxconn: int):
+        self.pool = psycopg2.pool.ThreadedConnectionPool(
+            minconn, maxconn, get_db_url(),
+            cursor_factory=psycopg2.extras.RealDictCursor,
+            connection_factory=RoutedConnection,
+        )
+        self.read_urls = get_read_urls()
+        # shared by the pool: a write through any connection is read back by the next requests
+        self.write_clock = WriteClock()
+        self.executor = ThreadPoolExecutor(max_workers=maxconn, thread_name_prefix="jobtracker-api-db")
+
+    @contextmanager
+    def connection(self):
+        conn = self.pool.getconn()
+        conn.read_urls = self.read_urls
+        conn.write_clock = self.write_clock
+        try:
+            yield conn
+        finally:
+            # reads leave a transaction open; don't hand it to the next request
+            if not conn.closed and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            self.pool.putconn(conn, close=bool(conn.closed))
+
+    async def run(self, fn, *args, **kwargs):
+        def call():
+            with self.connection() as conn:
+                return fn(conn, *args, **kwargs)
+
+        return await IOLoop.current().run_in_executor(self.executor, call)
+
+
+class BaseHandler(tornado.web.RequestHandler):
+    def initialize(self, db: Database, token: str):
+        self.db = db
+        self.token = token
+
+    def prepare(self):
+        auth = self.request.headers.get("Authorization", "")
+        if not hmac.compare_digest(auth.encode(), f"Bearer {self.token}".encode()):
+            raise tornado.web.HTTPError(401)
+
+    def write_json(self, obj, status: int = 200):
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.finish(json.dumps(obj, default=str))
+
+    def write_error(self, status_code, **kwargs):
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.finish(json.dumps({"error": self._reason}))
+
+    def json_body(self) -> dict:
+        try:
+            body = json.loads(self.request.body or b"{}")
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="Invalid JSON")
+        if not isinstance(body, dict):
+            raise tornado.web.HTTPError(400, reason="Expected a JSON object")
+        return body
+
+    async def not_modified(self) -> bool:
+        """Sets a data-version ETag and answers 304 when the client already has it."""
+        version = await self.db.run(data_version)
+        # overdue filters depend on the date as well as the data
+        self.set_header("Etag", f'W/"{version}-{date.today().isoformat()}"')
+        if self.check_etag_header():
+            self.set_status(304)
+            self.finish()
+            return True
+        return False
+
+
+def _app_row(body: dict, base: dict = None) -> dict:
+    row = dict(base or {})
+    for k in APP_COLUMNS:
+        if k in body:
+            v = body[k]
+            row[k] = (v.strip() or None) if isinstance(v, str) else v
+    row["company"] = row.get("company") or ""
+    row["role"] = row.get("role") or ""
+    row["status"] = row.get("status") or "Applied"
+    err = validate_required(row["company"], row["role"])
+    if err:
+        raise tornado.web.HTTPError(400, reason=err)
+    return row
+
+
+class ApplicationsHandler(BaseHandler):
+    async def get(self):
+        if await self.not_modified():
+            return
+        try:
+            limit = min(max(int(self.get_argument("limit", "50")), 1), MAX_PAGE)
+            offset = max(int(self.get_argument("offset", "0")), 0)
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="limit/offset must be integers")
+
+        rows, total = await self.db.run(
+            fetch_page,
+            search=self.get_argument("search", ""),
+            status=self.get_argument("status", "All"),
+            overdue_only=self.get_argument("overdue_only", "") in ("1", "true", "yes"),
+            limit=limit,
+            offset=offset,
+            include_archived=self.get_argument("include_archived", "") in ("1", "true", "yes"),
+        )
+        self.write_json({"items": rows, "total": total, "limit": limit, "offset": offset})
+
+    async def post(self):
+        row = _app_row(self.json_body())
+        new_id = await self.db.run(insert_app, row)
+        self.write_json({"id": new_id}, status=201)
+
+
+class ApplicationHandler(BaseHandler):
+    async def get(self, app_id):
+        row = await self.db.run(get_app, int(app_id))
+        if not row:
+            raise tornado.web.HTTPError(404)
+        self.set_header("Etag", f'"{row["row_version"]}"')
+        self.write_json(row)
+
+    async def patch(self, app_id):
+        body = self.json_body()
+        if_match = self.request.headers.get("If-Match", "").strip().strip('"')
+        if if_match and not if_match.isdigit():
+            raise tornado.web.HTTPError(400, reason="If-Match must be an application ETag")
+
+        def patch(conn):
+            current = get_app(conn, int(app_id))
+            if not current:
+                return None
+            row = _app_row(body, current)
+            # without If-Match the version read just above still guards this read-modify-write
+            expected = int(if_match) if if_match else current["row_version"]
+            update_app(conn, int(app_id), row, base=current, expected_version=expected)
+            return get_app(conn, int(app_id))
+
+        try:
+            row = await self.db.run(patch)
+        except ConflictError as e:
+            raise tornado.web.HTTPError(412 if if_match else 409, reason=str(e))
+        if not row:
+            raise tornado.web.HTTPError(404)
+        self.set_header("Etag", f'"{row["row_version"]}"')
+        self.write_json(row)
+
+    async def delete(self, app_id):
+        await self.db.run(delete_app, int(app_id))
+        self.set_status(204)
+        self.finish()
+
+
+class ApplicationEventsHandler(BaseHandler):
+    async def get(self, app_id):
+        self.write_json(await self.db.run(application_timeline, int(app_id)))
+
+
+class BulkStatusHandler(BaseHandler):
+    async def post(self):
+        body = self.json_body()
+        ids = body.get("ids")
+        status = body.get("status")
+        if not isinstance(ids, list) or not status:
+            raise tornado.web.HTTPError(400, reason="Expected {\"ids\": [...], \"status\": \"...\"}")
+        if not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            raise tornado.web.HTTPError(400, reason="ids must be integers")
+        n = await self.db.run(bulk_update_status, ids, status)
+        self.write_json({"updated": n})
+
+
+@tornado.web.stream_request_body
+class ApplicationDocumentsHandler(BaseHandler):
+    def prepare(self):
+        super().prepare()
+        if self.request.method == "POST":
+            self.request.connection.set_max_body_size(MAX_UPLOAD_BYTES)
+            # hash while the body streams in; spill big files to disk
+            self._sha = hashlib.sha256()
+            self._body = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+
+    def data_received(self, chunk):
+        self._sha.update(chunk)
+        self._body.write(chunk)
+
+    async def get(self, app_id):
+        docs = await self.db.run(list_documents, int(app_id))
+        self.write_json(docs)
+
+    async def post(self, app_id):
+        filename = self.get_argument("filename")
+        doc_type = self.get_argument("doc_type", "Document")
+        mime = self.request.headers.get("Content-Type") or "application/octet-stream"
+
+        self._body.seek(0)
+        content = self._body.read()
+        self._body.close()
+        if not content:
+            raise tornado.web.HTTPError(400, reason="Empty body")
+
+        try:
+            ok = await self.db.run(
+                add_document, int(app_id), filename, mime, content, doc_type,
+                content_hash=self._sha.hexdigest(),
+            )
+        except psycopg2.errors.ForeignKeyViolation:
+            raise tornado.web.HTTPError(404, reason=f"Application {app_id} not found")
+        self.write_json({"created": ok}, status=201 if ok else 200)
+
+
+def _content_disposition(filename: str) -> str:
+    """attachment header for any file name: an ASCII fallback plus the exact name as RFC 5987 UTF-8."""
+    name = "".join(c if c.isprintable() else "_" for c in filename or "download")
+    fallback = "".join(c if c.isascii() and c not in '"\\' else "_" for c in name)
+    return f'attachment; filename="{fallback}"; filename*=UTF-8\'\'{quote(name, safe="")}'
+
+
+def _byte_range(header: str, size: int):
+    """(start, end) inclusive for a single `bytes=` range, None for a full response; may be unsatisfiable."""
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if not first:
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            start, end = int(first), min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    return start, end
+
+
+class DocumentHandler(BaseHandler):
+    async def get(self, doc_id):
+        doc = await self.db.run(get_document_meta, int(doc_id))
+        if not doc:
+            raise tornado.web.HTTPError(404)
+
+        self.set_header("Etag", f'"{doc["content_hash"]}"')
+        if self.check_etag_header():
+            self.set_status(304)
+            self.finish()
+            return
+
+        size = doc["size_bytes"] or 0
+        self.set_header("Content-Type", doc.get("mime_type") or "application/octet-stream")
+        self.set_header("Content-Disposition", _content_disposition(doc["filename"]))
+        self.set_header("Accept-Ranges", "bytes")
+        byte_range = _byte_range(self.request.headers.get("Range"), size)
+        start, end = byte_range or (0, size - 1)
+        if byte_range and (start > end or start >= size):
+            self.set_status(416)
+            self.set_header("Content-Range", f"bytes */{size}")
+            self.finish()
+            return
+        if byte_range:
+            self.set_status(206)
+            self.set_header("Content-Range", f"bytes {start}-{end}/{size}")
+        self.set_header("Content-Length", str(end - start + 1))
+
+        # read and decompressed one chunk at a time; uncompressed documents
+        # are read from the start of the range, compressed ones from the top.
+        # Each chunk carries its codec, in case the backfill compressed the
+        # document since the metadata was read.
+        stream = DocumentStream(doc["codec"], start, end + 1, DOWNLOAD_CHUNK)
+        while not stream.done:
+            codec, chunk = await self.db.run(read_document_chunk, int(doc_id), stream.offset, DOWNLOAD_CHUNK)
+            data = stream.feed(codec, chunk)
+            if data:
+                self.write(data)
+                await self.flush()
+        self.finish()
+
+    async def delete(self, doc_id):
+        await self.db.run(delete_document, int(doc_id))
+        self.set_status(204)
+        self.finish()
+
+
+class DocumentSearchHandler(BaseHandler):
+    async def get(self):
+        q = self.get_argument("q", "").strip()
+        if not q:
+            raise tornado.web.HTTPError(400, reason="q is required")
+        try:
+            limit = min(max(int(self.get_argument("limit", "20")), 1), MAX_PAGE)
+        except ValueError:
+            raise tornado.web.HTTPError(400, reason="limit must be an integer")
+        self.write_json(await self.db.run(search_documents, q, limit))
+
+
+class StatsHandler(BaseHandler):
+    async def get(self):
+        if await self.not_modified():
+            return
+        self.write_json(await self.db.run(dashboard_stats))
+
+
+class CalendarHandler(BaseHandler):
+    def prepare(self):
+        token = self.get_query_argument("token", "")
+        if not (token and hmac.compare_digest(token.encode(), self.token.encode())):
+            super().prepare()
+
+    async def get(self):
+        if await self.not_modified():
+            return
+        body = await self.db.run(get_feed().render)
+        self.set_header("Content-Type", "text/calendar; charset=utf-8")
+        self.set_header("Content-Disposition", 'inline; filename="job_search_hq.ics"')
+        self.finish(body)
+
+
+def make_app(db: Database, token: str) -> tornado.web.Application:
+    args = {"db": db, "token": token}
+    return tornado.web.Application([
+        (r"/api/applications", ApplicationsHandler, args),
+        (r"/api/applications/bulk-status", BulkStatusHandler, args),
+        (r"/api/applications/(\d+)", ApplicationHandler, args),
+        (r"/api/applications/(\d+)/events", ApplicationEventsHandler, args),
+        (r"/api/applications/(\d+)/documents", ApplicationDocumentsHandler, args),
+        (r"/api/documents/search", DocumentSearchHandler, args),
+        (r"/api/documents/(\d+)", DocumentHandler, args),
+        (r"/api/stats", StatsHandler, args),
+        (r"/api/calendar.ics", CalendarHandler, args),
+    ])
+
+
+async def serve(port: int, address: str, pool_size: int):
+    token = os.environ.get("JOBTRACKER_API_TOKEN", "")
+    if not token:
+        raise RuntimeError("JOBTRACKER_API_TOKEN not set.")
+
+    db = Database(1, pool_size)
+    with db.connection() as conn:
+        init_db(conn)
+
+    make_app(db, token).listen(port, address)
+    log.info("listening on %s:%d", address or "*", port)
+    await asyncio.Event().wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m jobtracker.api")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--address", default="")
+    parser.add_argument("--pool-size", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    asyncio.run(serve(args.port, args.address, args.pool_size))
+
+
+if __name__ == "__main__":
+    main()
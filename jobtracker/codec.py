@@ -0,0 +1,147 @@
+"""
+Storage codecs for documents.content: "zstd", "gzip" or "none".
+
+Which codec a document gets is decided per MIME type from the ratios seen
+so far: the first few documents of a type are compressed with every
+available codec, after which the type sticks to the one that saved the
+most, or is stored as-is when none paid off (JPEGs, most PDFs).
+content_hash and size_bytes always describe the original bytes.
+
+zstandard is in requirements.txt; without it gzip is the only codec, and
+stored zstd documents cannot be read.
+"""
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+NONE = "none"
+GZIP = "gzip"
+ZSTD = "zstd"
+
+ZSTD_LEVEL = 9
+GZIP_LEVEL = 6
+# keep the compressed form only when it saves at least this fraction
+MIN_SAVING = 0.10
+# documents of a MIME type compressed with every codec before it settles on the best (or none)
+SKIP_AFTER_SAMPLES = 5
+
+
+def available_codecs() -> tuple:
+    return (ZSTD, GZIP) if zstandard is not None else (GZIP,)
+
+
+def default_codec() -> str:
+    return available_codecs()[0]
+
+
+def compress(codec: str, data: bytes) -> bytes:
+    if codec == ZSTD:
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if codec == GZIP:
+        c = zlib.compressobj(GZIP_LEVEL, wbits=31)
+        return c.compress(data) + c.flush()
+    return data
+
+
+class _Identity:
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def decompressor(codec: str):
+    """Incremental decoder with zlib's decompress()/flush() interface."""
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Document is zstd-compressed but the zstandard package is not installed.")
+        return zstandard.ZstdDecompressor().decompressobj()
+    if codec == GZIP:
+        return zlib.decompressobj(wbits=31)
+    if codec in (NONE, None):
+        return _Identity()
+    raise RuntimeError(f"Unknown document codec: {codec}")
+
+
+def decode(codec: str, data: bytes) -> bytes:
+    d = decompressor(codec)
+    return d.decompress(data) + d.flush()
+
+
+# (mime, codec) -> [samples, original bytes, compressed bytes]
+_ratios = {}
+_lock = threading.Lock()
+
+
+def _candidates(mime: str) -> list:
+    """Codecs to try for a document of this type: all while sampling, then the best one or none."""
+    codecs = available_codecs()
+    with _lock:
+        stats = [_ratios.get((mime, c)) for c in codecs]
+    if any(not s or s[0] < SKIP_AFTER_SAMPLES for s in stats):
+        return list(codecs)
+    ratio, best = min((s[2] / max(s[1], 1), c) for s, c in zip(stats, codecs))
+    return [best] if ratio <= 1 - MIN_SAVING else []
+
+
+def _record(mime: str, codec: str, original: int, packed: int):
+    with _lock:
+        s = _ratios.setdefault((mime, codec), [0, 0, 0])
+        s[0] += 1
+        s[1] += original
+        s[2] += packed
+
+
+def encode(mime_type: str, content: bytes):
+    """(codec, stored bytes) for a document's content."""
+    mime = (mime_type or "application/octet-stream").lower()
+    codecs = _candidates(mime) if content else []
+    if not codecs:
+        return NONE, content
+
+    best = None
+    for codec in codecs:
+        packed = compress(codec, content)
+        _record(mime, codec, len(content), len(packed))
+        if best is None or len(packed) < len(best[1]):
+            best = codec, packed
+    if len(best[1]) > len(content) * (1 - MIN_SAVING):
+        return NONE, content
+    return best
+
+
+class StreamDecoder:
+    """
+    Decodes stored chunks fed in order and returns only the decoded bytes in
+    [start, end). Uncompressed content can be read from `start` directly
+    (read_from); compressed content has to be decoded from the beginning.
+    Feed b"" at end of data.
+    """
+
+    def __init__(self, codec: str, start: int = 0, end: int = None):
+        self._dec = decompressor(codec)
+        self.read_from = start if codec in (NONE, None) else 0
+        self._pos = self.read_from
+        self.start = start
+        self.end = end
+        self.done = False
+
+    def feed(self, chunk: bytes) -> bytes:
+        if chunk:
+            data = self._dec.decompress(chunk)
+        else:
+            data = self._dec.flush()
+            self.done = True
+
+        begin = self._pos
+        self._pos += len(data)
+        lo = max(self.start - begin, 0)
+        hi = len(data) if self.end is None else max(self.end - begin, 0)
+        if self.end is not None and self._pos >= self.end:
+            self.done = True
+        return data[lo:hi]
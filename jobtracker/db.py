@@ -1,17 +1,25 @@
+import functools
 import os
-import streamlit as st
+import random
+import threading
+import time
+import weakref
 import psycopg2
+import psycopg2.errors
+import psycopg2.extensions
 import psycopg2.extras
 
 
 def _get_secret(key: str):
     try:
+        # imported here: the API and the worker use this module without Streamlit
+        import streamlit as st
         return st.secrets.get(key, None)
     except Exception:
         return None
 
 
-def get_conn():
+def get_db_url() -> str:
     db_url = _get_secret("DATABASE_URL") or os.environ.get("DATABASE_URL")
     if not db_url:
         raise RuntimeError(
@@ -19,15 +27,296 @@ def get_conn():
             "Local: set env var DATABASE_URL\n"
             "Cloud: add DATABASE_URL to Streamlit Secrets"
         )
+    return db_url
 
-    return psycopg2.connect(
-        db_url,
+
+def get_read_urls() -> list:
+    """
+    Replica URLs from DATABASE_READ_URL (several separated by whitespace).
+    Empty when every read goes to the primary.
+    """
+    raw = _get_secret("DATABASE_READ_URL") or os.environ.get("DATABASE_READ_URL") or ""
+    return raw.split()
+
+
+def get_conn(write_clock=None):
+    """
+    A new primary connection. Pass another connection's `write_clock` to
+    share its read-your-writes window, e.g. for a callback reading on its
+    own connection what the session just wrote.
+    """
+    conn = psycopg2.connect(
+        get_db_url(),
         cursor_factory=psycopg2.extras.RealDictCursor,
+        connection_factory=RoutedConnection,
     )
+    conn.read_urls = get_read_urls()
+    if write_clock is not None:
+        conn.write_clock = write_clock
+    return conn
+
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def get_session_conn():
+    """
+    One long-lived connection per Streamlit session.
+
+    Prepared statements live on the server side of a connection, so the
+    connection has to survive reruns for them to be reused. init_db runs
+    once per process: its ALTER TABLEs take exclusive locks even when there
+    is nothing to migrate, and would deadlock against other sessions' reads.
+    Each run ends with end_reads() so the connection doesn't sit idle in a
+    transaction between reruns.
+    """
+    global _schema_ready
+    import streamlit as st
+
+    conn = st.session_state.get("_db_conn")
+    if conn is None or conn.closed:
+        conn = get_conn()
+        with _schema_lock:
+            if not _schema_ready:
+                init_db(conn)
+                _schema_ready = True
+        st.session_state["_db_conn"] = conn
+    else:
+        # a previous rerun died mid-transaction
+        end_reads(conn)
+    return conn
+
+
+def end_reads(conn):
+    """
+    Rolls back the transaction a run's reads left open, if any. Idle in a
+    transaction, the connection keeps its AccessShare locks, and another
+    process's ALTER TABLE (init_db in the API or worker) would queue behind
+    them, with every later query on the table queued behind that.
+    Repository writes commit before returning, so there is nothing to lose.
+    """
+    if not conn.closed and conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+        conn.rollback()
+
+
+# ---------------- Read replicas ----------------
+# after a commit, reads stay on the primary this long so a session sees its own writes
+STICKY_SECONDS = 5.0
+# a replica further behind than this is skipped until it catches up
+MAX_REPLICA_LAG_SECONDS = 5.0
+LAG_CHECK_SECONDS = 2.0
+# a replica that failed is left alone this long, process-wide
+REPLICA_RETRY_SECONDS = 30.0
+
+_REPLICA_ERRORS = (
+    psycopg2.OperationalError,
+    psycopg2.InterfaceError,
+    # e.g. a standby cancelling a query that conflicts with recovery
+    psycopg2.extensions.TransactionRollbackError,
+)
+
+_replica_down = {}   # url -> monotonic time it may be tried again
+_routing = threading.local()
+
+
+class WriteClock:
+    """When the connections sharing it last committed. The API shares one across its pool."""
+
+    def __init__(self):
+        self.last = float("-inf")
+
+    def touch(self):
+        self.last = time.monotonic()
+
+    def recent(self) -> bool:
+        return time.monotonic() - self.last < STICKY_SECONDS
+
+
+def _replica_lag(replica) -> float:
+    """Seconds of WAL the standby has received but not replayed (0 when caught up or not a standby)."""
+    with replica.cursor() as cur:
+        cur.execute("""
+            SELECT CASE
+                     WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                     ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+                   END AS lag
+        """)
+        return float(cur.fetchone()["lag"])
+
+
+class RoutedConnection(psycopg2.extensions.connection):
+    """
+    Primary connection that can hand reads to a replica connection of its
+    own (see on_reader). Every commit starts a read-your-writes window on
+    its WriteClock during which reads stay here.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.read_urls = []
+        self.write_clock = WriteClock()
+        self._replica = None
+        self._replica_url = None
+        self._lag_checked_at = 0.0
+        self._lag_ok = True
+
+    def commit(self):
+        super().commit()
+        self.write_clock.touch()
+
+    def close(self):
+        self._drop_replica()
+        super().close()
+
+    def replica(self):
+        """This connection's replica connection, or None when no replica is usable right now."""
+        if self._replica is None or self._replica.closed:
+            self._replica = self._connect_replica()
+            if self._replica is None:
+                return None
+            self._lag_checked_at = 0.0
+
+        now = time.monotonic()
+        if now - self._lag_checked_at >= LAG_CHECK_SECONDS:
+            try:
+                self._lag_ok = _replica_lag(self._replica) <= MAX_REPLICA_LAG_SECONDS
+            except _REPLICA_ERRORS:
+                self.replica_failed()
+                return None
+            self._lag_checked_at = now
+        return self._replica if self._lag_ok else None
+
+    def replica_failed(self):
+        if self._replica_url is not None:
+            _replica_down[self._replica_url] = time.monotonic() + REPLICA_RETRY_SECONDS
+        self._drop_replica()
+
+    def _connect_replica(self):
+        now = time.monotonic()
+        urls = [u for u in self.read_urls if _replica_down.get(u, 0) <= now]
+        random.shuffle(urls)   # spread sessions over the replicas
+        for url in urls:
+            try:
+                replica = psycopg2.connect(url, cursor_factory=psycopg2.extras.RealDictCursor, connect_timeout=3)
+            except psycopg2.OperationalError:
+                _replica_down[url] = now + REPLICA_RETRY_SECONDS
+                continue
+            # reads only, and no transaction left open to hold back the standby
+            replica.set_session(readonly=True, autocommit=True)
+            self._replica_url = url
+            return replica
+        return None
+
+    def _drop_replica(self):
+        replica, self._replica, self._replica_url = self._replica, None, None
+        if replica is not None and not replica.closed:
+            replica.close()
+
+
+def reader_for(conn):
+    """
+    Connection a read should run on: a replica when `conn` has some
+    configured, has not committed within STICKY_SECONDS, and the replica is
+    reachable and no more than MAX_REPLICA_LAG_SECONDS behind; else `conn`.
+    """
+    if not getattr(conn, "read_urls", None) or conn.write_clock.recent():
+        return conn
+    return conn.replica() or conn
+
+
+def on_reader(conn, fn, *args, **kwargs):
+    """
+    Runs fn(reader, ...) on reader_for(conn), retrying on the primary if the
+    replica fails. Reads nested inside stay on the connection chosen here,
+    so e.g. a watermark and the rows read after it come from the same server.
+    """
+    if getattr(_routing, "active", False):
+        return fn(conn, *args, **kwargs)
+    _routing.active = True
+    try:
+        reader = reader_for(conn)
+        if reader is conn:
+            return fn(conn, *args, **kwargs)
+        try:
+            return fn(reader, *args, **kwargs)
+        except _REPLICA_ERRORS:
+            conn.replica_failed()
+            return fn(conn, *args, **kwargs)
+    finally:
+        _routing.active = False
+
+
+def on_primary(conn, fn, *args, **kwargs):
+    """
+    Runs fn(conn, ...) with the reads nested inside kept on the primary, for
+    callers that must see a commit a replica may not have replayed yet.
+    """
+    if getattr(_routing, "active", False):
+        return fn(conn, *args, **kwargs)
+    _routing.active = True
+    try:
+        return fn(conn, *args, **kwargs)
+    finally:
+        _routing.active = False
+
+
+def read_only(fn):
+    """Marks a repository function as a pure read that may be served by a replica (see on_reader)."""
+    @functools.wraps(fn)
+    def wrapper(conn, *args, **kwargs):
+        return on_reader(conn, fn, *args, **kwargs)
+    return wrapper
+
+
+# ---------------- Prepared statements ----------------
+# names prepared on each connection; dropped with the connection
+_prepared = weakref.WeakKeyDictionary()
+
+
+def execute_prepared(cur, name: str, sql: str, params=()):
+    """
+    Runs `sql` (written with $1..$n placeholders) as a named server-side
+    prepared statement. The statement is parsed and planned once per
+    connection; later calls only send `EXECUTE name (...)`. A statement the
+    server has lost is prepared again, except inside a transaction the
+    caller already started: that one is aborted, so the error is raised.
+    """
+    conn = cur.connection
+    names = _prepared.setdefault(conn, set())
+    execute = f"EXECUTE {name}"
+    if params:
+        execute += " (" + ",".join(["%s"] * len(params)) + ")"
+
+    # a failed EXECUTE aborts the transaction; only when it opened one is rolling back harmless
+    first = conn.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    if name not in names:
+        cur.execute(f"PREPARE {name} AS {sql}")
+        names.add(name)
+
+    try:
+        cur.execute(execute, params or None)
+    except psycopg2.errors.InvalidSqlStatementName:
+        # the server lost the statement (e.g. a pooler reset the session)
+        names.discard(name)
+        if not first:
+            # the caller's earlier statements went with the transaction; let it
+            # roll back and retry rather than carry on without them
+            raise
+        conn.rollback()
+        cur.execute(f"PREPARE {name} AS {sql}")
+        names.add(name)
+        cur.execute(execute, params or None)
+
+
+INIT_LOCK_KEY = 0x6A74696E   # "jtin"
 
 
 def init_db(conn):
     with conn.cursor() as cur:
+        # app, API and worker starting together would otherwise deadlock on each other's ALTER TABLEs
+        cur.execute("SELECT pg_advisory_xact_lock(%s)", (INIT_LOCK_KEY,))
         # applications
         cur.execute("""
             CREATE TABLE IF NOT EXISTS applications (
@@ -88,6 +377,314 @@ def init_db(conn):
             ON documents(application_id, doc_type, content_hash)
         """)
 
+        # incremental sync: every insert/update stamps the writing transaction id,
+        # deletes leave a tombstone so readers can patch their snapshots
+        cur.execute("ALTER TABLE applications ADD COLUMN IF NOT EXISTS row_version BIGINT NOT NULL DEFAULT 0")
+        cur.execute("CREATE INDEX IF NOT EXISTS applications_row_version_idx ON applications(row_version)")
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS application_tombstones (
+                application_id INTEGER PRIMARY KEY,
+                row_version BIGINT NOT NULL,
+                deleted_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS application_tombstones_row_version_idx
+            ON application_tombstones(row_version)
+        """)
+        cur.execute("""
+            CREATE OR REPLACE FUNCTION jt_stamp_row_version() RETURNS trigger AS $$
+            BEGIN
+                -- derived columns (the worker's overdue sweep) are not an edit: a reader
+                -- holding the old version is not stale, so its If-Match must still pass
+                IF TG_OP = 'UPDATE' AND (to_jsonb(NEW) - 'row_version' - 'is_overdue' - 'is_active')
+                                      = (to_jsonb(OLD) - 'row_version' - 'is_overdue' - 'is_active') THEN
+                    NEW.row_version := OLD.row_version;
+                ELSE
+                    NEW.row_version := txid_current();
+                END IF;
+                RETURN NEW;
+            END $$ LANGUAGE plpgsql
+        """)
+        cur.execute("""
+            CREATE OR REPLACE FUNCTION jt_application_tombstone() RETURNS trigger AS $$
+            BEGIN
+                INSERT INTO application_tombstones (application_id, row_version)
+                VALUES (OLD.id, txid_current())
+                ON CONFLICT (application_id)
+                DO UPDATE SET row_version=EXCLUDED.row_version, deleted_at=now();
+                RETURN OLD;
+            END $$ LANGUAGE plpgsql
+        """)
+        cur.execute("""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'applications_row_version_trg') THEN
+                    CREATE TRIGGER applications_row_version_trg
+                    BEFORE INSERT OR UPDATE ON applications
+                    FOR EACH ROW EXECUTE FUNCTION jt_stamp_row_version();
+                END IF;
+                IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'applications_tombstone_trg') THEN
+                    CREATE TRIGGER applications_tombstone_trg
+                    AFTER DELETE ON applications
+                    FOR EACH ROW EXECUTE FUNCTION jt_application_tombstone();
+                END IF;
+            END $$;
+        """)
+
+        # live refresh: one notification per changed application/document row
+        cur.execute("""
+            CREATE OR REPLACE FUNCTION jt_notify_change() RETURNS trigger AS $$
+            DECLARE
+                rec RECORD;
+                app_id INTEGER;
+            BEGIN
+                -- nested: plpgsql doesn't short-circuit AND, and documents have no row_version
+                IF TG_OP = 'UPDATE' AND TG_TABLE_NAME = 'applications' THEN
+                    IF NEW.row_version = OLD.row_version THEN
+                        RETURN NULL;  -- derived columns only, nothing for readers to refresh
+                    END IF;
+                END IF;
+                IF TG_OP = 'DELETE' THEN
+                    rec := OLD;
+                ELSE
+                    rec := NEW;
+                END IF;
+                IF TG_TABLE_NAME = 'documents' THEN
+                    app_id := rec.application_id;
+                ELSE
+                    app_id := rec.id;
+                END IF;
+                PERFORM pg_notify('jobtracker_changes', json_build_object(
+                    'table', TG_TABLE_NAME, 'op', TG_OP, 'id', rec.id, 'application_id', app_id
+                )::text);
+                RETURN NULL;
+            END $$ LANGUAGE plpgsql
+        """)
+        cur.execute("""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'applications_notify_trg') THEN
+                    CREATE TRIGGER applications_notify_trg
+                    AFTER INSERT OR UPDATE OR DELETE ON applications
+                    FOR EACH ROW EXECUTE FUNCTION jt_notify_change();
+                END IF;
+                IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'documents_notify_trg') THEN
+                    CREATE TRIGGER documents_notify_trg
+                    AFTER INSERT OR UPDATE OR DELETE ON documents
+                    FOR EACH ROW EXECUTE FUNCTION jt_notify_change();
+                END IF;
+            END $$;
+        """)
+
+        # precomputed state maintained by jobtracker.worker
+        cur.execute("ALTER TABLE applications ADD COLUMN IF NOT EXISTS is_overdue BOOLEAN NOT NULL DEFAULT FALSE")
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS applications_due_idx
+            ON applications ((COALESCE(next_action_date, followup_date)))
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS applications_overdue_idx ON applications(id) WHERE is_overdue")
+        cur.execute("CREATE INDEX IF NOT EXISTS applications_next_action_date_idx ON applications(next_action_date)")
+        # writes keep the flag right; the worker's daily sweep handles the date rolling over
+        cur.execute("""
+            CREATE OR REPLACE FUNCTION jt_flag_overdue() RETURNS trigger AS $$
+            BEGIN
+                NEW.is_overdue := COALESCE(
+                    COALESCE(NEW.next_action_date, NEW.followup_date) < to_char(CURRENT_DATE, 'YYYY-MM-DD'), FALSE
+                ) AND NEW.status NOT IN ('Rejected', 'Withdrawn');
+                RETURN NEW;
+            END $$ LANGUAGE plpgsql
+        """)
+        cur.execute("""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'applications_overdue_trg') THEN
+                    CREATE TRIGGER applications_overdue_trg
+                    BEFORE INSERT OR UPDATE ON applications
+                    FOR EACH ROW EXECUTE FUNCTION jt_flag_overdue();
+                END IF;
+            END $$;
+        """)
+
+        # hot/cold split: closed applications (service.ARCHIVED_STATUSES) stay in the table but
+        # out of the working set. Default reads filter on is_active and are served by a partial
+        # index in fetch_df's order, so their cost follows the active rows only. (Declarative
+        # partitioning would need the key in every unique constraint, breaking the foreign keys
+        # documents and action_queue hold on applications.id.)
+        cur.execute("""
+            ALTER TABLE applications ADD COLUMN IF NOT EXISTS is_active BOOLEAN
+            GENERATED ALWAYS AS (status NOT IN ('Rejected', 'Withdrawn', 'Ghosted')) STORED
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS applications_hot_order_idx
+            ON applications ((COALESCE(next_action_date, followup_date, '9999-12-31')), id DESC)
+            WHERE is_active
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS action_queue (
+                day TEXT NOT NULL,
+                application_id INTEGER NOT NULL REFERENCES applications(id) ON DELETE CASCADE,
+                due_date TEXT NOT NULL,
+                label TEXT NOT NULL,
+                PRIMARY KEY (day, application_id)
+            )
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS job_runs (
+                job TEXT PRIMARY KEY,
+                day TEXT NOT NULL,
+                watermark BIGINT,
+                ran_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                details JSONB
+            )
+        """)
+
+        # append-only audit log: field-level diffs written by a trigger in the writing transaction.
+        # Range-partitioned by month (old months can be detached/dropped whole); BRIN on the
+        # timestamp for time-range scans, btree for one application's timeline.
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS application_events (
+                application_id INTEGER NOT NULL,
+                at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp(),
+                op CHAR(1) NOT NULL,
+                diff JSONB NOT NULL
+            ) PARTITION BY RANGE (at)
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS application_events_at_brin ON application_events USING brin (at)")
+        cur.execute("CREATE INDEX IF NOT EXISTS application_events_app_idx ON application_events (application_id, at)")
+        cur.execute("""
+            CREATE OR REPLACE FUNCTION jt_ensure_event_partition(month DATE) RETURNS void AS $$
+            DECLARE
+                start_at DATE := date_trunc('month', month)::date;
+                end_at DATE := (date_trunc('month', month) + interval '1 month')::date;
+                part TEXT := 'application_events_' || to_char(start_at, 'YYYY_MM');
+            BEGIN
+                IF to_regclass(part) IS NOT NULL THEN
+                    RETURN;
+                END IF;
+                -- rows the default partition caught for this month (the worker missed the
+                -- month boundary) would make a plain PARTITION OF fail: move them over first,
+                -- with inserts into the default held off until the partition is attached
+                LOCK TABLE application_events_default IN EXCLUSIVE MODE;
+                EXECUTE format('CREATE TABLE %I (LIKE application_events INCLUDING DEFAULTS)', part);
+                EXECUTE format(
+                    'WITH moved AS (DELETE FROM application_events_default WHERE at >= %L AND at < %L RETURNING *) '
+                    'INSERT INTO %I SELECT * FROM moved',
+                    start_at, end_at, part
+                );
+                EXECUTE format(
+                    'ALTER TABLE application_events ATTACH PARTITION %I FOR VALUES FROM (%L) TO (%L)',
+                    part, start_at, end_at
+                );
+            END $$ LANGUAGE plpgsql
+        """)
+        # the worker keeps the next months created; the default partition only catches stragglers,
+        # which jt_ensure_event_partition moves out when their month's partition is created
+        cur.execute("CREATE TABLE IF NOT EXISTS application_events_default PARTITION OF application_events DEFAULT")
+        cur.execute("""
+            SELECT jt_ensure_event_partition(CURRENT_DATE),
+                   jt_ensure_event_partition((CURRENT_DATE + interval '1 month')::date)
+        """)
+        # inserts record the initial non-null fields, updates {field: [old, new]} for changed
+        # fields only (derived/bookkeeping columns excluded), deletes the last status
+        cur.execute("""
+            CREATE OR REPLACE FUNCTION jt_application_event() RETURNS trigger AS $$
+            DECLARE
+                d JSONB;
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    INSERT INTO application_events (application_id, op, diff)
+                    VALUES (NEW.id, 'I', jsonb_strip_nulls(
+                        to_jsonb(NEW) - 'id' - 'row_version' - 'created_at' - 'updated_at' - 'is_overdue' - 'is_active'));
+                ELSIF TG_OP = 'UPDATE' THEN
+                    SELECT jsonb_object_agg(n.key, jsonb_build_array(o.value, n.value)) INTO d
+                      FROM jsonb_each(to_jsonb(NEW) - 'row_version' - 'updated_at' - 'is_overdue' - 'is_active') n
+                      JOIN jsonb_each(to_jsonb(OLD)) o USING (key)
+                     WHERE n.value IS DISTINCT FROM o.value;
+                    IF d IS NOT NULL THEN
+                        INSERT INTO application_events (application_id, op, diff) VALUES (NEW.id, 'U', d);
+                    END IF;
+                ELSE
+                    INSERT INTO application_events (application_id, op, diff)
+                    VALUES (OLD.id, 'D', jsonb_build_object('status', OLD.status));
+                END IF;
+                RETURN NULL;
+            END $$ LANGUAGE plpgsql
+        """)
+        cur.execute("""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_trigger WHERE tgname = 'applications_event_trg') THEN
+                    CREATE TRIGGER applications_event_trg
+                    AFTER INSERT OR UPDATE OR DELETE ON applications
+                    FOR EACH ROW EXECUTE FUNCTION jt_application_event();
+                END IF;
+            END $$;
+        """)
+
+        # size known without touching the blob; previews generated once per document
+        cur.execute("ALTER TABLE documents ADD COLUMN IF NOT EXISTS size_bytes INTEGER")
+        cur.execute("UPDATE documents SET size_bytes = octet_length(content) WHERE size_bytes IS NULL")
+        # content is stored zstd/gzip-compressed where it pays off (see jobtracker.codec);
+        # size_bytes and content_hash always describe the original bytes
+        cur.execute("ALTER TABLE documents ADD COLUMN IF NOT EXISTS codec TEXT NOT NULL DEFAULT 'none'")
+        # uncompressed TOAST so substring() reads only the chunks a ranged download needs;
+        # content is already compressed by the app or by its format (applies to newly written rows)
+        cur.execute("""
+            DO $$
+            BEGIN
+                IF (SELECT attstorage FROM pg_attribute
+                     WHERE attrelid = 'documents'::regclass AND attname = 'content') <> 'e' THEN
+                    ALTER TABLE documents ALTER COLUMN content SET STORAGE EXTERNAL;
+                END IF;
+            END $$;
+        """)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS document_previews (
+                document_id INTEGER PRIMARY KEY REFERENCES documents(id) ON DELETE CASCADE,
+                png BYTEA NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+
+        # extracted attachment text for full-text search (filled off the request path)
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS document_text (
+                document_id INTEGER PRIMARY KEY REFERENCES documents(id) ON DELETE CASCADE,
+                application_id INTEGER NOT NULL REFERENCES applications(id) ON DELETE CASCADE,
+                body TEXT NOT NULL,
+                tsv TSVECTOR GENERATED ALWAYS AS (to_tsvector('english', body)) STORED,
+                extracted_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS document_text_tsv_idx ON document_text USING GIN (tsv)")
+
+        # likely-duplicate detection (see jobtracker.dedupe): normalised keys and
+        # MinHash LSH bands per application; rows sharing a band are candidates
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS application_dedupe (
+                application_id INTEGER PRIMARY KEY REFERENCES applications(id) ON DELETE CASCADE,
+                row_version BIGINT NOT NULL,
+                dedupe_key TEXT NOT NULL,
+                url_key TEXT,
+                bands BIGINT[] NOT NULL,
+                cluster_id INTEGER
+            )
+        """)
+        # no pending list: the Add-form lookup would otherwise scan every recent insert
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS application_dedupe_bands_idx
+            ON application_dedupe USING GIN (bands) WITH (fastupdate = off)
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS application_dedupe_url_idx
+            ON application_dedupe (url_key) WHERE url_key IS NOT NULL
+        """)
+        cur.execute("""
+            CREATE INDEX IF NOT EXISTS application_dedupe_cluster_idx
+            ON application_dedupe (cluster_id) WHERE cluster_id IS NOT NULL
+        """)
+
         # profile row marker (for settings) + link to a real applications row
         cur.execute("""
             CREATE TABLE IF NOT EXISTS app_profile (
@@ -0,0 +1,262 @@
+"""
+Likely-duplicate applications: the same company/role entered twice with
+slightly different spelling, or the same posting URL.
+
+Company and role are normalised (case, accents, punctuation, legal
+suffixes, common abbreviations) and the character trigrams of the company
+are MinHashed. The signature is cut into LSH bands and stored per
+application (application_dedupe.bands, GIN-indexed) together with the
+company's one-character-deletion variants, which catch typos too small for
+trigrams to see. A lookup is one index probe for rows with a similar
+company, however many applications exist. Candidates are then confirmed
+on company and role separately, so two roles at one company are not a
+duplicate. cluster() compares every pair sharing a bucket; the buckets of
+an employer with very many applications are split by role bands and
+posting URL instead of capped.
+"""
+import functools
+import hashlib
+import re
+import unicodedata
+import zlib
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+NUM_PERM = 64
+# 16 bands of 4: companies at 0.7 trigram Jaccard share a band ~99% of the
+# time, loosely similar ones (0.2, e.g. the same first syllable) ~2.5%
+BAND_ROWS = 4
+# company and role must each be at least this similar (trigram Jaccard)
+MIN_SIMILARITY = 0.7
+# companies at least this long also match one typo apart
+EDIT_MIN_LEN = 5
+# members of a bucket cluster() compares every row with; past this, later members are
+# filed by role band and URL too, and found through those (see cluster)
+BUCKET_SPLIT = 64
+
+_PRIME = (1 << 31) - 1
+
+_LEGAL_SUFFIXES = {
+    "inc", "incorporated", "llc", "llp", "ltd", "limited", "corp", "corporation", "co", "company",
+    "plc", "gmbh", "ag", "sa", "sas", "bv", "nv", "pty", "srl", "oy", "ab", "as", "group", "holdings",
+}
+_ROLE_WORDS = {
+    "sr": "senior", "snr": "senior", "jr": "junior", "eng": "engineer", "engr": "engineer",
+    "swe": "software engineer", "sde": "software engineer", "dev": "developer", "devs": "developers",
+    "mgr": "manager", "mngr": "manager", "pm": "product manager", "ml": "machine learning",
+    "ii": "2", "iii": "3", "iv": "4",
+}
+_TRACKING_PARAMS = {"ref", "refid", "src", "source", "trk", "trackingid", "gclid", "fbclid", "lipi", "origin"}
+
+
+def _words(s: str):
+    s = unicodedata.normalize("NFKD", s or "").encode("ascii", "ignore").decode().lower()
+    return re.findall(r"[a-z0-9]+", s.replace("&", " and "))
+
+
+def normalize_company(company: str) -> str:
+    words = _words(company)
+    if len(words) > 1 and words[0] == "the":
+        words = words[1:]
+    while len(words) > 1 and words[-1] in _LEGAL_SUFFIXES:
+        words = words[:-1]
+    return " ".join(words)
+
+
+def normalize_role(role: str) -> str:
+    return " ".join(_ROLE_WORDS.get(w, w) for w in _words(role))
+
+
+def dedupe_key(company: str, role: str) -> str:
+    return f"{normalize_company(company)}|{normalize_role(role)}"
+
+
+def url_key(job_url: str):
+    """
+    Host and path of a posting URL, without scheme, www. and tracking
+    parameters. None when it is not a URL or too generic to name one
+    posting (a bare host or a single path segment like /careers).
+    """
+    raw = (job_url or "").strip()
+    if not raw:
+        return None
+    parts = urlsplit(raw if "//" in raw else "//" + raw)
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if not host or "." not in host:
+        return None
+    query = sorted((k, v) for k, v in parse_qsl(parts.query)
+                   if not k.lower().startswith("utm_") and k.lower() not in _TRACKING_PARAMS)
+    path = parts.path.rstrip("/")
+    if path.count("/") < 2 and not query:
+        return None
+    return host + path + ("?" + urlencode(query) if query else "")
+
+
+def trigrams(text: str) -> set:
+    """pg_trgm-style trigrams: each word padded with two spaces in front and one behind."""
+    grams = set()
+    for w in text.split():
+        padded = f"  {w} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a: set, b: set) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _one_edit_apart(a: str, b: str) -> bool:
+    """At most one inserted, deleted or substituted character, or two adjacent ones swapped."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b) and a[i + 2:] == b[i + 2:] and a[i:i + 2] == b[i:i + 2][::-1]:
+        return True
+    return a[i + (len(a) == len(b)):] == b[i + 1:]
+
+
+def _parse(key: str, url):
+    company, _, role = key.partition("|")
+    return company, trigrams(company), trigrams(role), url
+
+
+def _match(a, b) -> float:
+    company_a, company_grams_a, role_grams_a, url_a = a
+    company_b, company_grams_b, role_grams_b, url_b = b
+    company = similarity(company_grams_a, company_grams_b)
+    if company < MIN_SIMILARITY:
+        if min(len(company_a), len(company_b)) < EDIT_MIN_LEN or not _one_edit_apart(company_a, company_b):
+            return 0.0
+        company = MIN_SIMILARITY
+    if url_a and url_a == url_b:
+        # the same posting at the same company, whatever the role was called
+        return 1.0
+    role = similarity(role_grams_a, role_grams_b)
+    return min(company, role) if role >= MIN_SIMILARITY else 0.0
+
+
+def _hash64(data: bytes) -> int:
+    # signed, to fit BIGINT[]
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big", signed=True)
+
+
+@functools.lru_cache(maxsize=None)
+def _permutations():
+    # numpy is imported on first use: repository (and so the API and worker) import this module
+    import numpy as np
+
+    rng = np.random.RandomState(0x6A74)
+    return rng.randint(1, _PRIME, NUM_PERM).astype(np.uint64), rng.randint(0, _PRIME, NUM_PERM).astype(np.uint64)
+
+
+def _minhash_bands(grams: set) -> set:
+    """LSH bands of the MinHash signature of a trigram set."""
+    import numpy as np
+
+    a, b = _permutations()
+    hashes = np.fromiter((zlib.crc32(g.encode()) & _PRIME for g in grams), dtype=np.uint64, count=len(grams))
+    signature = ((np.outer(a, hashes) + b[:, None]) % _PRIME).min(axis=1)
+    return {_hash64(bytes([i]) + signature[i:i + BAND_ROWS].tobytes()) for i in range(0, NUM_PERM, BAND_ROWS)}
+
+
+def bands(key: str) -> list:
+    """
+    Index values for a key: LSH bands of the company's trigram MinHash
+    signature, plus the company and its one-deletion variants (two names
+    one typo apart always share one of those).
+    """
+    company = key.partition("|")[0]
+    grams = trigrams(company)
+    if not grams:
+        return []
+    out = _minhash_bands(grams)
+    if len(company) >= EDIT_MIN_LEN - 1:
+        variants = {company} | {company[:i] + company[i + 1:] for i in range(len(company))}
+        out.update(_hash64(b"d" + v.encode()) for v in variants)
+    return sorted(out)
+
+
+def keys(company: str, role: str, job_url: str = None):
+    """(dedupe_key, url_key, bands) for one application."""
+    key = dedupe_key(company, role)
+    return key, url_key(job_url), bands(key)
+
+
+def match_score(key_a: str, url_a, key_b: str, url_b) -> float:
+    """
+    How alike two applications are, 0 when they are not duplicates: the
+    lower of company and role similarity, or 1.0 for the same posting URL
+    at the same company.
+    """
+    return _match(_parse(key_a, url_a), _parse(key_b, url_b))
+
+
+class UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        parent = self.parent
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def cluster(rows) -> list:
+    """
+    Groups of duplicate application ids from (id, dedupe_key, url_key,
+    bands) rows. Each row is compared with the rows sharing one of its
+    buckets. A bucket past BUCKET_SPLIT members (one employer's many
+    applications) is split: later members are compared through the role's
+    LSH bands and the posting URL, the two ways _match lets a pair at one
+    company through, so the work stays near-linear without dropping a
+    candidate a cap would have.
+    """
+    uf = UnionFind()
+    info = {}
+    buckets = {}
+    split = {}
+
+    def compare(app_id, parsed, members, seen):
+        for other in members:
+            if other in seen or uf.find(other) == uf.find(app_id):
+                continue
+            seen.add(other)
+            if _match(parsed, info[other]):
+                uf.union(app_id, other)
+
+    for app_id, key, url, row_bands in rows:
+        parsed = info[app_id] = _parse(key, url)
+        seen = set()
+        second = None
+        for b in row_bands:
+            members = buckets.setdefault(b, [])
+            compare(app_id, parsed, members, seen)
+            if len(members) < BUCKET_SPLIT:
+                members.append(app_id)
+                continue
+            if second is None:
+                second = ([("u", url)] if url else []) + sorted(_minhash_bands(parsed[2]) if parsed[2] else ())
+            for k in second:
+                filed = split.setdefault((b, k), [])
+                compare(app_id, parsed, filed, seen)
+                filed.append(app_id)
+
+    groups = {}
+    for app_id in info:
+        groups.setdefault(uf.find(app_id), []).append(app_id)
+    return sorted((sorted(g) for g in groups.values() if len(g) > 1), key=lambda g: g[0])
@@ -0,0 +1,204 @@
+import email
+import email.policy
+import io
+import logging
+import multiprocessing
+import re
+import threading
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from html import unescape
+from xml.etree import ElementTree
+
+log = logging.getLogger(__name__)
+
+# a tsvector is capped at 1 MB; resumes and emails are far below this
+MAX_TEXT_CHARS = 500_000
+POOL_WORKERS = 2
+PREVIEW_SIZE = (160, 220)
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".bmp")
+
+
+# ---------------- Extractors (run in worker processes) ----------------
+def _strip_html(html: str) -> str:
+    html = re.sub(r"(?is)<(script|style).*?</\1>", " ", html)
+    return unescape(re.sub(r"(?s)<[^>]+>", " ", html))
+
+
+def _eml_text(content: bytes) -> str:
+    msg = email.message_from_bytes(content, policy=email.policy.default)
+    parts = [f"{h}: {msg[h]}" for h in ("Subject", "From", "To", "Date") if msg[h]]
+
+    body = msg.get_body(preferencelist=("plain", "html"))
+    if body is not None:
+        text = body.get_content()
+        parts.append(_strip_html(text) if body.get_content_type() == "text/html" else text)
+    return "\n".join(parts)
+
+
+def _docx_text(content: bytes) -> str:
+    ns = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+    with zipfile.ZipFile(io.BytesIO(content)) as z:
+        root = ElementTree.fromstring(z.read("word/document.xml"))
+    paragraphs = []
+    for p in root.iter(f"{ns}p"):
+        paragraphs.append("".join(t.text or "" for t in p.iter(f"{ns}t")))
+    return "\n".join(p for p in paragraphs if p)
+
+
+_PDF_STREAM = re.compile(rb"stream\r?\n(.*?)\r?\nendstream", re.S)
+_PDF_TEXT_OP = re.compile(rb"\[(.*?)\]\s*TJ|\((.*?)(?<!\\)\)\s*(?:Tj|'|\")", re.S)
+_PDF_TJ_ITEM = re.compile(rb"\((.*?)(?<!\\)\)|(-?\d+(?:\.\d+)?)", re.S)
+
+
+def _pdf_unescape(s: bytes) -> str:
+    s = re.sub(rb"\\([nrtbf()\\])", lambda m: {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"", b"f": b""}.get(m.group(1), m.group(1)), s)
+    s = re.sub(rb"\\([0-7]{1,3})", lambda m: bytes([int(m.group(1), 8) & 0xFF]), s)
+    return s.decode("latin-1")
+
+
+def _pdf_text(content: bytes) -> str:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        PdfReader = None
+
+    if PdfReader is not None:
+        reader = PdfReader(io.BytesIO(content))
+        return "\n".join(page.extract_text() or "" for page in reader.pages)
+
+    # fallback without pypdf: pull string operands out of (Flate) content
+    # streams; good enough for text-based PDFs, nothing for scanned ones
+    out = []
+    for raw in _PDF_STREAM.findall(content):
+        try:
+            data = zlib.decompress(raw)
+        except zlib.error:
+            data = raw
+        for tj, single in _PDF_TEXT_OP.findall(data):
+            if single:
+                out.append(_pdf_unescape(single))
+            else:
+                for text, kern in _PDF_TJ_ITEM.findall(tj):
+                    if kern:
+                        # a wide negative kern is how PDFs usually space words
+                        out.append(" " if float(kern) <= -200 else "")
+                    else:
+                        out.append(_pdf_unescape(text))
+            out.append(" ")
+    return "".join(out)
+
+
+def extract_text(filename: str, mime_type: str, content: bytes) -> str:
+    """Plain text of a PDF/DOCX/EML/text attachment, or "" for anything else."""
+    name = (filename or "").lower()
+    mime = (mime_type or "").lower()
+    try:
+        if name.endswith(".eml") or mime == "message/rfc822":
+            text = _eml_text(content)
+        elif name.endswith(".docx") or mime == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
+            text = _docx_text(content)
+        elif name.endswith(".pdf") or mime == "application/pdf":
+            text = _pdf_text(content)
+        elif mime.startswith("text/") or name.endswith((".txt", ".md")):
+            text = content.decode("utf-8", errors="replace")
+        else:
+            return ""
+    except Exception:
+        log.exception("text extraction failed for %s", filename)
+        return ""
+    # Postgres text cannot hold NUL
+    return re.sub(r"\s+", " ", text.replace("\x00", "")).strip()[:MAX_TEXT_CHARS]
+
+
+_PDF_JPEG = re.compile(rb"/DCTDecode.*?stream\r?\n(\xff\xd8.*?)\r?\nendstream", re.S)
+
+
+def make_preview(filename: str, mime_type: str, content: bytes):
+    """
+    Small PNG thumbnail, or None. Images are scaled down directly. PDFs use
+    their first embedded JPEG (the page of a scanned PDF); pillow cannot
+    rasterise vector PDF pages, so those get no preview.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+
+    name = (filename or "").lower()
+    mime = (mime_type or "").lower()
+    if mime.startswith("image/") or name.endswith(IMAGE_EXTENSIONS):
+        source = content
+    elif name.endswith(".pdf") or mime == "application/pdf":
+        m = _PDF_JPEG.search(content)
+        if not m:
+            return None
+        source = m.group(1)
+    else:
+        return None
+
+    try:
+        with Image.open(io.BytesIO(source)) as img:
+            img.thumbnail(PREVIEW_SIZE)
+            out = io.BytesIO()
+            img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB").save(out, format="PNG", optimize=True)
+            return out.getvalue()
+    except Exception:
+        log.exception("preview failed for %s", filename)
+        return None
+
+
+def process_document(filename: str, mime_type: str, content: bytes):
+    """(text, preview png or None); what the pool computes for each upload."""
+    return extract_text(filename, mime_type, content), make_preview(filename, mime_type, content)
+
+
+# ---------------- Background pipeline ----------------
+_pool = None
+_store_conn = None
+_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock:
+        if _pool is None:
+            # spawn: the app process is multi-threaded, forking it is unsafe
+            _pool = ProcessPoolExecutor(max_workers=POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def _store(doc_id: int, app_id: int, future):
+    global _store_conn
+    from jobtracker.db import get_conn
+    from jobtracker.repository import save_document_text, save_document_preview
+
+    try:
+        text, preview = future.result()
+    except Exception:
+        log.exception("text extraction failed for document %s", doc_id)
+        return
+
+    with _lock:
+        try:
+            if _store_conn is None or _store_conn.closed:
+                _store_conn = get_conn()
+            save_document_text(_store_conn, doc_id, app_id, text)
+            if preview:
+                save_document_preview(_store_conn, doc_id, preview)
+        except Exception:
+            log.exception("storing text/preview for document %s failed", doc_id)
+            if _store_conn is not None and not _store_conn.closed:
+                _store_conn.rollback()
+
+
+def submit_extraction(doc_id: int, app_id: int, filename: str, mime_type: str, content: bytes):
+    """Extracts and stores a document's text and preview in the background; returns immediately."""
+    try:
+        future = _get_pool().submit(process_document, filename, mime_type, content)
+    except Exception:
+        # the worker's extract_text job picks up whatever is missed here
+        log.exception("could not queue text extraction for document %s", doc_id)
+        return
+    future.add_done_callback(lambda f: _store(doc_id, app_id, f))
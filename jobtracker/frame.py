@@ -0,0 +1,77 @@
+from datetime import date
+
+import pandas as pd
+
+# low-cardinality, enum-like columns
+CATEGORY_COLUMNS = ("status", "work_model", "priority", "interview_stage", "source")
+# stored as 'YYYY-MM-DD' TEXT
+DATE_COLUMNS = (
+    "applied_date", "followup_date", "interview_date", "next_action_date",
+    "created_at", "updated_at",
+)
+INT_COLUMNS = ("id", "row_version")
+BOOL_COLUMNS = ("is_overdue", "is_active")
+
+DATE_FMT = "%Y-%m-%d"
+
+
+def _text_dtype():
+    try:
+        import pyarrow  # noqa: F401
+        return pd.StringDtype("pyarrow")
+    except ImportError:
+        return pd.StringDtype("python")
+
+
+def _column(name, values):
+    if name in INT_COLUMNS:
+        return pd.Series(values, dtype="int64")
+    if name in BOOL_COLUMNS:
+        return pd.Series(values, dtype="bool")
+    if name in CATEGORY_COLUMNS:
+        return pd.Series(values, dtype="category")
+    if name in DATE_COLUMNS:
+        return pd.to_datetime(pd.Series(values, dtype=object), format=DATE_FMT, errors="coerce")
+    return pd.Series(values, dtype=_text_dtype())
+
+
+def build_frame(columns, rows) -> pd.DataFrame:
+    """
+    Builds the applications frame from tuple rows, column by column, without
+    a dict per row or object-dtype columns: categoricals for enum-like fields,
+    datetime64 for dates and arrow-backed strings for free text.
+    """
+    if rows:
+        arrays = list(zip(*rows))
+    else:
+        arrays = [()] * len(columns)
+    return pd.DataFrame({name: _column(name, list(values)) for name, values in zip(columns, arrays)})
+
+
+def coerce_frame(df: pd.DataFrame) -> pd.DataFrame:
+    # pd.concat of categoricals with different categories falls back to object;
+    # patched-out values would otherwise linger as unused categories
+    for name in CATEGORY_COLUMNS:
+        if name not in df.columns:
+            continue
+        if isinstance(df[name].dtype, pd.CategoricalDtype):
+            df[name] = df[name].cat.remove_unused_categories()
+        else:
+            df[name] = df[name].astype("category")
+    return df
+
+
+def overdue_series(df: pd.DataFrame) -> pd.Series:
+    """Vectorised service.compute_overdue over next_action_date (or followup_date)."""
+    due = df["next_action_date"].fillna(df["followup_date"])
+    today = pd.Timestamp(date.today())
+    return (due < today) & ~df["status"].isin(["Rejected", "Withdrawn"])
+
+
+def frame_value(v):
+    """Cell value as the plain Python/DB representation (dates back to 'YYYY-MM-DD')."""
+    if v is None or (not isinstance(v, (list, dict)) and pd.isna(v)):
+        return None
+    if isinstance(v, pd.Timestamp):
+        return v.strftime(DATE_FMT)
+    return v
@@ -0,0 +1,184 @@
+"""
+iCalendar (RFC 5545) feed of upcoming interviews and next actions.
+
+CalendarFeed keeps the VEVENT text of every application with a date in
+range and, like sync.AppSnapshot, patches it from the rows written since
+its watermark: after an edit only the edited applications' events are
+formatted again, and while nothing changed (and the day has not rolled
+over) the previous body is returned as is.
+"""
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from jobtracker.db import on_reader
+from jobtracker.repository import (
+    FULL_RELOAD_SECONDS, fetch_calendar_changes, fetch_calendar_rows, fetch_watermark,
+)
+from jobtracker.service import ARCHIVED_STATUSES
+
+PRODID = "-//jobtracker//Job Search HQ//EN"
+# events stay in the feed for a few days after their date, so a client
+# polling just after midnight doesn't drop this morning's interview
+PAST_DAYS = 7
+# how often clients that honour it should poll
+REFRESH_INTERVAL = "PT15M"
+
+
+def _escape(text) -> str:
+    return (
+        str(text).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Content lines longer than 75 octets continue on lines starting with a space."""
+    data = line.encode("utf-8")
+    parts = []
+    while len(data) > 75:
+        n = 75 if not parts else 74
+        while (data[n] & 0xC0) == 0x80:  # don't split a UTF-8 sequence
+            n -= 1
+        parts.append(data[:n])
+        data = data[n:]
+    parts.append(data)
+    return b"\r\n ".join(parts).decode("utf-8")
+
+
+def _day(value):
+    try:
+        return datetime.strptime(str(value)[:10], "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def _vevent(uid: str, day: date, stamp: str, summary: str, description: str, url, busy: bool) -> bytes:
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:{uid}",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART;VALUE=DATE:{day:%Y%m%d}",
+        f"DTEND;VALUE=DATE:{day + timedelta(days=1):%Y%m%d}",
+        f"SUMMARY:{_escape(summary)}",
+    ]
+    if description:
+        lines.append(f"DESCRIPTION:{_escape(description)}")
+    if url:
+        lines.append(f"URL:{url}")
+    lines.append("TRANSP:OPAQUE" if busy else "TRANSP:TRANSPARENT")
+    lines.append("END:VEVENT")
+    return ("\r\n".join(_fold(line) for line in lines) + "\r\n").encode("utf-8")
+
+
+def app_events(row: dict) -> list:
+    """[(day, encoded VEVENT)] for one application row; none once it is archived."""
+    if row.get("status") in ARCHIVED_STATUSES:
+        return []
+    what = f"{row.get('company') or ''} ({row.get('role') or ''})"
+    # the row's own date keeps the text stable between rebuilds
+    stamp = f"{_day(row.get('updated_at')) or date.today():%Y%m%d}T000000Z"
+    description = "\n".join(x for x in (f"Status: {row.get('status')}", row.get("location"), row.get("job_url")) if x)
+    url = (row.get("job_url") or "").strip() or None
+    events = []
+
+    interview = _day(row.get("interview_date"))
+    if interview:
+        stage = row.get("interview_stage")
+        summary = f"Interview{': ' + stage if stage and stage != 'Not started' else ''} — {what}"
+        events.append((interview, _vevent(f"interview-{row['id']}@jobtracker", interview, stamp,
+                                          summary, description, url, busy=True)))
+
+    action = _day(row.get("next_action_date"))
+    if action:
+        summary = f"{row.get('next_action') or 'Next action'} — {what}"
+        events.append((action, _vevent(f"action-{row['id']}@jobtracker", action, stamp,
+                                       summary, description, url, busy=False)))
+    return events
+
+
+class CalendarFeed:
+    """
+    Process-level ICS feed. render() costs a watermark query plus the rows
+    written since the last call; the body is rebuilt only when one of them
+    touched an event or the date changed.
+    """
+
+    def __init__(self, name: str = "Job search"):
+        self.name = name
+        self.events = None
+        self.watermark = None
+        self.loaded_at = 0.0
+        self._body = None
+        self._body_day = None
+        self._lock = threading.Lock()
+
+    def render(self, conn, today: date = None) -> bytes:
+        today = today or date.today()
+        with self._lock:
+            # tombstones are pruned, so reload from scratch now and then, as AppSnapshot does
+            if self.events is None or time.monotonic() - self.loaded_at > FULL_RELOAD_SECONDS:
+                on_reader(conn, self._full_load, today)
+            else:
+                on_reader(conn, self._apply_changes)
+            if self._body is None or self._body_day != today:
+                self._body = self._assemble(today)
+                self._body_day = today
+            return self._body
+
+    def invalidate(self):
+        with self._lock:
+            self.events = None
+            self._body = None
+
+    def _full_load(self, conn, today: date):
+        # watermark first: anything older is already visible to the load below
+        watermark = fetch_watermark(conn)
+        since = (today - timedelta(days=PAST_DAYS)).strftime("%Y-%m-%d")
+        events = ((r["id"], app_events(r)) for r in fetch_calendar_rows(conn, since))
+        self.events = {app_id: evs for app_id, evs in events if evs}
+        self.watermark = watermark
+        self.loaded_at = time.monotonic()
+        self._body = None
+
+    def _apply_changes(self, conn):
+        watermark = fetch_watermark(conn)
+        changed, deleted = fetch_calendar_changes(conn, self.watermark)
+        deleted = set(deleted)
+        self.watermark = watermark
+        for app_id in deleted:
+            if self.events.pop(app_id, None) is not None:
+                self._body = None
+        for r in changed:
+            if r["id"] in deleted:
+                continue
+            events = app_events(r)
+            if events != self.events.get(r["id"], []):
+                self._body = None
+                if events:
+                    self.events[r["id"]] = events
+                else:
+                    self.events.pop(r["id"], None)
+
+    def _assemble(self, today: date) -> bytes:
+        cutoff = today - timedelta(days=PAST_DAYS)
+        head = [
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            f"PRODID:{PRODID}",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{_escape(self.name)}",
+            f"REFRESH-INTERVAL;VALUE=DURATION:{REFRESH_INTERVAL}",
+            f"X-PUBLISHED-TTL:{REFRESH_INTERVAL}",
+        ]
+        # events are kept encoded and in no particular order (clients sort), so this is one join
+        events = b"".join(text for evs in self.events.values() for day, text in evs if day >= cutoff)
+        return ("\r\n".join(head) + "\r\n").encode("utf-8") + events + b"END:VCALENDAR\r\n"
+
+
+_feed = CalendarFeed()
+
+
+def get_feed() -> CalendarFeed:
+    return _feed
@@ -0,0 +1,184 @@
+"""
+Per-session memory budget for the Streamlit app.
+
+Between reruns a session holds the filtered applications frame and its
+attachment lists in st.session_state, and Streamlit keeps the session's
+uploaded files and served media (the status chart, clicked downloads) in
+memory. enforce_budget() runs at the end of every full run: it measures
+those, and while the session is over JOBTRACKER_SESSION_MEMORY_MB it drops
+the memoised entries, largest first. They only cache the process snapshot
+and the database, so the next run that needs one recomputes it.
+
+The budget is a soft limit on what can be recomputed. Only the two memo
+entries are evicted and nothing is spilled to disk: the rest of
+session_state (widget values), uploads and media are measured and
+reported, and a session still over its budget is logged. The process
+snapshot with its typeahead index and the st.cache_data preview cache are
+shared by every session, so they are neither counted nor evicted here.
+
+Per-session sizes are published on Streamlit's /_stcore/metrics as
+cache_memory_bytes{cache_type="jobtracker_session",cache="<session id>:<part>"},
+one series per part: frame_memo, docs_memo, state, uploads and media.
+"""
+import logging
+import os
+import sys
+import threading
+import weakref
+
+log = logging.getLogger(__name__)
+
+SESSION_MEMORY_MB = float(os.environ.get("JOBTRACKER_SESSION_MEMORY_MB", "64"))
+# session_state entries that only memoise data and may be dropped at any time
+EVICTABLE = ("_frame_memo", "_docs_memo")
+_MAX_DEPTH = 4
+
+# frames are measured with deep=True, which walks every string; do it once per frame.
+# Keyed by id (frames aren't hashable) and dropped when the frame is collected.
+_frame_sizes = {}
+
+
+def approx_size(obj, _depth: int = 0) -> int:
+    """Rough footprint in bytes: frames and buffers by their data, containers by their contents."""
+    if hasattr(obj, "memory_usage") and hasattr(obj, "ndim"):  # pandas DataFrame / Series
+        key = id(obj)
+        entry = _frame_sizes.get(key)
+        if entry is None or entry[0]() is not obj:
+            usage = obj.memory_usage(index=True, deep=True)
+            size = int(usage.sum() if hasattr(usage, "sum") else usage)
+            entry = _frame_sizes[key] = (weakref.ref(obj, lambda _: _frame_sizes.pop(key, None)), size)
+        return entry[1]
+    if isinstance(obj, (bytes, bytearray)):
+        return len(obj)
+    if isinstance(obj, memoryview):
+        return obj.nbytes
+    size = sys.getsizeof(obj, 0)
+    if _depth < _MAX_DEPTH:
+        if isinstance(obj, dict):
+            size += sum(approx_size(k, _depth + 1) + approx_size(v, _depth + 1) for k, v in list(obj.items()))
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            size += sum(approx_size(v, _depth + 1) for v in list(obj))
+    return size
+
+
+def _uploads(runtime, session_id: str) -> int:
+    files = getattr(runtime.uploaded_file_mgr, "file_storage", {}).get(session_id, {})
+    return sum(len(f.data) for f in list(files.values()))
+
+
+def _media(runtime, session_id: str) -> int:
+    # not public API; the in-memory media storage is the default
+    mgr = runtime.media_file_mgr
+    file_ids = set(getattr(mgr, "_files_by_session_and_coord", {}).get(session_id, {}).values())
+    files = getattr(getattr(mgr, "_storage", None), "_files_by_id", {})
+    return sum(len(files[f].content) for f in file_ids if f in files)
+
+
+def session_usage(session_state, session_id: str = None) -> dict:
+    """{part: bytes}: each memo entry, the rest of session_state, and Streamlit's uploads and media."""
+    usage = {"state": 0}
+    for key in list(session_state.keys()):
+        if key in EVICTABLE:
+            usage[key.strip("_")] = approx_size(session_state[key])
+        elif key != "_db_conn":
+            usage["state"] += approx_size(session_state[key])
+
+    from streamlit.runtime import Runtime
+
+    if session_id and Runtime.exists():
+        runtime = Runtime.instance()
+        usage["uploads"] = _uploads(runtime, session_id)
+        usage["media"] = _media(runtime, session_id)
+    return usage
+
+
+def evict(session_state, usage: dict, limit: int) -> list:
+    """Drops memo entries, largest first, until `usage` totals at most `limit` bytes; returns the keys dropped."""
+    dropped = []
+    for key in sorted(EVICTABLE, key=lambda k: -usage.get(k.strip("_"), 0)):
+        if sum(usage.values()) <= limit:
+            break
+        if key in session_state:
+            del session_state[key]
+            usage[key.strip("_")] = 0
+            dropped.append(key)
+    return dropped
+
+
+def enforce_budget(limit_mb: float = None) -> dict:
+    """
+    Measures the running session, evicts memo entries while it is over
+    `limit_mb` (default SESSION_MEMORY_MB), and publishes the result.
+    """
+    import streamlit as st
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    session_id = ctx.session_id if ctx is not None else None
+    limit = (SESSION_MEMORY_MB if limit_mb is None else limit_mb) * 2**20
+    usage = session_usage(st.session_state, session_id)
+
+    evict(st.session_state, usage, limit)
+    if sum(usage.values()) > limit:
+        log.info("session %s is %.1f MB over its budget after eviction", session_id,
+                 (sum(usage.values()) - limit) / 2**20)
+
+    if session_id:
+        _publish(session_id, usage)
+    return usage
+
+
+def release_uploads(files):
+    """Drops uploaded files from Streamlit's memory once their bytes are stored elsewhere."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    # only the in-memory manager (the default) can remove a single file
+    remove = getattr(ctx.uploaded_file_mgr, "remove_file", None) if ctx is not None else None
+    if remove is None:
+        return
+    for f in files:
+        if f is not None:
+            remove(session_id=ctx.session_id, file_id=f.file_id)
+
+
+class _SessionStats:
+    """
+    CacheStatsProvider for /_stcore/metrics: each live session's
+    session_state as of its last full run, uploads and media as of now.
+    """
+
+    def __init__(self):
+        self.usage = {}
+
+    def get_stats(self):
+        from streamlit.runtime import Runtime
+        from streamlit.runtime.stats import CacheStat
+
+        runtime = Runtime.instance()
+        stats = []
+        for session_id, usage in list(self.usage.items()):
+            if not runtime.is_active_session(session_id):
+                self.usage.pop(session_id, None)
+                continue
+            usage = dict(usage, uploads=_uploads(runtime, session_id), media=_media(runtime, session_id))
+            stats.extend(CacheStat("jobtracker_session", f"{session_id}:{part}", n) for part, n in usage.items())
+        return stats
+
+
+_stats = _SessionStats()
+_stats_lock = threading.Lock()
+_stats_registered = False
+
+
+def _publish(session_id: str, usage: dict):
+    global _stats_registered
+    from streamlit.runtime import Runtime
+
+    if not Runtime.exists():
+        return
+    with _stats_lock:
+        if not _stats_registered:
+            Runtime.instance().stats_mgr.register_provider(_stats)
+            _stats_registered = True
+    _stats.usage[session_id] = dict(usage)
@@ -0,0 +1,193 @@
+import json
+import logging
+import select
+import threading
+import time
+
+from jobtracker.db import get_conn
+
+CHANNEL = "jobtracker_changes"
+
+log = logging.getLogger(__name__)
+
+
+class ChangeListener(threading.Thread):
+    """
+    One background thread per process holding a dedicated LISTEN connection.
+
+    Notifications from the triggers installed by init_db are batched per poll
+    and handed to subscribers as a list of dicts:
+      {"table": ..., "op": ..., "id": ..., "application_id": ..., "pid": ...}
+
+    A {"table": "*", "op": "RESYNC"} event is sent whenever the connection is
+    (re)established, because notifications sent while it was down are lost.
+    """
+
+    def __init__(self, conn_factory=get_conn, poll_timeout=5.0):
+        super().__init__(name="jobtracker-listener", daemon=True)
+        self._conn_factory = conn_factory
+        self._poll_timeout = poll_timeout
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self.connected = False
+
+    def subscribe(self, callback):
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def _dispatch(self, events):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for cb in subscribers:
+            try:
+                cb(events)
+            except Exception:
+                log.exception("change subscriber failed")
+
+    def run(self):
+        backoff = 1.0
+        while True:
+            conn = None
+            try:
+                conn = self._conn_factory()
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {CHANNEL}")
+                self.connected = True
+                backoff = 1.0
+                self._dispatch([{"table": "*", "op": "RESYNC"}])
+
+                while True:
+                    ready, _, _ = select.select([conn], [], [], self._poll_timeout)
+                    if not ready:
+                        continue
+                    conn.poll()
+                    events = []
+                    while conn.notifies:
+                        n = conn.notifies.pop(0)
+                        try:
+                            event = json.loads(n.payload)
+                        except ValueError:
+                            continue
+                        event["pid"] = n.pid
+                        events.append(event)
+                    if events:
+                        self._dispatch(events)
+            except Exception:
+                log.exception("change listener lost its connection; retrying in %.0fs", backoff)
+            finally:
+                self.connected = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+
+# ---------------- Process-wide wiring ----------------
+# a session is rerun at most this often for other sessions' writes; events in between share one rerun
+RERUN_INTERVAL_SECONDS = 0.5
+
+_listener = None
+_listener_lock = threading.Lock()
+
+
+class _Watch:
+    """What one Streamlit session listens for, and when it was last rerun for it."""
+
+    def __init__(self, pid: int):
+        self.pid = pid           # backend pid of the session's connection
+        self.tables = None       # tables its current page reads; None for all
+        self.last_rerun = float("-inf")
+        self.pending = False
+
+
+# streamlit session id -> _Watch
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_listener() -> ChangeListener:
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            from jobtracker.sync import get_snapshot
+
+            _listener = ChangeListener()
+            get_snapshot().attach_listener(_listener)
+            _listener.subscribe(_push_reruns)
+            _listener.start()
+        return _listener
+
+
+def attach_session(conn):
+    """
+    Starts the process listener (once) and registers the calling Streamlit
+    session so that writes made by other sessions trigger a rerun here.
+    """
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    get_listener()
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        with _sessions_lock:
+            watch = _sessions.get(ctx.session_id)
+            if watch is None:
+                _sessions[ctx.session_id] = _Watch(conn.get_backend_pid())
+            else:
+                watch.pid = conn.get_backend_pid()
+
+
+def watch_tables(tables):
+    """Limits the calling session's pushed reruns to changes in `tables`, what its current page shows."""
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    watch = _sessions.get(ctx.session_id) if ctx is not None else None
+    if watch is not None:
+        watch.tables = frozenset(tables)
+
+
+def _push_reruns(events):
+    from streamlit.runtime import Runtime
+
+    if not Runtime.exists():
+        return
+    session_mgr = getattr(Runtime.instance(), "_session_mgr", None)
+    if session_mgr is None:
+        return
+
+    writer_pids = {e.get("pid") for e in events}
+    tables = {e.get("table") for e in events}
+    for session_id, watch in list(_sessions.items()):
+        info = session_mgr.get_active_session_info(session_id)
+        if info is None:
+            _sessions.pop(session_id, None)
+            continue
+        if writer_pids == {watch.pid}:
+            # the session made these changes itself and has already rerun
+            continue
+        if watch.tables is not None and "*" not in tables and not tables & watch.tables:
+            continue
+        _schedule_rerun(info.session, watch)
+
+
+def _schedule_rerun(session, watch: _Watch):
+    # leading edge runs at once; anything within RERUN_INTERVAL_SECONDS after it
+    # is folded into a single trailing rerun
+    with _sessions_lock:
+        if watch.pending:
+            return
+        watch.pending = True
+        delay = max(0.0, watch.last_rerun + RERUN_INTERVAL_SECONDS - time.monotonic())
+
+    def rerun():
+        with _sessions_lock:
+            watch.pending = False
+            watch.last_rerun = time.monotonic()
+        session.request_rerun(None)
+
+    loop = session._event_loop
+    loop.call_soon_threadsafe(loop.call_later, delay, rerun)
@@ -1,9 +1,20 @@
 import hashlib
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
+from typing import TYPE_CHECKING
 import psycopg2
+import psycopg2.extensions
 import psycopg2.extras
 
+from jobtracker import dedupe
+from jobtracker.codec import NONE, StreamDecoder, decode, encode
+from jobtracker.db import execute_prepared, read_only
+from jobtracker.extract import submit_extraction
+from jobtracker.service import ARCHIVED_STATUSES
+
+if TYPE_CHECKING:
+    import pandas as pd
+
 DATE_FMT = "%Y-%m-%d"
 
 
@@ -16,174 +27,807 @@ def _ts():
 
 
 # ---------------- Applications ----------------
-def fetch_df(conn, search="", status="All", overdue_only=False) -> pd.DataFrame:
-    q = "SELECT * FROM applications"
+_FETCH_ORDER = " ORDER BY COALESCE(next_action_date, followup_date, '9999-12-31') ASC, id DESC"
+
+
+def _fetch_shape(has_status: bool, has_search: bool, has_overdue: bool, paged: bool = False, hot: bool = True):
+    """
+    Canonical statement for one filter combination. There are only 16 shapes
+    (32 with paging), each prepared once per connection, so the plan is
+    reused across reruns. `hot` limits it to active applications, which the
+    partial applications_hot_order_idx serves in order.
+    """
+    where = ["is_active"] if hot else []
+    n = 0
+    if has_status:
+        n += 1
+        where.append(f"status = ${n}")
+    if has_search:
+        n += 1
+        where.append(
+            f"(LOWER(company) LIKE ${n} OR LOWER(role) LIKE ${n} "
+            f"OR LOWER(location) LIKE ${n} OR LOWER(source) LIKE ${n})"
+        )
+    if has_overdue:
+        n += 1
+        where.append(f"(next_action_date IS NOT NULL AND next_action_date < ${n} AND status NOT IN ('Rejected','Withdrawn'))")
+
+    q = "SELECT *, count(*) OVER () AS total_count FROM applications" if paged else "SELECT * FROM applications"
+    if where:
+        q += " WHERE " + " AND ".join(where)
+    q += _FETCH_ORDER
+
+    name = f"jt_fetch_df_{int(has_status)}{int(has_search)}{int(has_overdue)}{int(hot)}"
+    if paged:
+        q += f" LIMIT ${n + 1} OFFSET ${n + 2}"
+        name += "_paged"
+    return name, q
+
+
+def _fetch_params(search, status, overdue_only) -> list:
     params = []
-    where = []
 
-    if status != "All":
-        where.append("status = %s")
+    has_status = status != "All"
+    if has_status:
         params.append(status)
 
-    if search.strip():
-        s = f"%{search.strip().lower()}%"
-        where.append("(LOWER(company) LIKE %s OR LOWER(role) LIKE %s OR LOWER(location) LIKE %s OR LOWER(source) LIKE %s)")
-        params.extend([s, s, s, s])
+    has_search = bool(search.strip())
+    if has_search:
+        params.append(f"%{search.strip().lower()}%")
 
     if overdue_only:
-        where.append("(next_action_date IS NOT NULL AND next_action_date < %s AND status NOT IN ('Rejected','Withdrawn'))")
         params.append(date.today().strftime(DATE_FMT))
+    return params
 
-    if where:
-        q += " WHERE " + " AND ".join(where)
 
-    q += " ORDER BY COALESCE(next_action_date, followup_date, '9999-12-31') ASC, id DESC"
+def _hot_only(status, include_archived) -> bool:
+    # filtering on an archived status asks for archived rows by itself
+    return not include_archived and status not in ARCHIVED_STATUSES
+
+
+@read_only
+def fetch_df(conn, search="", status="All", overdue_only=False, include_archived=False) -> "pd.DataFrame":
+    # pandas is only needed by the Streamlit app; the API and worker never load it
+    from jobtracker.frame import build_frame
+
+    params = _fetch_params(search, status, overdue_only)
+    name, q = _fetch_shape(status != "All", bool(search.strip()), overdue_only,
+                           hot=_hot_only(status, include_archived))
+
+    # plain tuple cursor: no dict per row, straight into column arrays
+    with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cur:
+        execute_prepared(cur, name, q, params)
+        rows = cur.fetchall()
+        columns = [c.name for c in cur.description]
+    return build_frame(columns, rows)
+
+
+@read_only
+def fetch_page(conn, search="", status="All", overdue_only=False, limit=50, offset=0, include_archived=False):
+    """
+    One page of fetch_df's result as a list of dicts, plus the total number
+    of matching rows. Returns (rows, total).
+    """
+    params = _fetch_params(search, status, overdue_only) + [int(limit), int(offset)]
+    name, q = _fetch_shape(status != "All", bool(search.strip()), overdue_only, paged=True,
+                           hot=_hot_only(status, include_archived))
 
     with conn.cursor() as cur:
-        cur.execute(q, params)
+        execute_prepared(cur, name, q, params)
         rows = cur.fetchall()
-    return pd.DataFrame(rows)
+
+    total = int(rows[0]["total_count"]) if rows else 0
+    for r in rows:
+        del r["total_count"]
+    return rows, total
+
+
+def get_app(conn, app_id: int):
+    with conn.cursor() as cur:
+        execute_prepared(cur, "jt_get_app", "SELECT * FROM applications WHERE id=$1", (app_id,))
+        return cur.fetchone()
+
+
+_INSERT_APP_SQL = """
+    INSERT INTO applications
+    (company, role, location, job_url, source, status, applied_date, followup_date,
+     salary, contact, notes, created_at, updated_at,
+     work_model, salary_range, interview_stage, interview_date, next_action, next_action_date, priority,
+     company_research, phone_screen_notes)
+    VALUES ($1,$2,$3,$4,$5,$6,$7,$8,$9,$10,$11,$12,$12,
+            $13,$14,$15,$16,$17,$18,$19,$20,$21)
+    RETURNING id, row_version
+"""
+
+# columns a form or API client may write
+APP_COLUMNS = (
+    "company", "role", "location", "job_url", "source", "status", "applied_date", "followup_date",
+    "salary", "contact", "notes",
+    "work_model", "salary_range", "interview_stage", "interview_date", "next_action", "next_action_date",
+    "priority", "company_research", "phone_screen_notes",
+)
+
+
+class ConflictError(RuntimeError):
+    """The application was changed by someone else since the caller loaded it."""
+
+
+def _app_params(row: dict, t: str) -> tuple:
+    return (
+        row["company"], row["role"], row.get("location"), row.get("job_url"), row.get("source"),
+        row["status"], row.get("applied_date"), row.get("followup_date"),
+        row.get("salary"), row.get("contact"), row.get("notes"),
+        t,
+        row.get("work_model"), row.get("salary_range"), row.get("interview_stage"), row.get("interview_date"),
+        row.get("next_action"), row.get("next_action_date"), row.get("priority"),
+        row.get("company_research"), row.get("phone_screen_notes"),
+    )
 
 
 def insert_app(conn, row: dict) -> int:
+    t = now_str()
+    with conn.cursor() as cur:
+        execute_prepared(cur, "jt_insert_app", _INSERT_APP_SQL, _app_params(row, t))
+        new = cur.fetchone()
+        new_id = new["id"]
+        _save_dedupe_key(cur, new_id, new["row_version"], row)
+    conn.commit()
+    return int(new_id)
+
+
+def app_diff(base: dict, row: dict) -> dict:
+    """Fields of `row` whose value differs from `base`."""
+    return {k: row[k] for k in APP_COLUMNS if k in row and row[k] != base.get(k)}
+
+
+def _update_shape(columns, versioned: bool):
+    """
+    UPDATE for one set of changed columns. The name encodes the set, so each
+    shape actually used is prepared once per connection.
+    """
+    mask = sum(1 << APP_COLUMNS.index(c) for c in columns)
+    sets = ", ".join(f"{c}=${i}" for i, c in enumerate(columns, start=1))
+    n = len(columns)
+    q = f"UPDATE applications SET {sets}, updated_at=${n + 1} WHERE id=${n + 2}"
+    name = f"jt_update_app_{mask:x}"
+    if versioned:
+        q += f" AND row_version=${n + 3}"
+        name += "_v"
+    return name, q + " RETURNING row_version"
+
+
+def update_app(conn, app_id: int, row: dict, base: dict = None, expected_version: int = None):
+    """
+    Writes only the fields of `row` that differ from `base`, the row as the
+    caller loaded it (read here, locked, when omitted). With
+    `expected_version` the write applies only while the row's row_version
+    still matches, otherwise ConflictError is raised instead of silently
+    overwriting a concurrent edit. Returns the new row_version, or the
+    current one when nothing changed.
+    """
+    with conn.cursor() as cur:
+        if base is None:
+            cur.execute("SELECT * FROM applications WHERE id=%s FOR UPDATE", (app_id,))
+            base = cur.fetchone()
+            if base is None:
+                conn.rollback()
+                raise ConflictError(f"Application {app_id} no longer exists.")
+        if expected_version is not None and base.get("row_version") not in (None, expected_version):
+            conn.rollback()
+            raise ConflictError(f"Application {app_id} was changed by someone else.")
+
+        changed = app_diff(base, row)
+        if not changed:
+            conn.rollback()
+            return base.get("row_version") if expected_version is None else expected_version
+
+        columns = list(changed)
+        params = [changed[c] for c in columns] + [now_str(), app_id]
+        if expected_version is not None:
+            params.append(expected_version)
+        name, q = _update_shape(columns, expected_version is not None)
+        execute_prepared(cur, name, q, params)
+        updated = cur.fetchone()
+        if updated is not None and DEDUPE_COLUMNS & changed.keys():
+            _save_dedupe_key(cur, app_id, updated["row_version"], {**base, **changed})
+    if updated is None:
+        conn.rollback()
+        raise ConflictError(f"Application {app_id} was changed or deleted by someone else.")
+    conn.commit()
+    return int(updated["row_version"])
+
+
+def delete_app(conn, app_id: int):
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM applications WHERE id=%s", (app_id,))
+    conn.commit()
+
+
+def quick_update_status(conn, app_id: int, new_status: str):
+    t = now_str()
+    with conn.cursor() as cur:
+        execute_prepared(
+            cur,
+            "jt_quick_update_status",
+            "UPDATE applications SET status=$1, updated_at=$2 WHERE id=$3",
+            (new_status, t, app_id),
+        )
+    conn.commit()
+
+
+def bulk_update_status(conn, app_ids, new_status: str) -> int:
     t = now_str()
     with conn.cursor() as cur:
         cur.execute(
+            "UPDATE applications SET status=%s, updated_at=%s WHERE id = ANY(%s)",
+            (new_status, t, [int(i) for i in app_ids]),
+        )
+        n = cur.rowcount
+    conn.commit()
+    return n
+
+
+@read_only
+def dashboard_stats(conn) -> dict:
+    with conn.cursor() as cur:
+        execute_prepared(
+            cur,
+            "jt_dashboard_stats",
+            # from the dates rather than is_overdue: the sweep's flips don't move the data version
+            "SELECT status, count(*) AS n, count(*) FILTER (WHERE "
+            "COALESCE(next_action_date, followup_date) < to_char(CURRENT_DATE, 'YYYY-MM-DD') "
+            "AND status NOT IN ('Rejected', 'Withdrawn')) AS overdue "
+            "FROM applications GROUP BY status",
+        )
+        rows = cur.fetchall()
+    by_status = {r["status"]: int(r["n"]) for r in rows}
+    return {
+        "total": sum(by_status.values()),
+        "overdue": sum(int(r["overdue"]) for r in rows),
+        "by_status": by_status,
+    }
+
+
+@read_only
+def data_version(conn) -> str:
+    """
+    Changes whenever an application is written or deleted. Cheap enough to
+    run per request: both maxima come straight off the row_version indexes.
+
+    row_version is the writer's transaction id, assigned at its first write
+    rather than at commit, so the maximum alone misses a transaction that
+    commits after a newer one. The transactions below it still in flight
+    are part of the version: one of them finishing changes it.
+    """
+    with conn.cursor() as cur:
+        execute_prepared(
+            cur,
+            "jt_data_version",
             """
-            INSERT INTO applications
-            (company, role, location, job_url, source, status, applied_date, followup_date,
-             salary, contact, notes, created_at, updated_at,
-             work_model, salary_range, interview_stage, interview_date, next_action, next_action_date, priority,
-             company_research, phone_screen_notes)
-            VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,
-                    %s,%s,%s,%s,%s,%s,%s,%s,%s)
-            RETURNING id
+            SELECT v, ARRAY(SELECT x FROM txid_snapshot_xip(txid_current_snapshot()) AS x
+                             WHERE x < v ORDER BY x) AS pending
+              FROM (SELECT GREATEST(
+                      (SELECT COALESCE(max(row_version), 0) FROM applications),
+                      (SELECT COALESCE(max(row_version), 0) FROM application_tombstones)) AS v) AS m
             """,
-            (
-                row["company"], row["role"], row.get("location"), row.get("job_url"), row.get("source"),
-                row["status"], row.get("applied_date"), row.get("followup_date"),
-                row.get("salary"), row.get("contact"), row.get("notes"),
-                t, t,
-                row.get("work_model"), row.get("salary_range"), row.get("interview_stage"), row.get("interview_date"),
-                row.get("next_action"), row.get("next_action_date"), row.get("priority"),
-                row.get("company_research"), row.get("phone_screen_notes"),
-            ),
-        )
-        new_id = cur.fetchone()["id"]
+        )
+        row = cur.fetchone()
+    if not row["pending"]:
+        return str(row["v"])
+    pending = hashlib.blake2b(",".join(map(str, row["pending"])).encode(), digest_size=4).hexdigest()
+    return f"{row['v']}.{pending}"
+
+
+# ---------------- Audit log ----------------
+@read_only
+def application_timeline(conn, app_id: int, limit: int = 500):
+    """
+    One application's history, oldest first. op is I (initial fields),
+    U ({field: [old, new]} for the fields that changed) or D.
+    """
+    with conn.cursor() as cur:
+        execute_prepared(
+            cur,
+            "jt_application_timeline",
+            """
+            SELECT at, op, diff FROM application_events
+             WHERE application_id=$1
+             ORDER BY at
+             LIMIT $2
+            """,
+            (app_id, limit),
+        )
+        return cur.fetchall()
+
+
+@read_only
+def status_history(conn, app_id: int):
+    """[(timestamp, status)] for every status the application has been in."""
+    history = []
+    for e in application_timeline(conn, app_id):
+        if e["op"] == "I" and "status" in e["diff"]:
+            history.append((e["at"], e["diff"]["status"]))
+        elif e["op"] == "U" and "status" in e["diff"]:
+            history.append((e["at"], e["diff"]["status"][1]))
+    return history
+
+
+def ensure_event_partitions(conn, months_ahead: int = 2) -> int:
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT jt_ensure_event_partition((date_trunc('month', CURRENT_DATE) + m * interval '1 month')::date)
+              FROM generate_series(0, %s) AS m
+            """,
+            (months_ahead,),
+        )
     conn.commit()
-    return int(new_id)
+    return months_ahead + 1
 
 
-def update_app(conn, app_id: int, row: dict):
-    t = now_str()
+# ---------------- Incremental sync ----------------
+# tombstones are pruned by maintenance; readers patching a copy reload from scratch well before that
+FULL_RELOAD_SECONDS = 6 * 60 * 60
+
+
+def fetch_watermark(conn) -> int:
+    """
+    Oldest transaction id still in flight. Every row stamped below it is
+    committed, so a later fetch_changes(since=<this>) cannot miss a write.
+    """
+    with conn.cursor() as cur:
+        execute_prepared(cur, "jt_fetch_watermark", "SELECT txid_snapshot_xmin(txid_current_snapshot()) AS xmin")
+        return int(cur.fetchone()["xmin"])
+
+
+def fetch_changes(conn, since: int):
+    """
+    Rows inserted/updated and ids deleted by transactions >= `since`.
+    Returns (changed_df, deleted_ids).
+    """
+    from jobtracker.frame import build_frame
+
+    with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cur:
+        execute_prepared(
+            cur,
+            "jt_fetch_changes",
+            "SELECT * FROM applications WHERE row_version >= $1",
+            (since,),
+        )
+        rows = cur.fetchall()
+        columns = [c.name for c in cur.description]
+
+    return build_frame(columns, rows), _fetch_tombstones(conn, since)
+
+
+def _fetch_tombstones(conn, since: int) -> list:
+    with conn.cursor(cursor_factory=psycopg2.extensions.cursor) as cur:
+        execute_prepared(
+            cur,
+            "jt_fetch_tombstones",
+            "SELECT application_id FROM application_tombstones WHERE row_version >= $1",
+            (since,),
+        )
+        return [int(r[0]) for r in cur.fetchall()]
+
+
+# the columns jobtracker.ics builds events from
+_CALENDAR_SELECT = (
+    "SELECT id, company, role, status, location, job_url, interview_stage, interview_date, "
+    "next_action, next_action_date, updated_at FROM applications"
+)
+
+
+def fetch_calendar_rows(conn, since_day: str):
+    """Active applications with an interview or next action on or after `since_day`."""
+    with conn.cursor() as cur:
+        execute_prepared(
+            cur,
+            "jt_fetch_calendar_rows",
+            _CALENDAR_SELECT + " WHERE GREATEST(interview_date, next_action_date) >= $1 AND is_active",
+            (since_day,),
+        )
+        return cur.fetchall()
+
+
+def fetch_calendar_changes(conn, since: int):
+    """Calendar columns of rows written, and ids deleted, by transactions >= `since`."""
     with conn.cursor() as cur:
+        execute_prepared(cur, "jt_fetch_calendar_changes", _CALENDAR_SELECT + " WHERE row_version >= $1", (since,))
+        rows = cur.fetchall()
+    return rows, _fetch_tombstones(conn, since)
+
+
+# ---------------- Precomputed state (worker) ----------------
+def sweep_overdue(conn) -> int:
+    """
+    Re-flags rows whose overdue state changed since the last sweep (the date
+    rolled over). Both branches are served by indexes, so this touches only
+    the rows that flip. Returns the number of rows updated.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            UPDATE applications
+               SET is_overdue = NOT is_overdue
+             WHERE (NOT is_overdue
+                    AND COALESCE(next_action_date, followup_date) < to_char(CURRENT_DATE, 'YYYY-MM-DD')
+                    AND status NOT IN ('Rejected', 'Withdrawn'))
+                OR (is_overdue
+                    AND NOT (COALESCE(COALESCE(next_action_date, followup_date) < to_char(CURRENT_DATE, 'YYYY-MM-DD'), FALSE)
+                             AND status NOT IN ('Rejected', 'Withdrawn')))
+            """
+        )
+        n = cur.rowcount
+    conn.commit()
+    return n
+
+
+def rebuild_action_queue(conn, day: str, until: str) -> int:
+    """Precomputes the action items due up to `until` for `day`. Returns the queue size."""
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM action_queue WHERE day=%s", (day,))
         cur.execute(
             """
-            UPDATE applications SET
-              company=%s,
-              role=%s,
-              location=%s,
-              job_url=%s,
-              source=%s,
-              status=%s,
-              applied_date=%s,
-              followup_date=%s,
-              salary=%s,
-              contact=%s,
-              notes=%s,
-              updated_at=%s,
-
-              work_model=%s,
-              salary_range=%s,
-              interview_stage=%s,
-              interview_date=%s,
-              next_action=%s,
-              next_action_date=%s,
-              priority=%s,
-              company_research=%s,
-              phone_screen_notes=%s
-            WHERE id=%s
+            INSERT INTO action_queue (day, application_id, due_date, label)
+            SELECT %s, id, next_action_date,
+                   COALESCE(NULLIF(next_action, ''), 'Next action') || ' — ' || company || ' (' || role || ')'
+              FROM applications
+             WHERE next_action_date IS NOT NULL
+               AND next_action_date <= %s
+               AND status NOT IN ('Rejected', 'Withdrawn')
             """,
-            (
-                row["company"], row["role"], row.get("location"), row.get("job_url"), row.get("source"),
-                row["status"], row.get("applied_date"), row.get("followup_date"),
-                row.get("salary"), row.get("contact"), row.get("notes"),
-                t,
-                row.get("work_model"), row.get("salary_range"), row.get("interview_stage"), row.get("interview_date"),
-                row.get("next_action"), row.get("next_action_date"), row.get("priority"),
-                row.get("company_research"), row.get("phone_screen_notes"),
-                app_id
-            ),
+            (day, until),
         )
+        n = cur.rowcount
     conn.commit()
+    return n
 
 
-def delete_app(conn, app_id: int):
+@read_only
+def list_action_items(conn, day: str):
     with conn.cursor() as cur:
-        cur.execute("DELETE FROM applications WHERE id=%s", (app_id,))
+        execute_prepared(
+            cur,
+            "jt_list_action_items",
+            "SELECT application_id, due_date, label FROM action_queue WHERE day=$1 ORDER BY due_date, application_id",
+            (day,),
+        )
+        return cur.fetchall()
+
+
+@read_only
+def list_overdue(conn):
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT id, company, role, status, next_action, COALESCE(next_action_date, followup_date) AS due_date
+              FROM applications
+             WHERE is_overdue
+             ORDER BY due_date, id
+            """
+        )
+        return cur.fetchall()
+
+
+@read_only
+def overdue_ids(conn) -> set:
+    """Ids flagged overdue by the write triggers and the worker's sweep (an index-only scan)."""
+    with conn.cursor() as cur:
+        execute_prepared(cur, "jt_overdue_ids", "SELECT id FROM applications WHERE is_overdue")
+        return {r["id"] for r in cur.fetchall()}
+
+
+def record_job_run(conn, job: str, day: str, watermark=None, details=None):
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO job_runs (job, day, watermark, ran_at, details)
+            VALUES (%s, %s, %s, now(), %s)
+            ON CONFLICT (job)
+            DO UPDATE SET day=EXCLUDED.day, watermark=EXCLUDED.watermark,
+                          ran_at=EXCLUDED.ran_at, details=EXCLUDED.details
+            """,
+            (job, day, watermark, psycopg2.extras.Json(details)),
+        )
     conn.commit()
 
 
-def quick_update_status(conn, app_id: int, new_status: str):
-    t = now_str()
+@read_only
+def get_job_run(conn, job: str):
+    with conn.cursor() as cur:
+        execute_prepared(
+            cur,
+            "jt_get_job_run",
+            "SELECT job, day, watermark, ran_at, details FROM job_runs WHERE job=$1",
+            (job,),
+        )
+        return cur.fetchone()
+
+
+def prune_tombstones(conn, older_than_days: int) -> int:
     with conn.cursor() as cur:
         cur.execute(
-            "UPDATE applications SET status=%s, updated_at=%s WHERE id=%s",
-            (new_status, t, app_id),
+            "DELETE FROM application_tombstones WHERE deleted_at < now() - make_interval(days => %s)",
+            (older_than_days,),
         )
+        n = cur.rowcount
+    conn.commit()
+    return n
+
+
+def prune_action_queue(conn, before_day: str) -> int:
+    with conn.cursor() as cur:
+        cur.execute("DELETE FROM action_queue WHERE day < %s", (before_day,))
+        n = cur.rowcount
+    conn.commit()
+    return n
+
+
+def delete_orphan_documents(conn) -> int:
+    # the FK cascades normally; this catches rows left behind by manual fixes
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            DELETE FROM documents d
+             WHERE NOT EXISTS (SELECT 1 FROM applications a WHERE a.id = d.application_id)
+            """
+        )
+        n = cur.rowcount
+    conn.commit()
+    return n
+
+
+def analyze_tables(conn, tables=("applications", "documents")):
+    with conn.cursor() as cur:
+        for t in tables:
+            cur.execute(f"ANALYZE {t}")
     conn.commit()
 
 
 # ---------------- Documents ----------------
+_hash_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="jobtracker-hash")
+
+
 def _sha256_hex(content: bytes) -> str:
     return hashlib.sha256(content).hexdigest()
 
 
-def add_document(conn, app_id: int, filename: str, mime_type: str, content: bytes, doc_type: str = "Document") -> bool:
+def add_document(conn, app_id: int, filename: str, mime_type: str, content: bytes, doc_type: str = "Document",
+                 content_hash: str = None) -> bool:
     """
     Inserts a document with required content_hash. Returns False if duplicate.
+    Pass content_hash when the caller already hashed the bytes while receiving them.
     """
-    content_hash = _sha256_hex(content)
+    content_hash = content_hash or _sha256_hex(content)
+    codec, stored = encode(mime_type, content)
 
     with conn.cursor() as cur:
         cur.execute(
             """
-            INSERT INTO documents (application_id, filename, mime_type, content, uploaded_at, doc_type, content_hash)
-            VALUES (%s, %s, %s, %s, %s, %s, %s)
+            INSERT INTO documents (application_id, filename, mime_type, content, uploaded_at, doc_type, content_hash,
+                                   size_bytes, codec)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
             ON CONFLICT (application_id, doc_type, content_hash) DO NOTHING
             RETURNING id
             """,
-            (app_id, filename, mime_type, psycopg2.Binary(content), _ts(), doc_type, content_hash),
+            (app_id, filename, mime_type, psycopg2.Binary(stored), _ts(), doc_type, content_hash, len(content), codec),
         )
         row = cur.fetchone()
 
     conn.commit()
+    if row:
+        # searchable text is extracted in a process pool, off the request path
+        submit_extraction(int(row["id"]), app_id, filename, mime_type, content)
     return bool(row)
 
 
-def list_documents(conn, app_id: int):
+def add_documents(conn, app_id: int, files, doc_type: str = "Document"):
+    """
+    Batch upload. `files` is a list of (filename, mime_type, content).
+
+    Hashes all files concurrently (hashlib releases the GIL), drops
+    duplicates with a single lookup against the unique index before any
+    bytes are sent, compresses the rest concurrently and inserts them in
+    one transaction.
+    Returns (inserted_filenames, skipped_filenames).
+    """
+    files = list(files)
+    if not files:
+        return [], []
+    hashes = list(_hash_pool.map(_sha256_hex, [f[2] for f in files]))
+
     with conn.cursor() as cur:
         cur.execute(
             """
-            SELECT id, filename, mime_type, doc_type, uploaded_at
-            FROM documents
-            WHERE application_id=%s
-            ORDER BY id DESC
+            SELECT content_hash FROM documents
+             WHERE application_id=%s AND doc_type=%s AND content_hash = ANY(%s)
+            """,
+            (app_id, doc_type, hashes),
+        )
+        seen = {r["content_hash"] for r in cur.fetchall()}
+
+        batch, skipped = [], []
+        for (filename, mime_type, content), h in zip(files, hashes):
+            if h in seen:
+                skipped.append(filename)
+                continue
+            seen.add(h)
+            batch.append((filename, mime_type, content, h))
+
+        inserted = []
+        if batch:
+            t = _ts()
+            encoded = list(_hash_pool.map(lambda b: encode(b[1], b[2]), batch))
+            # ON CONFLICT still guards against a concurrent upload of the same file
+            rows = psycopg2.extras.execute_values(
+                cur,
+                """
+                INSERT INTO documents (application_id, filename, mime_type, content, uploaded_at, doc_type, content_hash,
+                                       size_bytes, codec)
+                VALUES %s
+                ON CONFLICT (application_id, doc_type, content_hash) DO NOTHING
+                RETURNING id, content_hash
+                """,
+                [
+                    (app_id, f, m, psycopg2.Binary(stored), t, doc_type, h, len(c), codec)
+                    for (f, m, c, h), (codec, stored) in zip(batch, encoded)
+                ],
+                fetch=True,
+            )
+            inserted = {r["content_hash"]: int(r["id"]) for r in rows}
+
+    conn.commit()
+
+    done = []
+    for filename, mime_type, content, h in batch:
+        if h in inserted:
+            done.append(filename)
+            submit_extraction(inserted[h], app_id, filename, mime_type, content)
+        else:
+            skipped.append(filename)
+    return done, skipped
+
+
+@read_only
+def list_documents(conn, app_id: int):
+    with conn.cursor() as cur:
+        execute_prepared(
+            cur,
+            "jt_list_documents",
+            """
+            SELECT d.id, d.filename, d.mime_type, d.doc_type, d.uploaded_at, d.size_bytes, d.codec,
+                   EXISTS (SELECT 1 FROM document_previews p WHERE p.document_id = d.id) AS has_preview
+            FROM documents d
+            WHERE d.application_id=$1
+            ORDER BY d.id DESC
             """,
             (app_id,),
         )
         return cur.fetchall()
 
 
+def _decoded(row):
+    if row is not None:
+        row["content"] = decode(row.pop("codec"), bytes(row["content"]))
+    return row
+
+
+@read_only
 def get_document(conn, doc_id: int):
     with conn.cursor() as cur:
         cur.execute(
-            "SELECT id, filename, mime_type, doc_type, content FROM documents WHERE id=%s",
+            "SELECT id, filename, mime_type, doc_type, content, content_hash, codec FROM documents WHERE id=%s",
+            (doc_id,),
+        )
+        return _decoded(cur.fetchone())
+
+
+@read_only
+def get_document_meta(conn, doc_id: int):
+    """Everything about a document except its content."""
+    with conn.cursor() as cur:
+        execute_prepared(
+            cur,
+            "jt_get_document_meta",
+            """
+            SELECT id, application_id, filename, mime_type, doc_type, size_bytes, content_hash, codec
+              FROM documents WHERE id=$1
+            """,
             (doc_id,),
         )
         return cur.fetchone()
 
 
+@read_only
+def read_document_chunk(conn, doc_id: int, offset: int, size: int):
+    """
+    (codec, `size` stored bytes of a document's content starting at
+    `offset`), read together so the bytes are never decoded with another
+    version's codec. (None, b"") when the document is gone.
+    """
+    with conn.cursor() as cur:
+        execute_prepared(
+            cur,
+            "jt_read_document_chunk",
+            "SELECT codec, substring(content FROM $2 FOR $3) AS chunk FROM documents WHERE id=$1",
+            (doc_id, offset + 1, size),
+        )
+        row = cur.fetchone()
+    return (row["codec"], bytes(row["chunk"])) if row else (None, b"")
+
+
+class DocumentStream:
+    """
+    Decodes a document's bytes [start, end) from chunks read one statement
+    at a time (read_document_chunk at `offset`). `codec` is a guess, e.g.
+    from the metadata; when a chunk comes back under another codec (the
+    compress_documents backfill rewrote the row in between) decoding
+    restarts under it, past the original bytes already produced, which the
+    rewrite left unchanged.
+    """
+
+    def __init__(self, codec: str = NONE, start: int = 0, end: int = None, chunk_size: int = 1024 * 1024):
+        self.start = start
+        self.end = end
+        self.chunk_size = chunk_size
+        self.produced = 0
+        self._restart(codec)
+
+    def _restart(self, codec):
+        self.codec = codec
+        self._dec = StreamDecoder(codec, self.start + self.produced, self.end)
+        self.offset = self._dec.read_from
+
+    @property
+    def done(self) -> bool:
+        return self._dec.done
+
+    def feed(self, codec, chunk: bytes) -> bytes:
+        """Decoded bytes for a chunk read at `offset`; b"" when the chunk has to be read again."""
+        if codec is not None and codec != self.codec:
+            self._restart(codec)
+            return b""
+        self.offset += len(chunk)
+        data = self._dec.feed(chunk)
+        if chunk and len(chunk) < self.chunk_size and not self._dec.done:
+            data += self._dec.feed(b"")
+        self.produced += len(data)
+        return data
+
+
+def iter_document(conn, doc_id: int, codec: str = NONE, start: int = 0, end: int = None,
+                  chunk_size: int = 1024 * 1024):
+    """Original bytes [start, end) of a document, read and decompressed chunk by chunk."""
+    stream = DocumentStream(codec, start, end, chunk_size)
+    while not stream.done:
+        data = stream.feed(*read_document_chunk(conn, doc_id, stream.offset, chunk_size))
+        if data:
+            yield data
+
+
+@read_only
+def get_document_preview(conn, doc_id: int):
+    with conn.cursor() as cur:
+        execute_prepared(cur, "jt_get_document_preview", "SELECT png FROM document_previews WHERE document_id=$1", (doc_id,))
+        row = cur.fetchone()
+    return bytes(row["png"]) if row else None
+
+
+def save_document_preview(conn, doc_id: int, png: bytes):
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO document_previews (document_id, png)
+            SELECT %s, %s
+             WHERE EXISTS (SELECT 1 FROM documents WHERE id=%s)
+            ON CONFLICT (document_id) DO NOTHING
+            """,
+            (doc_id, psycopg2.Binary(png), doc_id),
+        )
+    conn.commit()
+
+
 def delete_document(conn, doc_id: int):
     with conn.cursor() as cur:
         cur.execute("DELETE FROM documents WHERE id=%s", (doc_id,))
@@ -202,6 +846,258 @@ def delete_docs_by_type_except(conn, app_id: int, doc_type: str, keep_doc_id: in
     conn.commit()
 
 
+def compress_documents(conn, after_id: int = 0, batch: int = 20):
+    """
+    Backfill: re-encodes uncompressed documents with id > after_id (one
+    batch, one transaction). Returns (last id looked at, rows compressed,
+    bytes saved); last id is None when there is nothing left.
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT id, mime_type, content FROM documents
+             WHERE codec = 'none' AND id > %s
+             ORDER BY id
+             LIMIT %s
+            """,
+            (after_id, batch),
+        )
+        rows = cur.fetchall()
+
+        n = saved = 0
+        for r in rows:
+            content = bytes(r["content"])
+            codec, stored = encode(r["mime_type"], content)
+            if codec == NONE:
+                continue
+            cur.execute(
+                "UPDATE documents SET content=%s, codec=%s WHERE id=%s AND codec='none'",
+                (psycopg2.Binary(stored), codec, r["id"]),
+            )
+            n += cur.rowcount
+            saved += len(content) - len(stored)
+    conn.commit()
+    return (int(rows[-1]["id"]) if rows else None), n, saved
+
+
+@read_only
+def storage_report(conn):
+    """Original vs stored bytes per codec and MIME type."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT codec, mime_type, count(*) AS docs,
+                   sum(size_bytes) AS original_bytes, sum(octet_length(content)) AS stored_bytes
+              FROM documents
+             GROUP BY codec, mime_type
+             ORDER BY sum(size_bytes) DESC NULLS LAST
+            """
+        )
+        return cur.fetchall()
+
+
+# ---------------- Document text search ----------------
+def save_document_text(conn, doc_id: int, app_id: int, body: str):
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO document_text (document_id, application_id, body)
+            SELECT %s, %s, %s
+             WHERE EXISTS (SELECT 1 FROM documents WHERE id=%s)
+            ON CONFLICT (document_id)
+            DO UPDATE SET body=EXCLUDED.body, extracted_at=now()
+            """,
+            (doc_id, app_id, body, doc_id),
+        )
+    conn.commit()
+
+
+def documents_missing_text(conn, limit: int = 50):
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT d.id, d.application_id, d.filename, d.mime_type, d.content, d.codec
+              FROM documents d
+             WHERE NOT EXISTS (SELECT 1 FROM document_text t WHERE t.document_id = d.id)
+             ORDER BY d.id
+             LIMIT %s
+            """,
+            (limit,),
+        )
+        return [_decoded(r) for r in cur.fetchall()]
+
+
+@read_only
+def search_documents(conn, query: str, limit: int = 20):
+    """
+    Ranked full-text matches across all attachments, with a highlighted
+    snippet. Served by the GIN index; never reads documents.content.
+    """
+    with conn.cursor() as cur:
+        execute_prepared(
+            cur,
+            "jt_search_documents",
+            """
+            SELECT m.document_id, m.application_id, d.filename, d.doc_type, a.company, a.role,
+                   ts_headline('english', t.body, m.q, 'MaxFragments=2, MaxWords=18, MinWords=6') AS snippet
+              FROM (
+                    SELECT t.document_id, t.application_id, q, ts_rank(t.tsv, q) AS rank
+                      FROM document_text t, websearch_to_tsquery('english', $1) q
+                     WHERE t.tsv @@ q
+                     ORDER BY rank DESC, t.document_id DESC
+                     LIMIT $2
+                   ) m
+              JOIN document_text t ON t.document_id = m.document_id
+              JOIN documents d ON d.id = m.document_id
+              JOIN applications a ON a.id = m.application_id
+             ORDER BY m.rank DESC, m.document_id DESC
+            """,
+            (query, limit),
+        )
+        return cur.fetchall()
+
+
+# ---------------- Duplicate detection ----------------
+# the columns jobtracker.dedupe keys on; other edits leave the keys alone
+DEDUPE_COLUMNS = {"company", "role", "job_url"}
+
+_SAVE_DEDUPE_SQL = """
+    INSERT INTO application_dedupe (application_id, row_version, dedupe_key, url_key, bands)
+    VALUES %s
+    ON CONFLICT (application_id) DO UPDATE
+       SET row_version=EXCLUDED.row_version, dedupe_key=EXCLUDED.dedupe_key,
+           url_key=EXCLUDED.url_key, bands=EXCLUDED.bands
+"""
+
+
+def _dedupe_values(app_id: int, row_version: int, row: dict) -> tuple:
+    key, url, bands = dedupe.keys(row.get("company"), row.get("role"), row.get("job_url"))
+    return (int(app_id), int(row_version), key, url, bands)
+
+
+def _save_dedupe_key(cur, app_id: int, row_version: int, row: dict):
+    # same transaction as the application write, so a lookup never sees a row without its keys
+    psycopg2.extras.execute_values(cur, _SAVE_DEDUPE_SQL, [_dedupe_values(app_id, row_version, row)],
+                                   template="(%s, %s, %s, %s, %s::bigint[])")
+
+
+@read_only
+def find_duplicates(conn, company: str, role: str, job_url: str = None, exclude_id: int = None, limit: int = 5):
+    """
+    Applications that look like the same company/role or posting, best
+    match first, each with a "score". One GIN probe on the LSH bands; every
+    candidate it returns is confirmed, so none is dropped unseen.
+    """
+    key, url, bands = dedupe.keys(company, role, job_url)
+    with conn.cursor() as cur:
+        execute_prepared(
+            cur,
+            "jt_find_duplicates",
+            """
+            -- candidates only; joining applications here lets the generic plan
+            -- (which guesses ~1000 band hits) hash-join a scan of the whole table
+            SELECT application_id, dedupe_key, url_key FROM application_dedupe WHERE bands && $1::bigint[]
+             UNION
+            SELECT application_id, dedupe_key, url_key FROM application_dedupe WHERE url_key = $2
+            """,
+            (bands, url),
+        )
+        scores = {}
+        for r in cur.fetchall():
+            if r["application_id"] == exclude_id:
+                continue
+            s = dedupe.match_score(key, url, r["dedupe_key"], r["url_key"])
+            if s > 0:
+                scores[r["application_id"]] = round(s, 2)
+        if not scores:
+            return []
+        best = sorted(scores, key=lambda i: (-scores[i], -i))[:limit]
+        cur.execute(
+            "SELECT id, company, role, status, applied_date, job_url FROM applications WHERE id = ANY(%s)",
+            (best,),
+        )
+        rows = {r["id"]: r for r in cur.fetchall()}
+    return [dict(rows[i], score=scores[i]) for i in best if i in rows]
+
+
+def refresh_dedupe_keys(conn, batch: int = 2000) -> int:
+    """Keys for applications written without them (raw SQL, before this existed) or edited since."""
+    n = 0
+    while True:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT a.id, a.row_version, a.company, a.role, a.job_url
+                  FROM applications a
+                  LEFT JOIN application_dedupe d ON d.application_id = a.id
+                 WHERE d.application_id IS NULL OR d.row_version < a.row_version
+                 ORDER BY a.id
+                 LIMIT %s
+                """,
+                (batch,),
+            )
+            rows = cur.fetchall()
+            if rows:
+                psycopg2.extras.execute_values(
+                    cur, _SAVE_DEDUPE_SQL, [_dedupe_values(r["id"], r["row_version"], r) for r in rows],
+                    template="(%s, %s, %s, %s, %s::bigint[])", page_size=500,
+                )
+        conn.commit()
+        n += len(rows)
+        if len(rows) < batch:
+            return n
+
+
+def iter_dedupe_keys(conn, itersize: int = 5000):
+    """(application_id, dedupe_key, url_key, bands) for every application, streamed."""
+    with conn.cursor(name="jt_iter_dedupe_keys") as cur:
+        cur.itersize = itersize
+        cur.execute("SELECT application_id, dedupe_key, url_key, bands FROM application_dedupe ORDER BY application_id")
+        for r in cur:
+            yield r["application_id"], r["dedupe_key"], r["url_key"], r["bands"]
+    conn.commit()
+
+
+def save_duplicate_clusters(conn, clusters) -> int:
+    """Replaces the stored clusters; each is labelled with its lowest application id."""
+    with conn.cursor() as cur:
+        cur.execute("UPDATE application_dedupe SET cluster_id = NULL WHERE cluster_id IS NOT NULL")
+        psycopg2.extras.execute_values(
+            cur,
+            """
+            UPDATE application_dedupe d SET cluster_id = v.cluster_id
+              FROM (VALUES %s) AS v(application_id, cluster_id)
+             WHERE d.application_id = v.application_id
+            """,
+            [(app_id, group[0]) for group in clusters for app_id in group],
+            page_size=1000,
+        )
+    conn.commit()
+    return len(clusters)
+
+
+@read_only
+def list_duplicate_clusters(conn):
+    """Clusters found by the last dedupe job run: a list of lists of application rows."""
+    with conn.cursor() as cur:
+        execute_prepared(
+            cur,
+            "jt_list_duplicate_clusters",
+            """
+            SELECT d.cluster_id, a.id, a.company, a.role, a.status, a.applied_date, a.job_url
+              FROM application_dedupe d
+              JOIN applications a ON a.id = d.application_id
+             WHERE d.cluster_id IS NOT NULL
+             ORDER BY d.cluster_id, a.id
+            """,
+        )
+        rows = cur.fetchall()
+    groups = {}
+    for r in rows:
+        groups.setdefault(r["cluster_id"], []).append(r)
+    return [g for g in groups.values() if len(g) > 1]
+
+
 # ---------------- Profile (settings + linked application row) ----------------
 def ensure_profile_ids(conn) -> dict:
     """
@@ -258,10 +1154,13 @@ def ensure_profile_app(conn) -> int:
 
 
 # ---------------- Persistent Settings ----------------
+@read_only
 def get_setting(conn, profile_id: int, setting_key: str, default=None):
     with conn.cursor() as cur:
-        cur.execute(
-            "SELECT setting_value FROM user_settings WHERE profile_id=%s AND setting_key=%s",
+        execute_prepared(
+            cur,
+            "jt_get_setting",
+            "SELECT setting_value FROM user_settings WHERE profile_id=$1 AND setting_key=$2",
             (profile_id, setting_key),
         )
         row = cur.fetchone()
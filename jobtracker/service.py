@@ -2,6 +2,8 @@ from datetime import date, datetime, timedelta
 
 DATE_FMT = "%Y-%m-%d"
 STATUSES = ["Saved","Applied","OA","HR Screen","Interview","Onsite","Offer","Rejected","Ghosted","Withdrawn"]
+# closed for good; kept out of default views (applications.is_active is false)
+ARCHIVED_STATUSES = ("Rejected", "Withdrawn", "Ghosted")
 
 def parse_date(s):
     s = (s or "").strip()
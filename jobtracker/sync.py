@@ -0,0 +1,176 @@
+import threading
+import time
+from datetime import date
+
+import pandas as pd
+
+from jobtracker.db import on_primary, on_reader
+from jobtracker.frame import coerce_frame
+from jobtracker.repository import FULL_RELOAD_SECONDS, fetch_df, fetch_watermark, fetch_changes
+from jobtracker.typeahead import PrefixIndex
+
+# the columns filter_df's search looks at
+SEARCH_COLUMNS = ("company", "role", "location", "source")
+
+
+def sort_like_fetch_df(df: pd.DataFrame) -> pd.DataFrame:
+    # same order as fetch_df: COALESCE(next_action_date, followup_date, '9999-12-31') ASC, id DESC
+    if df.empty:
+        return df.reset_index(drop=True)
+    key = df["next_action_date"].fillna(df["followup_date"])
+    return (
+        df.assign(_sort_key=key)
+        .sort_values(["_sort_key", "id"], ascending=[True, False], na_position="last", kind="stable")
+        .drop(columns=["_sort_key"])
+        .reset_index(drop=True)
+    )
+
+
+def filter_df(df: pd.DataFrame, search="", status="All", overdue_only=False) -> pd.DataFrame:
+    """Applies fetch_df's WHERE clause to an in-memory frame. Always returns a copy."""
+    if df.empty:
+        return df.copy()
+    mask = pd.Series(True, index=df.index)
+
+    if status != "All":
+        mask &= df["status"] == status
+
+    if search.strip():
+        s = search.strip().lower()
+        hit = pd.Series(False, index=df.index)
+        for col in SEARCH_COLUMNS:
+            found = df[col].astype("string").str.lower().str.contains(s, regex=False)
+            hit |= found.fillna(False).astype(bool)
+        mask &= hit
+
+    if overdue_only:
+        today = pd.Timestamp(date.today())
+        mask &= (df["next_action_date"] < today) & ~df["status"].isin(["Rejected", "Withdrawn"])
+
+    return df.loc[mask].reset_index(drop=True)
+
+
+class AppSnapshot:
+    """
+    Process-level copy of the applications table plus a high-water mark.
+
+    After the first full load, refresh() only fetches rows stamped since the
+    watermark (and tombstones for deletes) and patches the frame, so the cost
+    of a rerun follows the number of changed rows rather than the table size.
+
+    With a connected ChangeListener attached, refresh() does not touch the
+    database at all until a notification says the table changed; that delta
+    is read from the primary, the only server sure to have the change.
+
+    Unless `include_archived`, only active applications are kept: rows that
+    move to an archived status drop out on the next refresh, and rows
+    reopened from the archive come back in.
+    """
+
+    def __init__(self, include_archived: bool = False):
+        self.include_archived = include_archived
+        self.df = None
+        self.watermark = None
+        self.loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._listener = None
+        self._dirty = False
+        self.search_index = PrefixIndex()
+
+    def attach_listener(self, listener):
+        self._listener = listener
+        listener.subscribe(self._on_changes)
+
+    def _on_changes(self, events):
+        if any(e.get("table") in ("applications", "*") for e in events):
+            self._dirty = True
+
+    def refresh(self, conn) -> pd.DataFrame:
+        with self._lock:
+            # cleared before fetching: a notification arriving meanwhile re-marks it
+            notified, self._dirty = self._dirty, False
+            # on_reader: may be served by a replica, with the watermark and rows from the same server
+            if self.df is None or time.monotonic() - self.loaded_at > FULL_RELOAD_SECONDS:
+                on_reader(conn, self._full_load)
+            elif not notified and (self._listener is None or not self._listener.connected):
+                on_reader(conn, self._apply_changes)
+            if notified:
+                # the notification comes from the primary, which a replica may not have
+                # replayed yet; reading the delta there could clear the flag and miss the write
+                on_primary(conn, self._apply_changes)
+            return self.df
+
+    def mark_dirty(self):
+        """Fetch changes on the next refresh; for writers that can't wait for the notification."""
+        self._dirty = True
+
+    def invalidate(self):
+        with self._lock:
+            self.df = None
+            self.watermark = None
+
+    def query(self, conn, search="", status="All", overdue_only=False) -> pd.DataFrame:
+        return filter_df(self.refresh(conn), search=search, status=status, overdue_only=overdue_only)
+
+    def suggest(self, conn, prefix: str = "", limit: int = 10):
+        """Search suggestions from memory; only touches the database when the snapshot is stale."""
+        self.refresh(conn)
+        return self.search_index.complete(prefix, limit)
+
+    def _full_load(self, conn):
+        # watermark first: anything older is already visible to the load below
+        watermark = fetch_watermark(conn)
+        self.df = fetch_df(conn, include_archived=self.include_archived)
+        self.watermark = watermark
+        self.loaded_at = time.monotonic()
+        self.search_index.rebuild(_search_values(self.df))
+
+    def _apply_changes(self, conn):
+        watermark = fetch_watermark(conn)
+        changed, deleted = fetch_changes(conn, self.watermark)
+        self.watermark = watermark
+        if changed.empty and not deleted:
+            return
+
+        drop_ids = set(deleted) | set(changed["id"].tolist())
+        dropped = self.df["id"].isin(drop_ids)
+        kept = self.df[~dropped]
+        if deleted:
+            changed = changed[~changed["id"].isin(deleted)]
+        if not self.include_archived:
+            changed = changed[changed["is_active"]]
+        self.search_index.remove(_search_values(self.df[dropped]))
+        self.search_index.add(_search_values(changed))
+        parts = [p for p in (kept, changed) if not p.empty]
+        df = pd.concat(parts, ignore_index=True) if parts else self.df.iloc[0:0]
+        self.df = sort_like_fetch_df(coerce_frame(df))
+
+
+def _search_values(df: pd.DataFrame):
+    for col in SEARCH_COLUMNS:
+        yield from df[col].dropna().astype(str).tolist()
+
+
+_snapshot = AppSnapshot()
+_archive_snapshot = None
+_archive_lock = threading.Lock()
+
+
+def get_snapshot(include_archived: bool = False) -> AppSnapshot:
+    """The active-applications snapshot, or the one with archived rows too (created on first use)."""
+    global _archive_snapshot
+    if not include_archived:
+        return _snapshot
+    with _archive_lock:
+        if _archive_snapshot is None:
+            _archive_snapshot = AppSnapshot(include_archived=True)
+        # the process listener may have started after this snapshot was made
+        if _archive_snapshot._listener is None and _snapshot._listener is not None:
+            _archive_snapshot.attach_listener(_snapshot._listener)
+        return _archive_snapshot
+
+
+def mark_all_dirty():
+    for snapshot in (_snapshot, _archive_snapshot):
+        if snapshot is not None:
+            snapshot.mark_dirty()
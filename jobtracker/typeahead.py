@@ -0,0 +1,78 @@
+import heapq
+import threading
+from bisect import bisect_left, insort
+
+
+def _keys(value: str):
+    """Lower-cased suffixes of `value` starting at each word, so "eng" finds "Backend Engineer"."""
+    low = value.lower()
+    for i, ch in enumerate(low):
+        if ch.isalnum() and (i == 0 or not low[i - 1].isalnum()):
+            yield low[i:]
+
+
+class PrefixIndex:
+    """
+    Distinct values of a few text columns, searchable by the prefix of any
+    word. Keys are kept in one sorted list, so a lookup is a bisect plus a
+    short scan; per-value row counts let rows be added and removed one at a
+    time as the snapshot changes.
+    """
+
+    def __init__(self):
+        self._entries = []   # sorted (key, value)
+        self._counts = {}    # value -> rows holding it
+        self._lock = threading.Lock()
+
+    def rebuild(self, values):
+        counts = {}
+        for v in values:
+            if v:
+                counts[v] = counts.get(v, 0) + 1
+        entries = sorted((k, v) for v in counts for k in _keys(v))
+        with self._lock:
+            self._counts = counts
+            self._entries = entries
+
+    def add(self, values):
+        with self._lock:
+            for v in values:
+                if not v:
+                    continue
+                n = self._counts.get(v, 0)
+                self._counts[v] = n + 1
+                if n == 0:
+                    for k in _keys(v):
+                        insort(self._entries, (k, v))
+
+    def remove(self, values):
+        with self._lock:
+            for v in values:
+                n = self._counts.get(v, 0)
+                if n > 1:
+                    self._counts[v] = n - 1
+                    continue
+                if n == 0:
+                    continue
+                del self._counts[v]
+                for k in _keys(v):
+                    i = bisect_left(self._entries, (k, v))
+                    if i < len(self._entries) and self._entries[i] == (k, v):
+                        del self._entries[i]
+
+    def complete(self, prefix: str, limit: int = 10):
+        """Values with a word starting with `prefix`, most common first."""
+        p = prefix.strip().lower()
+        with self._lock:
+            if not p:
+                found = set(self._counts)
+            else:
+                found = set()
+                i = bisect_left(self._entries, (p,))
+                while i < len(self._entries) and self._entries[i][0].startswith(p):
+                    found.add(self._entries[i][1])
+                    i += 1
+            return heapq.nsmallest(limit, found, key=lambda v: (-self._counts[v], v.lower()))
+
+    def __len__(self):
+        return len(self._counts)
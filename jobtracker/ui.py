@@ -1,26 +1,50 @@
+import functools
+
 import streamlit as st
 import pandas as pd
 from datetime import date, datetime, timedelta
-import streamlit.components.v1 as components
-import matplotlib.pyplot as plt
 
 from jobtracker.auth import logout_button
-from jobtracker.db import get_conn
+from jobtracker.db import end_reads, get_conn
 from jobtracker.repository import (
-    fetch_df, insert_app, update_app, delete_app, quick_update_status,
-    add_document, list_documents, get_document, delete_document,
+    ConflictError, get_app, insert_app, update_app, delete_app, quick_update_status,
+    add_document, add_documents, list_documents, delete_document,
+    iter_document, get_document_preview,
     ensure_profile_ids,
     get_setting, set_setting,
-    delete_docs_by_type_except
+    delete_docs_by_type_except,
+    get_job_run, list_action_items, overdue_ids,
+    search_documents, application_timeline,
+    find_duplicates, list_duplicate_clusters,
 )
+from jobtracker.frame import overdue_series, frame_value
+from jobtracker.ics import get_feed
+from jobtracker.memory import enforce_budget, release_uploads
+from jobtracker.notify import watch_tables
+from jobtracker.sync import get_snapshot, mark_all_dirty
 from jobtracker.service import (
-    STATUSES as SERVICE_STATUSES, format_date, validate_required, default_followup, compute_overdue
+    STATUSES as SERVICE_STATUSES, ARCHIVED_STATUSES, format_date, validate_required, default_followup
 )
 
 DEFAULT_STATUSES = ["To Apply", "Saved", "Applied", "Interviewing", "Offered", "Rejected", "Withdrawn", "Ghosted"]
 INTERVIEW_STAGES = ["Not started", "Screening Call", "Hiring Manager Interview", "Technical Round", "Onsite", "Offer Discussion"]
 WORK_MODELS = ["Remote", "Hybrid", "On-site"]
 PRIORITIES = ["Low", "Medium", "High"]
+SEARCH_OPTIONS = 200
+
+
+def fragment(fn):
+    """
+    st.fragment for a function taking the session connection first. A
+    fragment rerun skips app.main, so it ends its own reads (see db.end_reads).
+    """
+    @functools.wraps(fn)
+    def run(conn, *args, **kwargs):
+        try:
+            return fn(conn, *args, **kwargs)
+        finally:
+            end_reads(conn)
+    return st.fragment(run)
 
 
 def merged_statuses():
@@ -35,6 +59,12 @@ STATUSES = merged_statuses()
 
 
 def pd_to_date(s):
+    if s is None or pd.isna(s):
+        return None
+    if isinstance(s, datetime):
+        return s.date()
+    if isinstance(s, date):
+        return s
     if not s:
         return None
     try:
@@ -65,7 +95,7 @@ def status_style(status: str):
 def normalize_row(row_dict: dict) -> dict:
     out = {}
     for k, v in row_dict.items():
-        out[k] = None if pd.isna(v) else v
+        out[k] = frame_value(v)
     return out
 
 
@@ -86,11 +116,16 @@ def render_card_small(row: dict):
   </div>
 </div>
 """
+    import streamlit.components.v1 as components
+
     components.html(html, height=120)
 
 
 def donut_status_chart(df: pd.DataFrame):
-    counts = df["status"].fillna("Unknown").value_counts()
+    # matplotlib is only needed for this chart; keep it off the import path of every other page
+    import matplotlib.pyplot as plt
+
+    counts = df["status"].astype(object).fillna("Unknown").value_counts()
     labels = counts.index.tolist()
     sizes = counts.values.tolist()
 
@@ -100,8 +135,128 @@ def donut_status_chart(df: pd.DataFrame):
     ax.set_title("Status Overview")
     ax.legend(labels, loc="center left", bbox_to_anchor=(1, 0.5))
     st.pyplot(fig)
+    # pyplot keeps every open figure alive process-wide; st.pyplot has its own PNG copy
+    plt.close(fig)
+
+
+def overdue_flags(conn, df: pd.DataFrame) -> pd.Series:
+    # the worker sweeps once a day and writes keep the flag current; the sweep's flips
+    # don't bump row_version, so they are read from the table, not the synced frame.
+    # Computed here only when the sweep has not run today
+    run = get_job_run(conn, "overdue")
+    if run and run["day"] == date.today().strftime("%Y-%m-%d"):
+        return df["id"].isin(overdue_ids(conn))
+    return overdue_series(df)
+
+
+def action_items_this_week(conn, df: pd.DataFrame):
+    """
+    [(due date, application id, label)] for the rows in `df`. Uses the queue
+    precomputed by the worker; rows changed since it was built (and every
+    row, when it has not run today) are checked here.
+    """
+    today = date.today()
+    week_end = today + timedelta(days=7)
+    ids = set(df["id"].tolist())
+
+    items = []
+    scan = df
+    run = get_job_run(conn, "action_queue")
+    if run and run["day"] == today.strftime("%Y-%m-%d"):
+        scan = df[df["row_version"] >= int(run["watermark"])]
+        changed = set(scan["id"].tolist())
+        for q in list_action_items(conn, run["day"]):
+            app_id = int(q["application_id"])
+            if app_id in ids and app_id not in changed:
+                items.append((pd_to_date(q["due_date"]), app_id, q["label"]))
+
+    for _, r in scan.iterrows():
+        d = pd_to_date(r.get("next_action_date"))
+        if d and d <= week_end and (r.get("status") not in ["Rejected", "Withdrawn"]):
+            r = normalize_row(r.to_dict())
+            label = f"{safe_str(r.get('next_action')) or 'Next action'} — {safe_str(r.get('company'))} ({safe_str(r.get('role'))})"
+            items.append((d, int(r["id"]), label))
+
+    items.sort(key=lambda t: t[0])
+    return items
+
+
+def format_size(n) -> str:
+    if n is None:
+        return "?"
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def cached_documents(conn, app_id: int):
+    # attachment lists are asked for several times per rerun; hit the DB once
+    memo = st.session_state.setdefault("_docs_memo", {})
+    if app_id not in memo:
+        memo[app_id] = list_documents(conn, app_id)
+    return memo[app_id]
+
+
+def forget_documents():
+    st.session_state["_docs_memo"] = {}
+
+
+def uploader_key(name: str) -> str:
+    # clear_uploader bumps the suffix, so the next run draws a new, empty uploader
+    return f"{name}_{st.session_state.get('_upload_nonce', {}).get(name, 0)}"
+
+
+def clear_uploader(name: str, files):
+    """Once the files are stored: free Streamlit's copies and stop them being added again on every rerun."""
+    release_uploads(files)
+    nonces = st.session_state.setdefault("_upload_nonce", {})
+    nonces[name] = nonces.get(name, 0) + 1
+
+
+@st.cache_data(max_entries=500, show_spinner=False)
+def document_preview(_conn, doc_id: int):
+    # previews never change for a given document id
+    return get_document_preview(_conn, doc_id)
+
+
+def deferred_content(conn, doc_id: int, codec: str):
+    """Download callback: the content is only read when the button is clicked."""
+    clock = conn.write_clock
+
+    def load():
+        # runs off the script thread, so not on the session connection; sharing its
+        # clock keeps a just-uploaded document off a replica that may not have it yet
+        own = get_conn(write_clock=clock)
+        try:
+            return b"".join(iter_document(own, doc_id, codec))
+        finally:
+            own.close()
+    return load
+
+
+def calendar_content(conn):
+    """Download callback for the ICS export; the feed only formats applications changed since its last use."""
+    clock = conn.write_clock
+
+    def load():
+        own = get_conn(write_clock=clock)
+        try:
+            return get_feed().render(own)
+        finally:
+            own.close()
+    return load
 
 
+def remove_document(conn, doc_id: int):
+    # button callback: runs before the (fragment) rerun, which then lists without it
+    delete_document(conn, doc_id)
+    forget_documents()
+    st.toast("Deleted.")
+
+
+@fragment
 def upload_attachments_block(conn, app_id: int, key_prefix: str, title="Attachments"):
     st.subheader(title)
 
@@ -115,63 +270,50 @@ def upload_attachments_block(conn, app_id: int, key_prefix: str, title="Attachme
     files = st.file_uploader(
         "Upload files (multiple allowed). Use Email for .eml/.msg/pdf screenshots.",
         accept_multiple_files=True,
-        key=f"{key_prefix}_files"
+        key=uploader_key(f"{key_prefix}_files")
     )
 
     if files:
-        uploaded_any = False
-        for f in files:
-            ok = add_document(
-                conn,
-                int(app_id),
-                f.name,
-                f.type or "application/octet-stream",
-                f.getvalue(),
-                doc_type
-            )
-            if ok:
-                uploaded_any = True
-            else:
-                st.warning(f"Skipped duplicate: {f.name}")
+        uploaded, skipped = add_documents(
+            conn,
+            int(app_id),
+            [(f.name, f.type or "application/octet-stream", f.getvalue()) for f in files],
+            doc_type,
+        )
+        clear_uploader(f"{key_prefix}_files", files)
+        for name in skipped:
+            st.warning(f"Skipped duplicate: {name}")
 
-        if uploaded_any:
+        if uploaded:
+            forget_documents()
             st.success("Uploaded.")
-            st.rerun()
 
-    docs = list_documents(conn, int(app_id))
+    docs = cached_documents(conn, int(app_id))
     if not docs:
         st.info("No attachments yet.")
         return
 
     for d in docs:
-        doc_id = d["id"] if isinstance(d, dict) else d[0]
-        filename = d["filename"] if isinstance(d, dict) else d[1]
-        doc_type_val = d["doc_type"] if isinstance(d, dict) else d[3]
-        uploaded_at = d["uploaded_at"] if isinstance(d, dict) else d[4]
-
+        doc_id = int(d["id"])
         a, b, c = st.columns([6, 2, 2])
-        a.write(f"📎 [{doc_type_val}] {filename}  |  {uploaded_at}")
-
-        if b.button("Download", key=f"{key_prefix}_dl_{doc_id}"):
-            full = get_document(conn, int(doc_id))
-            content = full["content"] if isinstance(full, dict) else full[4]
-            mime = (full.get("mime_type") if isinstance(full, dict) else full[2]) or "application/octet-stream"
-            st.download_button(
-                "Click to download",
-                data=content,
-                file_name=filename,
-                mime=mime,
-                key=f"{key_prefix}_dlbtn_{doc_id}",
-            )
+        if d["has_preview"]:
+            a.image(document_preview(conn, doc_id), width=80)
+        a.write(f"📎 [{d['doc_type']}] {d['filename']}  |  {format_size(d['size_bytes'])}  |  {d['uploaded_at']}")
+
+        b.download_button(
+            "Download",
+            data=deferred_content(conn, doc_id, d["codec"]),
+            file_name=d["filename"],
+            mime=d["mime_type"] or "application/octet-stream",
+            key=f"{key_prefix}_dl_{doc_id}",
+            on_click="ignore",
+        )
 
-        if c.button("Delete", key=f"{key_prefix}_del_{doc_id}"):
-            delete_document(conn, int(doc_id))
-            st.warning("Deleted.")
-            st.rerun()
+        c.button("Delete", key=f"{key_prefix}_del_{doc_id}", on_click=remove_document, args=(conn, doc_id))
 
 
 def board_columns_selector():
-    default_cols = ["To Apply", "Saved", "Applied", "Interviewing", "Offered", "Rejected"]
+    default_cols = ["To Apply", "Saved", "Applied", "Interviewing", "Offered"]
     default_cols = [c for c in default_cols if c in STATUSES]
     all_cols = [s for s in STATUSES if s not in ("Withdrawn", "Ghosted")]
 
@@ -185,461 +327,709 @@ def board_columns_selector():
     return [s for s in STATUSES if s in chosen]
 
 
-def render_app(conn):
-    st.title("Job Search HQ")
-
-    # ---- Navigation request handler ----
-    if "_nav_to" in st.session_state:
-        st.session_state["page"] = st.session_state["_nav_to"]
-        del st.session_state["_nav_to"]
-
-    if "page" not in st.session_state:
-        st.session_state["page"] = "Dashboard"
+def _commit_search():
+    st.session_state["search_query"] = (st.session_state.get("search_box") or "").strip()
 
-    # Sidebar
-    with st.sidebar:
-        st.subheader("Filters")
-        search = st.text_input("Search (company/role/location/source)")
-        status = st.selectbox("Status", ["All"] + STATUSES, index=0)
-        overdue_only = st.checkbox("Overdue actions only", value=False)
 
-        st.divider()
-        default_followup_days = st.number_input("Default follow-up after apply (days)", 1, 30, 7)
+def _clear_search():
+    st.session_state["search_query"] = ""
+    st.session_state["search_box"] = None
 
-        st.divider()
-        logout_button()
 
-    df = fetch_df(conn, search=search, status=status, overdue_only=overdue_only)
+def search_box(conn) -> str:
+    """
+    Typeahead search. The browser filters the options as you type, so
+    keystrokes cost no rerun; picking a value or entering new text commits
+    the query, reruns and filters. The options come from the snapshot's
+    prefix index: the most common values to start with, then every
+    completion of the committed text, however rare.
+    """
+    current = st.session_state.get("search_query", "")
+    snapshot = get_snapshot(st.session_state.get("include_archived", False))
+    if current:
+        options = list(dict.fromkeys([current] + snapshot.suggest(conn, current, SEARCH_OPTIONS)))
+    else:
+        options = snapshot.suggest(conn, "", SEARCH_OPTIONS)
+
+    # options changing (new query, new data) resets the widget; it then starts from `current`
+    st.selectbox(
+        "Search (company/role/location/source)",
+        options,
+        index=0 if current else None,
+        key="search_box",
+        placeholder="Type to search…",
+        accept_new_options=True,
+        on_change=_commit_search,
+    )
+    # with a query selected the widget has no empty choice to go back to
+    if current:
+        st.button("Clear search", key="search_clear", on_click=_clear_search)
+    return current
+
+
+def data_changed():
+    # this session wrote to applications: refresh now instead of waiting for the NOTIFY
+    mark_all_dirty()
+    st.session_state.pop("_frame_memo", None)
+
+
+def load_frame(conn, filters: dict) -> pd.DataFrame:
+    """
+    The filtered applications frame (plus the overdue column) every page
+    renders from. Computed once per run and shared by the fragments; a
+    fragment rerun after a write recomputes it.
+    """
+    key = tuple(sorted(filters.items()))
+    memo = st.session_state.get("_frame_memo")
+    if memo is not None and memo[0] == key:
+        return memo[1]
+
+    query = dict(filters)
+    archived = query.pop("include_archived", False) or query.get("status") in ARCHIVED_STATUSES
+    df = get_snapshot(archived).query(conn, **query)
     if not df.empty:
-        df["overdue"] = df.apply(
-            lambda r: compute_overdue(r.get("next_action_date") or r.get("followup_date"), r.get("status")),
-            axis=1
-        )
+        df["overdue"] = overdue_flags(conn, df)
     else:
         df["overdue"] = []
+    st.session_state["_frame_memo"] = (key, df)
+    return df
 
-    # Top metrics
-    c1, c2, c3, c4 = st.columns(4)
-    c1.metric("Total", int(len(df)))
-    c2.metric("Applied", int((df["status"] == "Applied").sum()) if not df.empty else 0)
-    c3.metric("Interviewing", int((df["status"] == "Interviewing").sum()) if not df.empty else 0)
-    c4.metric("Overdue", int(df["overdue"].sum()) if not df.empty else 0)
 
-    st.divider()
+def render_metrics(slot, df: pd.DataFrame):
+    # `slot` is an st.empty() above the page, so fragments can refresh it in place
+    with slot.container():
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Total", int(len(df)))
+        c2.metric("Applied", int((df["status"] == "Applied").sum()) if not df.empty else 0)
+        c3.metric("Interviewing", int((df["status"] == "Interviewing").sum()) if not df.empty else 0)
+        c4.metric("Overdue", int(df["overdue"].sum()) if not df.empty else 0)
 
-    page = st.radio(
-        "",
-        ["Dashboard", "Board", "All Applications", "Add / Edit", "Export"],
-        horizontal=True,
-        key="page"
-    )
 
-    # ---------------- Dashboard ----------------
-    if page == "Dashboard":
-        left, right = st.columns([4, 8])
+def go_to_edit(app_id: int):
+    st.session_state["edit_id"] = int(app_id)
+    st.session_state["_nav_to"] = "Add / Edit"
+    st.rerun()
 
-        with left:
-            st.subheader("Resume")
 
-            ids = ensure_profile_ids(conn)
-            profile_id = ids["profile_id"]          # settings
-            profile_app_id = ids["application_id"]  # documents FK
+# ---------------- Dashboard ----------------
+@fragment
+def resume_panel(conn):
+    st.subheader("Resume")
 
-            docs = list_documents(conn, int(profile_app_id))
-            resume_docs = [d for d in docs if (d["doc_type"] if isinstance(d, dict) else d[3]) == "Resume"]
+    ids = ensure_profile_ids(conn)
+    profile_app_id = ids["application_id"]  # documents FK
 
-            if resume_docs:
-                d0 = resume_docs[0]  # already ordered desc
-                fname = d0["filename"] if isinstance(d0, dict) else d0[1]
-                st.write(f"Latest: **{fname}**")
-            else:
-                st.info("No resume uploaded yet.")
+    # ✅ Single resume uploader, no doc_type selector
+    resume_file = st.file_uploader(
+        "Upload your resume (PDF/DOCX).",
+        type=["pdf", "docx"],
+        key=uploader_key("resume_uploader_single")
+    )
+    # handled before the listing below, so no rerun is needed to show it
+    if resume_file is not None:
+        ok = add_document(
+            conn,
+            int(profile_app_id),
+            resume_file.name,
+            resume_file.type or "application/octet-stream",
+            resume_file.getvalue(),
+            "Resume"
+        )
+        clear_uploader("resume_uploader_single", [resume_file])
+        forget_documents()
+        if ok:
+            # keep only the latest resume (delete older ones)
+            latest_resume = next((d for d in cached_documents(conn, int(profile_app_id)) if d["doc_type"] == "Resume"), None)
+            if latest_resume:
+                delete_docs_by_type_except(conn, int(profile_app_id), "Resume", int(latest_resume["id"]))
+                forget_documents()
+
+            st.success("Resume uploaded (latest kept).")
+        else:
+            st.warning("Skipped duplicate resume upload.")
 
-            # ✅ Single resume uploader, no doc_type selector
-            resume_file = st.file_uploader(
-                "Upload your resume (PDF/DOCX).",
-                type=["pdf", "docx"],
-                key="resume_uploader_single"
-            )
-            if resume_file is not None:
-                ok = add_document(
-                    conn,
-                    int(profile_app_id),
-                    resume_file.name,
-                    resume_file.type or "application/octet-stream",
-                    resume_file.getvalue(),
-                    "Resume"
-                )
-                if ok:
-                    # keep only the latest resume (delete older ones)
-                    latest_docs = list_documents(conn, int(profile_app_id))
-                    latest_resume = next((d for d in latest_docs if (d["doc_type"] if isinstance(d, dict) else d[3]) == "Resume"), None)
-                    if latest_resume:
-                        keep_id = latest_resume["id"] if isinstance(latest_resume, dict) else latest_resume[0]
-                        delete_docs_by_type_except(conn, int(profile_app_id), "Resume", int(keep_id))
-
-                    st.success("Resume uploaded (latest kept).")
-                else:
-                    st.warning("Skipped duplicate resume upload.")
-                st.rerun()
-
-            # Optional: show latest resume download/delete
-            docs2 = list_documents(conn, int(profile_app_id))
-            resume_docs2 = [d for d in docs2 if (d["doc_type"] if isinstance(d, dict) else d[3]) == "Resume"]
-            if resume_docs2:
-                d0 = resume_docs2[0]
-                doc_id = d0["id"] if isinstance(d0, dict) else d0[0]
-                filename = d0["filename"] if isinstance(d0, dict) else d0[1]
-                st.caption("Resume controls")
-                a, b = st.columns([1, 1])
-                if a.button("Download resume", key="dl_resume_latest"):
-                    full = get_document(conn, int(doc_id))
-                    content = full["content"] if isinstance(full, dict) else full[4]
-                    mime = (full.get("mime_type") if isinstance(full, dict) else full[2]) or "application/octet-stream"
-                    st.download_button(
-                        "Click to download",
-                        data=content,
-                        file_name=filename,
-                        mime=mime,
-                        key="dl_resume_latest_btn",
-                    )
-                if b.button("Delete resume", key="del_resume_latest"):
-                    delete_document(conn, int(doc_id))
-                    st.warning("Resume deleted.")
-                    st.rerun()
+    docs = cached_documents(conn, int(profile_app_id))
+    resume_docs = [d for d in docs if d["doc_type"] == "Resume"]
 
-            
+    if resume_docs:
+        d0 = resume_docs[0]  # already ordered desc
+        st.write(f"Latest: **{d0['filename']}** ({format_size(d0['size_bytes'])})")
+    else:
+        st.info("No resume uploaded yet.")
+
+    # Optional: show latest resume download/delete
+    if resume_docs:
+        d0 = resume_docs[0]
+        doc_id = int(d0["id"])
+        st.caption("Resume controls")
+        a, b = st.columns([1, 1])
+        a.download_button(
+            "Download resume",
+            data=deferred_content(conn, doc_id, d0["codec"]),
+            file_name=d0["filename"],
+            mime=d0["mime_type"] or "application/octet-stream",
+            key="dl_resume_latest",
+            on_click="ignore",
+        )
+        b.button("Delete resume", key="del_resume_latest", on_click=remove_document, args=(conn, doc_id))
+
+
+@fragment
+def attachment_search(conn):
+    st.subheader("Search attachments")
+    doc_query = st.text_input("Search inside documents and emails", key="doc_search")
+    if doc_query.strip():
+        hits = search_documents(conn, doc_query.strip())
+        if not hits:
+            st.write("No matches.")
+        for h in hits:
+            a, b = st.columns([8, 1])
+            snippet = safe_str(h["snippet"]).replace("<b>", "**").replace("</b>", "**")
+            a.markdown(
+                f"📎 **{h['filename']}** [{h['doc_type']}] — {safe_str(h['company'])} ({safe_str(h['role'])})  \n"
+                f"{snippet}"
+            )
+            if b.button("Open", key=f"doc_hit_{h['document_id']}"):
+                go_to_edit(h["application_id"])
 
-        with right:
-            st.subheader("Status Overview")
-            if df.empty:
-                st.info("No applications yet.")
-            else:
-                donut_status_chart(df)
 
-            st.divider()
-            st.subheader("Action Items this week")
+def dashboard_page(conn, filters: dict, metrics_slot):
+    df = load_frame(conn, filters)
+    left, right = st.columns([4, 8])
 
-            if df.empty:
-                st.info("No action items.")
-            else:
-                today = date.today()
-                week_end = today + timedelta(days=7)
-
-                def parse_date(x):
-                    try:
-                        return datetime.strptime(str(x), "%Y-%m-%d").date()
-                    except Exception:
-                        return None
-
-                items = []
-                for _, r in df.iterrows():
-                    d = parse_date(r.get("next_action_date"))
-                    if d and d <= week_end and (r.get("status") not in ["Rejected", "Withdrawn"]):
-                        items.append((d, r.to_dict()))
-                items.sort(key=lambda t: t[0])
-
-                if not items:
-                    st.write("Nothing due in next 7 days.")
-                else:
-                    for d, r in items:
-                        label = f"{safe_str(r.get('next_action')) or 'Next action'} — {safe_str(r.get('company'))} ({safe_str(r.get('role'))})"
-                        st.checkbox(label, value=False, key=f"act_{int(r.get('id'))}_{d}")
+    with left:
+        resume_panel(conn)
 
-    # ---------------- Board ----------------
-    elif page == "Board":
-        st.subheader("Applications in Progress")
+    with right:
+        st.subheader("Status Overview")
         if df.empty:
             st.info("No applications yet.")
         else:
-            board_statuses = board_columns_selector()
-            if not board_statuses:
-                st.warning("Select at least one column.")
-            else:
-                cols = st.columns(len(board_statuses))
-                for i, st_status in enumerate(board_statuses):
-                    with cols[i]:
-                        st.markdown(f"### {st_status}")
-                        sub = df[df["status"] == st_status].copy()
-                        if sub.empty:
-                            st.caption("—")
-                            continue
-                        sub = sub.head(30)
-                        for _, r in sub.iterrows():
-                            row = normalize_row(r.to_dict())
-                            app_id = int(row["id"])
-                            render_card_small(row)
-
-                            current = row.get("status") or st_status
-                            idx = STATUSES.index(current) if current in STATUSES else 0
-                            new_status = st.selectbox(
-                                "Move",
-                                STATUSES,
-                                index=idx,
-                                key=f"move_{app_id}",
-                                label_visibility="collapsed",
-                            )
-                            if new_status != current:
-                                quick_update_status(conn, app_id, new_status)
-                                st.rerun()
-
-                            st.write("")
-
-    # ---------------- All Applications ----------------
-    elif page == "All Applications":
-        st.subheader("All Applications")
+            donut_status_chart(df)
+
+        st.divider()
+        st.subheader("Action Items this week")
 
         if df.empty:
-            st.info("No rows yet.")
+            st.info("No action items.")
         else:
-            ids = ensure_profile_ids(conn)
-            profile_id = ids["profile_id"]
-
-            settings_key = "allapps_cols"
-            widget_key = "allapps_cols_widget"
-
-            all_cols = list(df.columns)
-            always_hide = {"id"}
-            default_hide = {"overdue"}
-
-            valid_options = [c for c in all_cols if c not in always_hide]
-
-            suggested_default = [
-                c for c in [
-                    "company", "role", "location", "work_model", "salary_range",
-                    "status", "applied_date", "interview_stage", "interview_date",
-                    "next_action", "next_action_date", "priority", "source", "updated_at"
-                ]
-                if c in valid_options and c not in default_hide
-            ]
-            if not suggested_default:
-                suggested_default = [c for c in valid_options if c not in default_hide]
-
-            # Load once per session
-            if widget_key not in st.session_state:
-                saved_cols = get_setting(conn, profile_id, settings_key, default=None)
-                if isinstance(saved_cols, list):
-                    saved_cols = [c for c in saved_cols if c in valid_options]
-                else:
-                    saved_cols = None
-                st.session_state[widget_key] = saved_cols if saved_cols else suggested_default
+            items = action_items_this_week(conn, df)
 
-            def _persist_allapps_cols():
-                cols = st.session_state.get(widget_key, [])
-                cols = [c for c in cols if c in valid_options]
+            if not items:
+                st.write("Nothing due in next 7 days.")
+            else:
+                for d, app_id, label in items:
+                    st.checkbox(label, value=False, key=f"act_{app_id}_{d}")
 
-                conn2 = get_conn()
-                try:
-                    ids2 = ensure_profile_ids(conn2)
-                    set_setting(conn2, ids2["profile_id"], settings_key, cols)
-                finally:
-                    try:
-                        conn2.close()
-                    except Exception:
-                        pass
-
-            with st.expander("Table columns", expanded=False):
-                st.multiselect(
-                    "Choose fields to display",
-                    options=valid_options,
-                    key=widget_key,
-                    on_change=_persist_allapps_cols,
+        st.divider()
+        attachment_search(conn)
+
+
+# ---------------- Board ----------------
+def move_card(conn, app_id: int, key: str):
+    # on_change runs before the fragment rerun, so the card is drawn in its new column
+    quick_update_status(conn, app_id, st.session_state[key])
+    data_changed()
+
+
+@fragment
+def board_page(conn, filters: dict, metrics_slot):
+    # a card move or a column toggle reruns only the board and the metrics above it
+    st.subheader("Applications in Progress")
+    board_statuses = board_columns_selector()
+
+    # an archived column (Rejected) needs the archived rows the default frame leaves out;
+    # the metrics keep counting what the sidebar filters ask for
+    archived = filters.get("include_archived", False)
+    df = load_frame(conn, dict(filters, include_archived=archived or bool(set(board_statuses) & set(ARCHIVED_STATUSES))))
+    render_metrics(metrics_slot, df if archived or df.empty else df[~df["status"].isin(ARCHIVED_STATUSES)])
+
+    if df.empty:
+        st.info("No applications yet.")
+        return
+    if not board_statuses:
+        st.warning("Select at least one column.")
+        return
+
+    cols = st.columns(len(board_statuses))
+    for i, st_status in enumerate(board_statuses):
+        with cols[i]:
+            st.markdown(f"### {st_status}")
+            sub = df[df["status"] == st_status].head(30)
+            if sub.empty:
+                st.caption("—")
+                continue
+            for _, r in sub.iterrows():
+                row = normalize_row(r.to_dict())
+                app_id = int(row["id"])
+                render_card_small(row)
+
+                current = row.get("status") or st_status
+                idx = STATUSES.index(current) if current in STATUSES else 0
+                st.selectbox(
+                    "Move",
+                    STATUSES,
+                    index=idx,
+                    key=f"move_{app_id}",
+                    label_visibility="collapsed",
+                    on_change=move_card,
+                    args=(conn, app_id, f"move_{app_id}"),
                 )
 
-            chosen_cols = st.session_state.get(widget_key, [])
-            if not chosen_cols:
-                st.warning("Select at least one column to display.")
-                st.stop()
+                st.write("")
+
+
+# ---------------- All Applications ----------------
+@fragment
+def applications_table(conn, filters: dict, metrics_slot):
+    # toggling table columns reruns only this fragment
+    st.subheader("All Applications")
+
+    df = load_frame(conn, filters)
+    if df.empty:
+        st.info("No rows yet.")
+        return
+
+    ids = ensure_profile_ids(conn)
+    profile_id = ids["profile_id"]
+
+    settings_key = "allapps_cols"
+    widget_key = "allapps_cols_widget"
+
+    all_cols = list(df.columns)
+    always_hide = {"id", "row_version", "is_overdue", "is_active"}
+    default_hide = {"overdue"}
+
+    valid_options = [c for c in all_cols if c not in always_hide]
+
+    suggested_default = [
+        c for c in [
+            "company", "role", "location", "work_model", "salary_range",
+            "status", "applied_date", "interview_stage", "interview_date",
+            "next_action", "next_action_date", "priority", "source", "updated_at"
+        ]
+        if c in valid_options and c not in default_hide
+    ]
+    if not suggested_default:
+        suggested_default = [c for c in valid_options if c not in default_hide]
+
+    # Load once per session
+    if widget_key not in st.session_state:
+        saved_cols = get_setting(conn, profile_id, settings_key, default=None)
+        if isinstance(saved_cols, list):
+            saved_cols = [c for c in saved_cols if c in valid_options]
+        else:
+            saved_cols = None
+        st.session_state[widget_key] = saved_cols if saved_cols else suggested_default
+
+    def _persist_allapps_cols():
+        cols = st.session_state.get(widget_key, [])
+        cols = [c for c in cols if c in valid_options]
+
+        conn2 = get_conn()
+        try:
+            ids2 = ensure_profile_ids(conn2)
+            set_setting(conn2, ids2["profile_id"], settings_key, cols)
+        finally:
+            try:
+                conn2.close()
+            except Exception:
+                pass
+
+    with st.expander("Table columns", expanded=False):
+        st.multiselect(
+            "Choose fields to display",
+            options=valid_options,
+            key=widget_key,
+            on_change=_persist_allapps_cols,
+        )
+
+    duplicate_clusters_panel(conn)
+
+    chosen_cols = st.session_state.get(widget_key, [])
+    if not chosen_cols:
+        st.warning("Select at least one column to display.")
+        return
+
+    header_cols = st.columns([1] * len(chosen_cols) + [1])
+    for i, col in enumerate(chosen_cols):
+        header_cols[i].markdown(f"**{col}**")
+    header_cols[-1].markdown("**Edit**")
+    st.divider()
+
+    for _, r in df.iterrows():
+        app_id = int(r["id"])
+        row_cols = st.columns([1] * len(chosen_cols) + [1])
+
+        for i, col in enumerate(chosen_cols):
+            val = frame_value(r.get(col))
+            row_cols[i].write("—" if val is None or str(val).strip() == "" else str(val))
 
-            header_cols = st.columns([1] * len(chosen_cols) + [1])
-            for i, col in enumerate(chosen_cols):
-                header_cols[i].markdown(f"**{col}**")
-            header_cols[-1].markdown("**Edit**")
+        if row_cols[-1].button("✏️", key=f"row_edit_{app_id}"):
+            go_to_edit(app_id)
+
+
+def duplicate_clusters_panel(conn):
+    clusters = list_duplicate_clusters(conn)
+    if not clusters:
+        return
+    with st.expander(f"Possible duplicates ({len(clusters)} groups)", expanded=False):
+        st.caption("Found by the worker's hourly dedupe job.")
+        for group in clusters:
+            for r in group:
+                a, b = st.columns([9, 1])
+                a.write(f"#{r['id']} {r['company']} — {r['role']}  |  {r['status']}  |  applied {r['applied_date'] or '—'}")
+                if b.button("✏️", key=f"dup_edit_{r['id']}"):
+                    go_to_edit(r["id"])
             st.divider()
 
-            for _, r in df.iterrows():
-                app_id = int(r["id"])
-                row_cols = st.columns([1] * len(chosen_cols) + [1])
 
-                for i, col in enumerate(chosen_cols):
-                    val = r.get(col)
-                    row_cols[i].write("—" if pd.isna(val) or val is None or str(val).strip() == "" else str(val))
+# ---------------- Add / Edit ----------------
+def _add_application(conn, row: dict):
+    new_id = insert_app(conn, row)
+    data_changed()
+    st.success("Added. You can edit + attach files on the right.")
+    st.session_state["edit_id"] = new_id
+    st.rerun()
 
-                if row_cols[-1].button("✏️", key=f"row_edit_{app_id}"):
-                    st.session_state["edit_id"] = app_id
-                    st.session_state["_nav_to"] = "Add / Edit"
-                    st.rerun()
 
-    # ---------------- Add / Edit ----------------
-    elif page == "Add / Edit":
-        st.subheader("Add / Edit")
-        left, right = st.columns([1, 1])
-
-        with left:
-            st.markdown("### Add new")
-            with st.form("add_form", clear_on_submit=True):
-                company = st.text_input("Company *")
-                role = st.text_input("Role *")
-                location = st.text_input("Location")
-                job_url = st.text_input("Job URL")
-                source = st.text_input("Source (LinkedIn/Referral/etc.)")
-
-                work_model = st.selectbox("Work model", [""] + WORK_MODELS, index=0)
-                salary_range = st.text_input("Salary range (optional)")
-
-                status_new = st.selectbox("Status *", STATUSES, index=STATUSES.index("Applied") if "Applied" in STATUSES else 0)
-                applied_date = st.date_input("Date applied", value=date.today())
-
-                interview_stage = st.selectbox("Interview stage", [""] + INTERVIEW_STAGES, index=0)
-                interview_date = st.date_input("Interview date (optional)", value=None)
-
-                next_action = st.text_input("Next action (optional)")
-                next_action_date = st.date_input("Next action date (optional)", value=default_followup(applied_date, 7))
-
-                priority = st.selectbox("Priority", [""] + PRIORITIES, index=0)
-
-                contact = st.text_input("Contact (name/email)")
-                notes = st.text_area("Notes", height=120)
-
-                company_research = st.text_area("Company research (optional)", height=90)
-                phone_screen_notes = st.text_area("Phone screen notes (optional)", height=90)
-
-                if st.form_submit_button("Add"):
-                    err = validate_required(company, role)
-                    if err:
-                        st.error(err)
-                    else:
-                        new_id = insert_app(conn, {
-                            "company": company.strip(),
-                            "role": role.strip(),
-                            "location": location.strip() or None,
-                            "job_url": job_url.strip() or None,
-                            "source": source.strip() or None,
-                            "status": status_new,
-                            "applied_date": format_date(applied_date),
-                            "followup_date": None,
-                            "work_model": work_model or None,
-                            "salary_range": salary_range.strip() or None,
-                            "interview_stage": interview_stage or None,
-                            "interview_date": format_date(interview_date) if interview_date else None,
-                            "next_action": next_action.strip() or None,
-                            "next_action_date": format_date(next_action_date) if next_action_date else None,
-                            "priority": priority or None,
-                            "salary": None,
-                            "contact": contact.strip() or None,
-                            "notes": notes.strip() or None,
-                            "company_research": company_research.strip() or None,
-                            "phone_screen_notes": phone_screen_notes.strip() or None,
-                        })
-                        st.success("Added. You can edit + attach files on the right.")
-                        st.session_state["edit_id"] = new_id
-                        st.rerun()
-
-        with right:
-            st.markdown("### Edit existing")
-
-            if df.empty:
-                st.info("Nothing to edit yet.")
+def add_form(conn):
+    st.markdown("### Add new")
+    with st.form("add_form", clear_on_submit=True):
+        company = st.text_input("Company *")
+        role = st.text_input("Role *")
+        location = st.text_input("Location")
+        job_url = st.text_input("Job URL")
+        source = st.text_input("Source (LinkedIn/Referral/etc.)")
+
+        work_model = st.selectbox("Work model", [""] + WORK_MODELS, index=0)
+        salary_range = st.text_input("Salary range (optional)")
+
+        status_new = st.selectbox("Status *", STATUSES, index=STATUSES.index("Applied") if "Applied" in STATUSES else 0)
+        applied_date = st.date_input("Date applied", value=date.today())
+
+        interview_stage = st.selectbox("Interview stage", [""] + INTERVIEW_STAGES, index=0)
+        interview_date = st.date_input("Interview date (optional)", value=None)
+
+        next_action = st.text_input("Next action (optional)")
+        next_action_date = st.date_input("Next action date (optional)", value=default_followup(applied_date, 7))
+
+        priority = st.selectbox("Priority", [""] + PRIORITIES, index=0)
+
+        contact = st.text_input("Contact (name/email)")
+        notes = st.text_area("Notes", height=120)
+
+        company_research = st.text_area("Company research (optional)", height=90)
+        phone_screen_notes = st.text_area("Phone screen notes (optional)", height=90)
+
+        if st.form_submit_button("Add"):
+            err = validate_required(company, role)
+            if err:
+                st.error(err)
             else:
-                app_ids = df["id"].tolist()
-                pref = st.session_state.get("edit_id", app_ids[0])
-                if pref not in app_ids:
-                    pref = app_ids[0]
-
-                selected_id = st.selectbox("Select ID", app_ids, index=app_ids.index(pref), key="edit_select")
-                row_df = df[df["id"] == selected_id].iloc[0].to_dict()
-
-                with st.form("edit_form"):
-                    company = st.text_input("Company *", value=row_df.get("company") or "")
-                    role = st.text_input("Role *", value=row_df.get("role") or "")
-                    location = st.text_input("Location", value=row_df.get("location") or "")
-                    job_url = st.text_input("Job URL", value=row_df.get("job_url") or "")
-                    source_val = st.text_input("Source", value=row_df.get("source") or "")
-
-                    work_model = st.selectbox("Work model", [""] + WORK_MODELS,
-                                              index=([""] + WORK_MODELS).index(row_df.get("work_model") or ""),
-                                              key="ewm")
-                    salary_range = st.text_input("Salary range", value=row_df.get("salary_range") or "")
-
-                    status_edit = st.selectbox("Status *", STATUSES,
-                                               index=STATUSES.index(row_df.get("status") or "Applied"),
-                                               key="estatus")
-
-                    ad = pd_to_date(row_df.get("applied_date")) or date.today()
-                    applied_date = st.date_input("Date applied", value=ad, key="ead")
-
-                    interview_stage = st.selectbox("Interview stage", [""] + INTERVIEW_STAGES,
-                                                   index=([""] + INTERVIEW_STAGES).index(row_df.get("interview_stage") or ""),
-                                                   key="eis")
-                    idt = pd_to_date(row_df.get("interview_date"))
-                    interview_date = st.date_input("Interview date (optional)", value=idt, key="eidate")
-
-                    next_action = st.text_input("Next action", value=row_df.get("next_action") or "")
-                    nad = pd_to_date(row_df.get("next_action_date"))
-                    next_action_date = st.date_input("Next action date (optional)", value=nad, key="enad")
-
-                    priority = st.selectbox("Priority", [""] + PRIORITIES,
-                                            index=([""] + PRIORITIES).index(row_df.get("priority") or ""),
-                                            key="eprio")
-
-                    contact = st.text_input("Contact", value=row_df.get("contact") or "")
-                    notes = st.text_area("Notes", height=120, value=row_df.get("notes") or "")
-
-                    company_research = st.text_area("Company research", height=90, value=row_df.get("company_research") or "")
-                    phone_screen_notes = st.text_area("Phone screen notes", height=90, value=row_df.get("phone_screen_notes") or "")
-
-                    c1, c2 = st.columns(2)
-                    save = c1.form_submit_button("Save")
-                    dele = c2.form_submit_button("Delete")
-
-                    if save:
-                        err = validate_required(company, role)
-                        if err:
-                            st.error(err)
-                        else:
-                            update_app(conn, int(selected_id), {
-                                "company": company.strip(),
-                                "role": role.strip(),
-                                "location": location.strip() or None,
-                                "job_url": job_url.strip() or None,
-                                "source": source_val.strip() or None,
-                                "status": status_edit,
-                                "applied_date": format_date(applied_date),
-                                "followup_date": row_df.get("followup_date"),
-                                "work_model": work_model or None,
-                                "salary_range": salary_range.strip() or None,
-                                "interview_stage": interview_stage or None,
-                                "interview_date": format_date(interview_date) if interview_date else None,
-                                "next_action": next_action.strip() or None,
-                                "next_action_date": format_date(next_action_date) if next_action_date else None,
-                                "priority": priority or None,
-                                "salary": row_df.get("salary"),
-                                "contact": contact.strip() or None,
-                                "notes": notes.strip() or None,
-                                "company_research": company_research.strip() or None,
-                                "phone_screen_notes": phone_screen_notes.strip() or None,
-                            })
-                            st.success("Updated.")
-                            st.rerun()
-
-                    if dele:
-                        delete_app(conn, int(selected_id))
-                        st.warning("Deleted.")
-                        st.rerun()
-
-                st.divider()
-                upload_attachments_block(conn, selected_id, key_prefix=f"edit_{selected_id}", title="Attachments (Documents / Emails)")
-
-    # ---------------- Export ----------------
-    elif page == "Export":
-        st.subheader("Export")
-        if df.empty:
-            st.info("No data to export.")
+                row = {
+                    "company": company.strip(),
+                    "role": role.strip(),
+                    "location": location.strip() or None,
+                    "job_url": job_url.strip() or None,
+                    "source": source.strip() or None,
+                    "status": status_new,
+                    "applied_date": format_date(applied_date),
+                    "followup_date": None,
+                    "work_model": work_model or None,
+                    "salary_range": salary_range.strip() or None,
+                    "interview_stage": interview_stage or None,
+                    "interview_date": format_date(interview_date) if interview_date else None,
+                    "next_action": next_action.strip() or None,
+                    "next_action_date": format_date(next_action_date) if next_action_date else None,
+                    "priority": priority or None,
+                    "salary": None,
+                    "contact": contact.strip() or None,
+                    "notes": notes.strip() or None,
+                    "company_research": company_research.strip() or None,
+                    "phone_screen_notes": phone_screen_notes.strip() or None,
+                }
+                dups = find_duplicates(conn, row["company"], row["role"], row["job_url"])
+                if dups:
+                    # the form clears on submit; hold the entry until the user decides
+                    st.session_state["_pending_add"] = (row, dups)
+                else:
+                    _add_application(conn, row)
+
+    pending = st.session_state.get("_pending_add")
+    if pending:
+        row, dups = pending
+        st.warning(
+            f"**{row['company']} — {row['role']}** looks like an application you already have:\n\n"
+            + "\n".join(f"- #{d['id']} {d['company']} — {d['role']} ({d['status']}, "
+                         f"applied {d['applied_date'] or '—'})" for d in dups)
+        )
+        a, b, c = st.columns(3)
+        if a.button("Add anyway", key="dup_add"):
+            del st.session_state["_pending_add"]
+            _add_application(conn, row)
+        if b.button(f"Edit #{dups[0]['id']} instead", key="dup_open"):
+            del st.session_state["_pending_add"]
+            go_to_edit(dups[0]["id"])
+        if c.button("Discard", key="dup_discard"):
+            del st.session_state["_pending_add"]
+            st.rerun()
+
+
+def edit_form(conn, df: pd.DataFrame):
+    st.markdown("### Edit existing")
+
+    app_ids = df["id"].tolist()
+    pref = st.session_state.get("edit_id")
+    target = None
+    if pref is not None and pref not in app_ids:
+        # opened from a duplicate warning, a cluster or a document hit: the row may be archived
+        # or outside the sidebar filters, so load it rather than fall back to another one
+        target = get_app(conn, int(pref))
+        if target is None:
+            st.warning(f"Application #{pref} no longer exists.")
+            del st.session_state["edit_id"]
+            pref = None
         else:
-            export_df = df.drop(columns=["overdue"], errors="ignore")
-            st.download_button(
-                "Download CSV",
-                export_df.to_csv(index=False).encode("utf-8"),
-                file_name="job_search_hq.csv",
-                mime="text/csv"
+            app_ids = [int(pref)] + app_ids
+
+    if not app_ids:
+        st.info("Nothing to edit yet.")
+        return
+
+    selected_id = st.selectbox("Select ID", app_ids, index=app_ids.index(pref) if pref is not None else 0,
+                               key="edit_select")
+    if target is not None and selected_id == target["id"]:
+        row_df = normalize_row(target)
+    else:
+        row_df = normalize_row(df[df["id"] == selected_id].iloc[0].to_dict())
+
+    # widget keys carry the id: a keyed widget keeps its value when its default changes,
+    # and would otherwise save the previously selected application's fields onto this one
+    with st.form("edit_form"):
+        company = st.text_input("Company *", value=row_df.get("company") or "")
+        role = st.text_input("Role *", value=row_df.get("role") or "")
+        location = st.text_input("Location", value=row_df.get("location") or "")
+        job_url = st.text_input("Job URL", value=row_df.get("job_url") or "")
+        source_val = st.text_input("Source", value=row_df.get("source") or "")
+
+        work_model = st.selectbox("Work model", [""] + WORK_MODELS,
+                                  index=([""] + WORK_MODELS).index(row_df.get("work_model") or ""),
+                                  key=f"ewm_{selected_id}")
+        salary_range = st.text_input("Salary range", value=row_df.get("salary_range") or "")
+
+        status_edit = st.selectbox("Status *", STATUSES,
+                                   index=STATUSES.index(row_df.get("status") or "Applied"),
+                                   key=f"estatus_{selected_id}")
+
+        ad = pd_to_date(row_df.get("applied_date")) or date.today()
+        applied_date = st.date_input("Date applied", value=ad, key=f"ead_{selected_id}")
+
+        interview_stage = st.selectbox("Interview stage", [""] + INTERVIEW_STAGES,
+                                       index=([""] + INTERVIEW_STAGES).index(row_df.get("interview_stage") or ""),
+                                       key=f"eis_{selected_id}")
+        idt = pd_to_date(row_df.get("interview_date"))
+        interview_date = st.date_input("Interview date (optional)", value=idt, key=f"eidate_{selected_id}")
+
+        next_action = st.text_input("Next action", value=row_df.get("next_action") or "")
+        nad = pd_to_date(row_df.get("next_action_date"))
+        next_action_date = st.date_input("Next action date (optional)", value=nad, key=f"enad_{selected_id}")
+
+        priority = st.selectbox("Priority", [""] + PRIORITIES,
+                                index=([""] + PRIORITIES).index(row_df.get("priority") or ""),
+                                key=f"eprio_{selected_id}")
+
+        contact = st.text_input("Contact", value=row_df.get("contact") or "")
+        notes = st.text_area("Notes", height=120, value=row_df.get("notes") or "")
+
+        company_research = st.text_area("Company research", height=90, value=row_df.get("company_research") or "")
+        phone_screen_notes = st.text_area("Phone screen notes", height=90, value=row_df.get("phone_screen_notes") or "")
+
+        c1, c2 = st.columns(2)
+        save = c1.form_submit_button("Save")
+        dele = c2.form_submit_button("Delete")
+
+        if save:
+            err = validate_required(company, role)
+            if err:
+                st.error(err)
+            else:
+                changes = {
+                    "company": company.strip(),
+                    "role": role.strip(),
+                    "location": location.strip() or None,
+                    "job_url": job_url.strip() or None,
+                    "source": source_val.strip() or None,
+                    "status": status_edit,
+                    "applied_date": format_date(applied_date),
+                    "followup_date": row_df.get("followup_date"),
+                    "work_model": work_model or None,
+                    "salary_range": salary_range.strip() or None,
+                    "interview_stage": interview_stage or None,
+                    "interview_date": format_date(interview_date) if interview_date else None,
+                    "next_action": next_action.strip() or None,
+                    "next_action_date": format_date(next_action_date) if next_action_date else None,
+                    "priority": priority or None,
+                    "salary": row_df.get("salary"),
+                    "contact": contact.strip() or None,
+                    "notes": notes.strip() or None,
+                    "company_research": company_research.strip() or None,
+                    "phone_screen_notes": phone_screen_notes.strip() or None,
+                }
+                try:
+                    # only the edited fields are written, and only if nobody saved in between
+                    update_app(conn, int(selected_id), changes, base=row_df,
+                               expected_version=int(row_df["row_version"]))
+                except ConflictError:
+                    data_changed()
+                    st.error("Someone else changed this application while you were editing. "
+                             "Reloaded the latest version; re-apply your edits and save again.")
+                else:
+                    data_changed()
+                    st.success("Updated.")
+                    st.rerun()
+
+        if dele:
+            delete_app(conn, int(selected_id))
+            data_changed()
+            st.warning("Deleted.")
+            st.rerun()
+
+    with st.expander("History", expanded=False):
+        render_timeline(conn, int(selected_id))
+
+    st.divider()
+    upload_attachments_block(conn, selected_id, key_prefix=f"edit_{selected_id}", title="Attachments (Documents / Emails)")
+
+
+def render_timeline(conn, app_id: int):
+    events = application_timeline(conn, app_id)
+    if not events:
+        st.caption("No history yet.")
+        return
+    for e in reversed(events):
+        when = e["at"].strftime("%Y-%m-%d %H:%M")
+        if e["op"] == "I":
+            st.caption(f"{when} — created as **{safe_str(e['diff'].get('status'))}**")
+        elif e["op"] == "U":
+            changes = ", ".join(
+                f"{k}: {safe_str(old) or '—'} → {safe_str(new) or '—'}"
+                for k, (old, new) in e["diff"].items()
+                if k not in ("notes", "company_research", "phone_screen_notes")
             )
+            long_fields = [k for k in ("notes", "company_research", "phone_screen_notes") if k in e["diff"]]
+            if long_fields:
+                changes = ", ".join(filter(None, [changes, " / ".join(long_fields) + " edited"]))
+            st.caption(f"{when} — {changes}")
+
+
+def add_edit_page(conn, filters: dict, metrics_slot):
+    st.subheader("Add / Edit")
+    left, right = st.columns([1, 1])
+
+    with left:
+        add_form(conn)
+
+    with right:
+        edit_form(conn, load_frame(conn, filters))
+
+
+# ---------------- Export ----------------
+def export_page(conn, filters: dict, metrics_slot):
+    st.subheader("Export")
+    df = load_frame(conn, filters)
+    if df.empty:
+        st.info("No data to export.")
+        return
+
+    export_df = df.drop(columns=["overdue", "row_version", "is_overdue", "is_active"], errors="ignore")
+    st.download_button(
+        "Download CSV",
+        # serialised only when clicked
+        lambda: export_df.to_csv(index=False, date_format="%Y-%m-%d").encode("utf-8"),
+        file_name="job_search_hq.csv",
+        mime="text/csv",
+        on_click="ignore",
+    )
+    st.download_button(
+        "Download calendar (.ics)",
+        calendar_content(conn),
+        file_name="job_search_hq.ics",
+        mime="text/calendar",
+        on_click="ignore",
+        help="Upcoming interviews and next actions. To subscribe instead, point a calendar app at the API's /api/calendar.ics.",
+    )
+
+
+PAGES = {
+    "Dashboard": dashboard_page,
+    "Board": board_page,
+    "All Applications": applications_table,
+    "Add / Edit": add_edit_page,
+    "Export": export_page,
+}
+# what each page reads (the metrics above every page read applications); another session's
+# write to anything else doesn't rerun a session showing that page
+PAGE_TABLES = {
+    "Dashboard": ("applications", "documents"),
+    "Board": ("applications",),
+    "All Applications": ("applications",),
+    "Add / Edit": ("applications", "documents"),
+    "Export": ("applications",),
+}
+
+
+def render_app(conn):
+    """
+    Full-script runs draw the sidebar, metrics and navigation and then one
+    page. Widgets inside a fragment (board moves, table columns, resume,
+    attachments, document search) rerun only that fragment.
+    """
+    st.title("Job Search HQ")
+    forget_documents()
+    st.session_state.pop("_frame_memo", None)
+
+    # ---- Navigation request handler ----
+    if "_nav_to" in st.session_state:
+        st.session_state["page"] = st.session_state["_nav_to"]
+        del st.session_state["_nav_to"]
+
+    if "page" not in st.session_state:
+        st.session_state["page"] = "Dashboard"
+
+    # Sidebar
+    with st.sidebar:
+        st.subheader("Filters")
+        search = search_box(conn)
+        status = st.selectbox("Status", ["All"] + STATUSES, index=0)
+        overdue_only = st.checkbox("Overdue actions only", value=False)
+        include_archived = st.checkbox(
+            "Include archived", value=False, key="include_archived",
+            help="Also show " + ", ".join(ARCHIVED_STATUSES) + " applications.",
+        )
+
+        st.divider()
+        default_followup_days = st.number_input("Default follow-up after apply (days)", 1, 30, 7)
+
+        st.divider()
+        logout_button()
+
+    filters = {"search": search, "status": status, "overdue_only": overdue_only, "include_archived": include_archived}
+
+    # Top metrics
+    metrics_slot = st.empty()
+    render_metrics(metrics_slot, load_frame(conn, filters))
+
+    st.divider()
+
+    page = st.radio(
+        "",
+        list(PAGES),
+        horizontal=True,
+        key="page"
+    )
+    watch_tables(PAGE_TABLES[page])
+    PAGES[page](conn, filters, metrics_slot)
+
+    # what this session keeps until its next run; memo entries go first when over budget
+    enforce_budget()
@@ -0,0 +1,17 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def conn():
+    """A primary connection to DATABASE_URL with the schema in place; skipped without one."""
+    if not os.environ.get("DATABASE_URL"):
+        pytest.skip("needs DATABASE_URL")
+    from jobtracker.db import get_conn, init_db
+
+    conn = get_conn()
+    init_db(conn)
+    yield conn
+    conn.rollback()
+    conn.close()
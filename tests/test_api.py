@@ -0,0 +1,82 @@
+import asyncio
+import json
+from urllib.parse import unquote
+
+from tornado.httpclient import AsyncHTTPClient
+from tornado.httpserver import HTTPServer
+from tornado.testing import bind_unused_port
+
+from jobtracker import api
+from jobtracker.api import _byte_range, _content_disposition
+
+TOKEN = "test-token"
+
+
+def _request(db, path: str, method: str = "GET", body=None, headers=None):
+    """One request against make_app on a free local port."""
+    async def go():
+        server = HTTPServer(api.make_app(db, TOKEN))
+        sock, port = bind_unused_port()
+        server.add_sockets([sock])
+        try:
+            return await AsyncHTTPClient().fetch(
+                f"http://127.0.0.1:{port}{path}", method=method, body=body, raise_error=False,
+                headers={"Authorization": f"Bearer {TOKEN}", **(headers or {})})
+        finally:
+            server.stop()
+
+    return asyncio.run(go())
+
+
+def test_bad_input_is_rejected_before_touching_the_database():
+    # no database: each of these must fail validation first
+    response = _request(None, "/api/documents/search?q=cv&limit=ten")
+    assert response.code == 400 and json.loads(response.body) == {"error": "limit must be an integer"}
+    for ids in (["1"], [1.5], [True], "1,2"):
+        body = json.dumps({"ids": ids, "status": "Rejected"})
+        assert _request(None, "/api/applications/bulk-status", "POST", body).code == 400
+    assert _request(None, "/api/applications", "POST", "[1, 2]").code == 400
+
+
+def test_upload_to_a_missing_application_is_404(conn):
+    db = api.Database(1, 1)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT COALESCE(MAX(id), 0) + 1000 AS id FROM applications")
+            missing = cur.fetchone()["id"]
+        response = _request(db, f"/api/applications/{missing}/documents?filename=cv.txt", "POST", b"cv",
+                            headers={"Content-Type": "text/plain"})
+        assert response.code == 404
+    finally:
+        db.pool.closeall()
+        db.executor.shutdown()
+
+
+def test_content_disposition_survives_any_file_name():
+    for name in ["cv.pdf", 'my "best" cv.pdf', "履歴書.pdf", "😀 résumé.docx", "back\\slash.txt"]:
+        header = _content_disposition(name)
+        # tornado sends headers as latin-1; the fallback is plain ASCII with nothing to break the quotes
+        header.encode("ascii")
+        fallback = header.split('filename="')[1].split('";')[0]
+        assert '"' not in fallback and "\\" not in fallback
+        assert unquote(header.split("filename*=UTF-8''")[1]) == name
+    assert "\n" not in _content_disposition("a\r\nb.txt")
+
+
+def test_byte_range_forms():
+    assert _byte_range("bytes=0-9", 100) == (0, 9)
+    assert _byte_range("bytes=90-500", 100) == (90, 99)
+    assert _byte_range("bytes=6-", 100) == (6, 99)
+    assert _byte_range("bytes=-5", 100) == (95, 99)
+    assert _byte_range("bytes=-500", 100) == (0, 99)
+
+
+def test_byte_range_unsatisfiable_and_unsupported():
+    # the handler answers 416 when start is past the end
+    start, end = _byte_range("bytes=200-300", 100)
+    assert start >= 100 and start > end
+    start, end = _byte_range("bytes=0-", 0)
+    assert start > end
+    # multiple ranges and anything unparsable get the whole document
+    for header in (None, "", "bytes=0-1,5-6", "items=0-5", "bytes=a-b", "bytes=-"):
+        assert _byte_range(header, 100) is None
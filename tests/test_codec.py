@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+from jobtracker import codec
+
+CODECS = [
+    codec.NONE,
+    codec.GZIP,
+    pytest.param(codec.ZSTD, marks=pytest.mark.skipif(codec.zstandard is None, reason="zstandard not installed")),
+]
+TEXT = b"".join(b"line %d of a cover letter\n" % i for i in range(5000))
+
+
+@pytest.mark.parametrize("name", CODECS)
+def test_compress_decode_round_trip(name):
+    assert codec.decode(name, codec.compress(name, TEXT)) == TEXT
+    assert codec.decode(name, codec.compress(name, b"")) == b""
+
+
+def test_encode_compresses_text_and_stores_noise_as_is():
+    name, stored = codec.encode("text/plain", TEXT)
+    assert name in codec.available_codecs() and len(stored) < len(TEXT)
+    assert codec.decode(name, stored) == TEXT
+
+    noise = os.urandom(4096)
+    assert codec.encode("application/x-test-noise", noise) == (codec.NONE, noise)
+    assert codec.encode("text/plain", b"") == (codec.NONE, b"")
+
+
+def test_encode_settles_on_the_codec_with_the_best_ratio(monkeypatch):
+    calls = []
+
+    def fake_compress(name, data):
+        calls.append(name)
+        return data[:len(data) // (2 if name == "big" else 3)]
+
+    monkeypatch.setattr(codec, "available_codecs", lambda: ("big", "small"))
+    monkeypatch.setattr(codec, "compress", fake_compress)
+    for _ in range(codec.SKIP_AFTER_SAMPLES):
+        assert codec.encode("application/x-test-ratio", TEXT)[0] == "small"
+    assert calls == ["big", "small"] * codec.SKIP_AFTER_SAMPLES
+
+    calls.clear()
+    assert codec.encode("application/x-test-ratio", TEXT)[0] == "small"
+    assert calls == ["small"]
+
+
+def _stream(name, data, start=0, end=None, chunk=1000):
+    dec = codec.StreamDecoder(name, start, end)
+    stored = codec.compress(name, data)[dec.read_from:]
+    out = b""
+    for i in range(0, len(stored), chunk):
+        out += dec.feed(stored[i:i + chunk])
+        if dec.done:
+            return out
+    return out + dec.feed(b"")
+
+
+@pytest.mark.parametrize("name", CODECS)
+@pytest.mark.parametrize("start, end", [(0, None), (0, 10), (12345, 23456), (len(TEXT) - 5, None), (100, len(TEXT) + 50)])
+def test_stream_decoder_returns_the_requested_range(name, start, end):
+    assert _stream(name, TEXT, start, end) == TEXT[start:end]
+
+
+def test_stream_decoder_reads_uncompressed_content_from_start():
+    dec = codec.StreamDecoder(codec.NONE, 500, 600)
+    assert dec.read_from == 500
+    assert codec.StreamDecoder(codec.GZIP, 500, 600).read_from == 0
@@ -0,0 +1,79 @@
+import random
+import string
+
+from jobtracker import dedupe
+from jobtracker.dedupe import MIN_SIMILARITY, bands, cluster, dedupe_key, keys, match_score, similarity, trigrams
+
+
+def _mutate(rng, word: str) -> str:
+    i = rng.randrange(len(word))
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+
+
+def _companies(rng, n):
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 9))) for _ in range(n * 2)]
+    return [f"{words[2 * i]} {words[2 * i + 1]}" for i in range(n)]
+
+
+def test_lsh_bands_recall_similar_companies():
+    rng = random.Random(7)
+    similar = hits = 0
+    for company in _companies(rng, 400):
+        other = company + " " + _mutate(rng, company.split()[1])[:3]
+        if similarity(trigrams(company), trigrams(other)) < MIN_SIMILARITY:
+            continue
+        similar += 1
+        hits += bool(set(bands(dedupe_key(company, "x"))) & set(bands(dedupe_key(other, "x"))))
+    assert similar > 100
+    assert hits / similar >= 0.95
+
+
+def test_lsh_bands_rarely_pair_unrelated_companies():
+    rng = random.Random(11)
+    names = _companies(rng, 200)
+    sets = [set(bands(dedupe_key(c, "x"))) for c in names]
+    shared = sum(bool(sets[i] & sets[i + 1]) for i in range(len(sets) - 1))
+    assert shared / (len(sets) - 1) < 0.05
+
+
+def test_one_typo_shares_a_band():
+    a, b = dedupe_key("Stripe", "x"), dedupe_key("Strpie", "x")
+    assert similarity(trigrams("stripe"), trigrams("strpie")) < MIN_SIMILARITY
+    assert set(bands(a)) & set(bands(b))
+
+
+def test_match_score_confirms_company_and_role_separately():
+    acme_sr = dedupe_key("Acme, Inc.", "Sr. Backend Eng")
+    assert match_score(acme_sr, None, dedupe_key("ACME", "Senior Backend Engineer"), None) == 1.0
+    assert match_score(acme_sr, None, dedupe_key("Acme", "Product Designer"), None) == 0.0
+    # the same posting URL overrides a differently named role
+    url = "jobs.acme.com/postings/123"
+    assert match_score(acme_sr, url, dedupe_key("Acme", "Platform"), url) == 1.0
+
+
+def test_cluster_groups_duplicates():
+    apps = {
+        1: ("Acme Inc", "Backend Engineer", None),
+        2: ("ACME Corp.", "Backend Eng", None),
+        3: ("Acme", "Backend Engineer", "https://www.acme.com/jobs/42?utm_source=x"),
+        4: ("Acme", "Designer", None),
+        5: ("Globex", "Backend Engineer", None),
+        6: ("Globx", "Backend Engineer", None),
+        7: ("Initech", "Designer", "acme.com/jobs/42"),
+    }
+    rows = [(app_id, *keys(*fields)) for app_id, fields in apps.items()]
+    assert cluster(rows) == [[1, 2, 3], [5, 6]]
+
+
+def test_cluster_finds_duplicates_among_many_roles_at_one_employer(monkeypatch):
+    monkeypatch.setattr(dedupe, "BUCKET_SPLIT", 4)
+    teams = ["Backend", "Frontend", "Data", "Platform", "Security", "Mobile", "Infrastructure", "Payments",
+             "Search", "Growth", "Billing", "Compiler", "Kernel", "Robotics", "Graphics", "Networking"]
+    rows = [(i, *keys("Google", f"{team} Developer")) for i, team in enumerate(teams)]
+    # respellings of early and late roles, after the employer's other applications
+    rows.append((100, *keys("Google LLC", "Sr Backend Dev")))
+    rows.append((101, *keys("Google, Inc.", "Networking Dev")))
+    rows.append((102, *keys("Google", "Fraud Analyst", "careers.google.com/jobs/results/42")))
+    rows.append((103, *keys("Google", "Trust & Safety", "careers.google.com/jobs/results/42")))
+    assert cluster(rows) == [[teams.index("Backend"), 100], [teams.index("Networking"), 101], [102, 103]]
+
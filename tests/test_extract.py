@@ -0,0 +1,41 @@
+import io
+import zipfile
+
+from jobtracker.extract import extract_text
+
+EML = b"""Subject: Interview at Acme
+From: recruiter@acme.com
+To: me@example.com
+Content-Type: text/html; charset=utf-8
+
+<html><style>p {color: red}</style><body><p>See you on&nbsp;Monday</p></body></html>
+"""
+
+
+def _docx(*paragraphs) -> bytes:
+    ns = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+    body = "".join(f"<w:p><w:r><w:t>{p}</w:t></w:r></w:p>" for p in paragraphs)
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w") as z:
+        z.writestr("word/document.xml", f'<w:document xmlns:w="{ns}"><w:body>{body}</w:body></w:document>')
+    return out.getvalue()
+
+
+def test_extract_text_by_type():
+    assert extract_text("notes.txt", "text/plain", b"  Backend\n\n  role  ") == "Backend role"
+    assert extract_text("mail.eml", "", EML) == (
+        "Subject: Interview at Acme From: recruiter@acme.com To: me@example.com See you on Monday"
+    )
+    assert extract_text("cv.docx", "", _docx("Jane Doe", "Engineer")) == "Jane Doe Engineer"
+    pdf = b"%PDF-1.4\nstream\nBT (Hello) Tj [(Wor) -50 (ld) -300 (again)] TJ ET\nendstream\n"
+    assert extract_text("cv.pdf", "application/pdf", pdf) == "Hello World again"
+
+
+def test_extract_text_skips_unknown_and_broken_files():
+    assert extract_text("photo.png", "image/png", b"\x89PNG") == ""
+    assert extract_text("cv.docx", "", b"not a zip") == ""
+
+
+def test_extract_text_drops_nul_characters():
+    # Postgres text columns reject NUL, which PDFs and UTF-16 text decode to
+    assert extract_text("cv.txt", "text/plain", b"Jane\x00 Doe\x00") == "Jane Doe"
@@ -0,0 +1,54 @@
+import pandas as pd
+
+from jobtracker.frame import build_frame, frame_value
+from jobtracker.sync import filter_df
+
+COLUMNS = ("id", "company", "role", "location", "source", "status", "next_action_date", "is_overdue")
+ROWS = [
+    (1, "Acme", "Backend Engineer", "Berlin", "LinkedIn", "Applied", "2000-01-01", True),
+    (2, "Globex", "Data Scientist", None, "Referral", "Interviewing", None, False),
+    (3, "Initech", "Engineer", "Remote", None, "Rejected", "2000-01-01", False),
+]
+
+
+def test_build_frame_types_columns():
+    df = build_frame(COLUMNS, ROWS)
+    assert df["id"].dtype == "int64"
+    assert df["is_overdue"].dtype == "bool"
+    assert isinstance(df["status"].dtype, pd.CategoricalDtype)
+    assert df["next_action_date"].dtype.kind == "M"
+    assert isinstance(df["company"].dtype, pd.StringDtype)
+    # dates and missing values go back to what the database holds
+    assert frame_value(df.loc[0, "next_action_date"]) == "2000-01-01"
+    assert frame_value(df.loc[1, "next_action_date"]) is None
+    assert frame_value(df.loc[1, "location"]) is None
+
+
+def test_build_frame_without_rows_keeps_columns():
+    df = build_frame(COLUMNS, [])
+    assert list(df.columns) == list(COLUMNS) and df.empty
+    assert filter_df(df, search="acme").empty
+
+
+def test_filter_df_matches_fetch_df_where_clause():
+    df = build_frame(COLUMNS, ROWS)
+
+    def ids(**filters):
+        return filter_df(df, **filters)["id"].tolist()
+
+    assert ids() == [1, 2, 3]
+    assert ids(status="Interviewing") == [2]
+    # any word of company/role/location/source, case-insensitive, missing values never match
+    assert ids(search="ENGINEER") == [1, 3]
+    assert ids(search="remote") == [3]
+    assert ids(search="referral") == [2]
+    # past next_action_date, closed statuses excluded
+    assert ids(overdue_only=True) == [1]
+    assert ids(search="engineer", status="Rejected") == [3]
+
+
+def test_filter_df_returns_a_copy():
+    df = build_frame(COLUMNS, ROWS)
+    out = filter_df(df)
+    out.loc[0, "company"] = "Changed"
+    assert df.loc[0, "company"] == "Acme"
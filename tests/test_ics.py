@@ -0,0 +1,50 @@
+from datetime import date
+
+from jobtracker.ics import _fold, app_events
+
+ROW = {
+    "id": 42, "company": "Acme, Inc.", "role": "Backend; Platform", "status": "Interviewing",
+    "interview_date": "2030-05-02", "interview_stage": "Onsite",
+    "next_action": "Send thank-you note", "next_action_date": "2030-05-03",
+    "job_url": "https://acme.com/jobs/42", "updated_at": "2030-04-30 09:15:00",
+}
+
+
+def _lines(line: str) -> list:
+    return line.encode("utf-8").split(b"\r\n")
+
+
+def test_fold_keeps_lines_within_75_octets():
+    assert _fold("SUMMARY:short") == "SUMMARY:short"
+    for text in ("x" * 200, "é" * 120, "面接 " * 60, "a" + "😀" * 50):
+        line = "DESCRIPTION:" + text
+        folded = _lines(_fold(line))
+        assert len(folded) > 1 and all(len(part) <= 75 for part in folded)
+        assert all(part.startswith(b" ") for part in folded[1:])
+        # every physical line is valid UTF-8 by itself, and unfolding restores the line
+        for part in folded:
+            part.decode("utf-8")
+        assert _fold(line).replace("\r\n ", "") == line
+
+
+def test_app_events_for_interview_and_next_action():
+    events = app_events(ROW)
+    assert [day for day, _ in events] == [date(2030, 5, 2), date(2030, 5, 3)]
+
+    interview = events[0][1].decode("utf-8")
+    assert interview.startswith("BEGIN:VEVENT\r\nUID:interview-42@jobtracker\r\nDTSTAMP:20300430T000000Z\r\n")
+    assert "DTSTART;VALUE=DATE:20300502\r\nDTEND;VALUE=DATE:20300503\r\n" in interview
+    assert "SUMMARY:Interview: Onsite — Acme\\, Inc. (Backend\\; Platform)\r\n" in interview
+    assert "TRANSP:OPAQUE" in interview and interview.endswith("END:VEVENT\r\n")
+
+    action = events[1][1].decode("utf-8")
+    assert "UID:action-42@jobtracker" in action and "SUMMARY:Send thank-you note — " in action
+    assert "TRANSP:TRANSPARENT" in action
+
+    # the text depends only on the row, so unchanged rows give identical events
+    assert app_events(dict(ROW)) == events
+
+
+def test_app_events_skip_archived_and_undated_applications():
+    assert app_events({**ROW, "status": "Rejected"}) == []
+    assert app_events({**ROW, "interview_date": None, "next_action_date": "soon"}) == []
@@ -0,0 +1,47 @@
+import sys
+
+import pandas as pd
+
+from jobtracker import memory
+from jobtracker.memory import approx_size, evict, session_usage
+
+
+def test_approx_size_counts_buffers_and_container_contents():
+    assert approx_size(b"x" * 1000) == 1000
+    assert approx_size(memoryview(b"x" * 1000)[:300]) == 300
+    nested = {"docs": [b"a" * 5000, b"b" * 3000], "name": "cv.pdf"}
+    assert approx_size(nested) > 8000
+    assert approx_size(nested) < 8000 + sys.getsizeof(nested) + 1000
+
+
+def test_approx_size_measures_a_frame_once(monkeypatch):
+    df = pd.DataFrame({"company": ["Acme " * 20] * 100, "id": range(100)})
+    size = approx_size(df)
+    assert size == int(df.memory_usage(index=True, deep=True).sum())
+
+    monkeypatch.setattr(pd.DataFrame, "memory_usage", lambda *a, **k: 1 / 0)
+    assert approx_size(df) == size
+    assert approx_size([df, df]) == sys.getsizeof([df, df], 0) + 2 * size
+    key = id(df)
+    del df
+    assert key not in memory._frame_sizes
+
+
+def test_session_usage_splits_memos_from_the_rest():
+    state = {"_frame_memo": b"f" * 4000, "_docs_memo": b"d" * 2000, "search_query": "acme", "_db_conn": object()}
+    usage = session_usage(state)
+    assert usage["frame_memo"] == 4000 and usage["docs_memo"] == 2000
+    assert 0 < usage["state"] < 1000
+
+
+def test_evict_drops_the_largest_memo_first_and_stops_under_the_limit():
+    state = {"_frame_memo": b"f" * 4000, "_docs_memo": b"d" * 2000, "search_query": "acme"}
+    usage = {"frame_memo": 4000, "docs_memo": 2000, "state": 500}
+    assert evict(state, usage, 3000) == ["_frame_memo"]
+    assert set(state) == {"_docs_memo", "search_query"}
+    assert usage == {"frame_memo": 0, "docs_memo": 2000, "state": 500}
+
+    assert evict(state, usage, 3000) == []
+    # memos are all that can go; the rest of the session stays over the limit
+    assert evict(state, usage, 100) == ["_docs_memo"]
+    assert state == {"search_query": "acme"} and sum(usage.values()) == 500
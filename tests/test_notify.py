@@ -0,0 +1,39 @@
+import asyncio
+import threading
+import time
+
+from jobtracker import notify
+
+
+class _Session:
+    def __init__(self, loop):
+        self._event_loop = loop
+        self.reruns = []
+
+    def request_rerun(self, client_state):
+        self.reruns.append(time.monotonic())
+
+
+def test_reruns_are_coalesced_per_session(monkeypatch):
+    monkeypatch.setattr(notify, "RERUN_INTERVAL_SECONDS", 0.2)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        session = _Session(loop)
+        watch = notify._Watch(pid=1)
+        for _ in range(50):   # a burst, e.g. a worker sweep
+            notify._schedule_rerun(session, watch)
+            time.sleep(0.002)
+        time.sleep(0.4)
+        # one rerun straight away, one for everything after it
+        assert len(session.reruns) == 2
+        assert session.reruns[1] - session.reruns[0] >= 0.2
+
+        time.sleep(0.2)
+        notify._schedule_rerun(session, watch)
+        time.sleep(0.05)
+        assert len(session.reruns) == 3   # quiet again: not delayed
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
@@ -0,0 +1,172 @@
+import pytest
+
+from jobtracker import repository
+from jobtracker.codec import GZIP, NONE, compress
+from jobtracker.db import get_conn
+from jobtracker.repository import ConflictError, DocumentStream, app_diff, data_version, delete_app, get_app, insert_app, overdue_ids, sweep_overdue, update_app
+
+
+def _app(company: str) -> dict:
+    return {"company": f"__test__ {company}", "role": "Engineer", "status": "Applied"}
+
+
+def test_data_version_changes_when_an_older_transaction_commits(conn):
+    slow = get_conn()
+    ids = []
+    try:
+        # the slow writer gets its transaction id first but commits last
+        with slow.cursor() as cur:
+            cur.execute("INSERT INTO applications (company, role, status, created_at, updated_at) "
+                        "VALUES ('__test__ Slow', 'Engineer', 'Applied', '2030-01-01', '2030-01-01') RETURNING id")
+            ids.append(cur.fetchone()["id"])
+        ids.append(insert_app(conn, _app("Fast")))
+        before = data_version(conn)
+
+        slow.commit()
+        assert data_version(conn) != before
+    finally:
+        slow.rollback()
+        slow.close()
+        for app_id in ids:
+            delete_app(conn, app_id)
+
+
+def test_data_version_is_stable_without_writes(conn):
+    ids = [insert_app(conn, _app("Stable"))]
+    try:
+        assert data_version(conn) == data_version(conn)
+    finally:
+        for app_id in ids:
+            delete_app(conn, app_id)
+
+
+def test_overdue_sweep_keeps_row_version(conn):
+    app_id = insert_app(conn, {**_app("Overdue"), "next_action_date": "2000-01-01"})
+    try:
+        version = get_app(conn, app_id)["row_version"]
+        # a stale flag, as after the date rolls over (replica role skips the triggers)
+        with conn.cursor() as cur:
+            cur.execute("SET LOCAL session_replication_role = replica")
+            cur.execute("UPDATE applications SET is_overdue = FALSE WHERE id = %s", (app_id,))
+        conn.commit()
+
+        assert sweep_overdue(conn) >= 1
+        row = get_app(conn, app_id)
+        assert row["is_overdue"] and row["row_version"] == version
+        # the UI reads the sweep's flags from the table, since the synced frame never sees them
+        assert app_id in overdue_ids(conn)
+        # a client holding the version from before the sweep can still save
+        update_app(conn, app_id, {"notes": "after sweep"}, expected_version=version)
+    finally:
+        delete_app(conn, app_id)
+
+
+def test_document_stream_follows_a_codec_change_mid_download():
+    content = b"".join(b"line %d\n" % i for i in range(2000))
+    stored = {NONE: content, GZIP: compress(GZIP, content)}
+    reads = []
+
+    def read(offset, size):
+        # the backfill compresses the document after the first two chunks
+        codec = NONE if len(reads) < 2 else GZIP
+        reads.append(codec)
+        return codec, stored[codec][offset:offset + size]
+
+    stream = DocumentStream(NONE, 100, 9000, chunk_size=1000)
+    out = b""
+    while not stream.done:
+        out += stream.feed(*read(stream.offset, 1000))
+    assert out == content[100:9000]
+    assert reads[:3] == [NONE, NONE, GZIP]
+
+
+def test_add_documents_skips_duplicates_in_the_batch_and_already_stored(conn, monkeypatch):
+    extracted = []
+    monkeypatch.setattr(repository, "submit_extraction", lambda doc_id, *args: extracted.append(doc_id))
+    app_id = insert_app(conn, _app("Uploads"))
+    try:
+        cv, letter = b"curriculum vitae " * 100, b"cover letter"
+        assert repository.add_documents(conn, app_id, [("cv.pdf", "application/pdf", cv)]) == (["cv.pdf"], [])
+
+        done, skipped = repository.add_documents(conn, app_id, [
+            ("cv copy.pdf", "application/pdf", cv),
+            ("letter.txt", "text/plain", letter),
+            ("letter again.txt", "text/plain", letter),
+        ])
+        assert done == ["letter.txt"] and sorted(skipped) == ["cv copy.pdf", "letter again.txt"]
+        assert sorted(d["filename"] for d in repository.list_documents(conn, app_id)) == ["cv.pdf", "letter.txt"]
+        assert len(extracted) == 2
+    finally:
+        delete_app(conn, app_id)
+
+
+def test_event_partition_takes_over_rows_the_default_partition_caught(conn):
+    # all in one transaction, rolled back by the fixture
+    with conn.cursor() as cur:
+        cur.execute("INSERT INTO application_events (application_id, at, op, diff) "
+                    "VALUES (-1, '2090-03-15', 'U', '{}'), (-1, '2090-04-01', 'U', '{}')")
+        cur.execute("SELECT jt_ensure_event_partition('2090-03-20'), jt_ensure_event_partition('2090-03-01')")
+        cur.execute("SELECT tableoid::regclass::text AS part FROM application_events WHERE application_id = -1 ORDER BY at")
+        assert [r["part"] for r in cur.fetchall()] == ["application_events_2090_03", "application_events_default"]
+
+
+def test_status_history_records_each_status(conn):
+    app_id = insert_app(conn, _app("History"))
+    try:
+        repository.quick_update_status(conn, app_id, "Interviewing")
+        repository.quick_update_status(conn, app_id, "Interviewing")
+        repository.quick_update_status(conn, app_id, "Offer")
+        assert [s for _, s in repository.status_history(conn, app_id)] == ["Applied", "Interviewing", "Offer"]
+    finally:
+        delete_app(conn, app_id)
+
+
+def test_app_diff_keeps_only_changed_app_columns():
+    base = {"company": "Acme", "role": "Engineer", "notes": None, "row_version": 7}
+    row = {"company": "Acme", "role": "Sr Engineer", "notes": "", "row_version": 8, "unknown": 1}
+    assert app_diff(base, row) == {"role": "Sr Engineer", "notes": ""}
+
+
+def test_update_app_leaves_columns_it_did_not_change(conn):
+    app_id = insert_app(conn, _app("Partial"))
+    try:
+        base = get_app(conn, app_id)
+        # another session edits notes after this caller loaded the row
+        with conn.cursor() as cur:
+            cur.execute("UPDATE applications SET notes = 'theirs' WHERE id = %s", (app_id,))
+        conn.commit()
+
+        update_app(conn, app_id, {**base, "location": "Remote"}, base=base)
+        row = get_app(conn, app_id)
+        assert row["location"] == "Remote" and row["notes"] == "theirs"
+    finally:
+        delete_app(conn, app_id)
+
+
+def test_update_app_rejects_a_stale_expected_version(conn):
+    app_id = insert_app(conn, _app("Conflict"))
+    try:
+        version = get_app(conn, app_id)["row_version"]
+        assert update_app(conn, app_id, {"notes": "first edit"}, expected_version=version) != version
+        with pytest.raises(ConflictError):
+            update_app(conn, app_id, {"notes": "stale"}, expected_version=version)
+        assert get_app(conn, app_id)["notes"] == "first edit"
+    finally:
+        delete_app(conn, app_id)
+
+
+def test_archived_applications_are_left_out_unless_asked_for(conn):
+    ids = [insert_app(conn, _app("Archive open")), insert_app(conn, {**_app("Archive closed"), "status": "Rejected"})]
+    try:
+        def companies(**kw):
+            return sorted(repository.fetch_df(conn, search="__test__ archive", **kw)["company"])
+
+        assert companies() == ["__test__ Archive open"]
+        assert companies(include_archived=True) == ["__test__ Archive closed", "__test__ Archive open"]
+        # filtering on an archived status asks for archived rows by itself
+        assert companies(status="Rejected") == ["__test__ Archive closed"]
+        rows, total = repository.fetch_page(conn, search="__test__ archive", include_archived=True)
+        assert total == 2 and {r["id"] for r in rows} == set(ids)
+    finally:
+        for app_id in ids:
+            delete_app(conn, app_id)
@@ -0,0 +1,74 @@
+from datetime import date, timedelta
+
+from jobtracker import db, ics, sync, ui
+from jobtracker.db import get_conn
+from jobtracker.repository import add_documents, delete_app, fetch_watermark, insert_app
+
+
+class _Listener:
+    connected = True
+
+    def subscribe(self, callback):
+        pass
+
+
+def test_notified_refresh_is_not_served_by_a_lagging_reader(conn, monkeypatch):
+    snapshot = sync.AppSnapshot()
+    snapshot.attach_listener(_Listener())
+    snapshot.refresh(conn)
+
+    # a replica that has replayed nothing since this point: a snapshot pinned before the write
+    lagging = get_conn()
+    lagging.set_session(isolation_level="REPEATABLE READ", readonly=True)
+    fetch_watermark(lagging)
+    monkeypatch.setattr(sync, "on_reader", lambda c, fn, *args, **kwargs: fn(lagging, *args, **kwargs))
+
+    app_id = insert_app(conn, {"company": "__test__ Lagging Co", "role": "Engineer", "status": "Applied"})
+    try:
+        snapshot._on_changes([{"table": "applications", "op": "INSERT", "id": app_id}])
+        assert app_id in snapshot.refresh(conn)["id"].tolist()
+        # the flag was cleared by a read that saw the write, not by one that missed it
+        assert not snapshot._dirty
+    finally:
+        lagging.close()
+        delete_app(conn, app_id)
+
+
+def test_download_callbacks_read_the_sessions_own_writes_back(conn, monkeypatch):
+    lagging = get_conn()
+    lagging.set_session(isolation_level="REPEATABLE READ", readonly=True)
+    fetch_watermark(lagging)
+    # every connection has a replica, and it is the lagging one
+    monkeypatch.setattr(db, "get_read_urls", lambda: ["replica"])
+    monkeypatch.setattr(db.RoutedConnection, "replica", lambda self: lagging)
+    monkeypatch.setattr(ui, "get_feed", lambda: ics.CalendarFeed())
+    conn.read_urls = ["replica"]
+
+    due = (date.today() + timedelta(days=3)).strftime("%Y-%m-%d")
+    app_id = insert_app(conn, {"company": "__test__ Callback Co", "role": "Engineer", "status": "Applied",
+                               "next_action": "Follow up", "next_action_date": due})
+    try:
+        add_documents(conn, app_id, [("cv.txt", "text/plain", b"fresh upload " * 100)])
+        with conn.cursor() as cur:
+            cur.execute("SELECT id, codec FROM documents WHERE application_id=%s", (app_id,))
+            doc = cur.fetchone()
+        conn.commit()
+
+        assert ui.deferred_content(conn, doc["id"], doc["codec"])() == b"fresh upload " * 100
+        assert b"__test__ Callback Co" in ui.calendar_content(conn)()
+    finally:
+        lagging.close()
+        delete_app(conn, app_id)
+
+
+def test_refresh_without_a_notification_stays_off_the_database(conn, monkeypatch):
+    snapshot = sync.AppSnapshot()
+    snapshot.attach_listener(_Listener())
+    snapshot.refresh(conn)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("refresh read the database without a notification")
+
+    monkeypatch.setattr(sync, "on_reader", fail)
+    monkeypatch.setattr(sync, "on_primary", fail)
+    snapshot.refresh(conn)
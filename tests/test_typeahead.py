@@ -0,0 +1,41 @@
+from jobtracker.typeahead import PrefixIndex
+
+
+def _index():
+    idx = PrefixIndex()
+    idx.rebuild(["Acme", "Acme", "Acme", "Backend Engineer", "Acme Robotics", "Engineering Manager", None, ""])
+    return idx
+
+
+def test_complete_matches_any_word_most_common_first():
+    idx = _index()
+    assert len(idx) == 4
+    assert idx.complete("ac") == ["Acme", "Acme Robotics"]
+    assert idx.complete(" ENG ") == ["Backend Engineer", "Engineering Manager"]
+    assert idx.complete("rob") == ["Acme Robotics"]
+    # mid-word text is not a prefix of any word
+    assert idx.complete("cme") == []
+    assert idx.complete("", limit=2) == ["Acme", "Acme Robotics"]
+
+
+def test_complete_returns_rare_values_past_the_common_ones():
+    idx = PrefixIndex()
+    idx.rebuild(["Common"] * 50 + [f"Corp {i}" for i in range(300)] + ["Cozy Rare"])
+    assert "Cozy Rare" not in idx.complete("", limit=200)
+    assert idx.complete("coz") == ["Cozy Rare"]
+
+
+def test_add_and_remove_track_row_counts():
+    idx = _index()
+    idx.add(["Zeta Labs", "Zeta Labs"])
+    assert idx.complete("labs") == ["Zeta Labs"]
+
+    idx.remove(["Zeta Labs"])
+    assert idx.complete("zeta") == ["Zeta Labs"]
+    idx.remove(["Zeta Labs", "Never Added"])
+    assert idx.complete("zeta") == [] and len(idx) == 4
+
+    # two of the three Acme rows going away drops it below Acme Robotics
+    idx.remove(["Acme", "Acme"])
+    idx.add(["Acme Robotics"])
+    assert idx.complete("acme") == ["Acme Robotics", "Acme"]
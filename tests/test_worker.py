@@ -0,0 +1,25 @@
+import pytest
+
+from jobtracker import worker
+
+
+def _boom(conn):
+    raise RuntimeError("sweep failed")
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    monkeypatch.setattr(worker.Scheduler, "_conn", lambda self: None)
+    monkeypatch.setitem(worker.JOBS, "test_ok", (60, lambda conn: "done"))
+    monkeypatch.setitem(worker.JOBS, "test_boom", (60, _boom))
+
+
+def test_run_job_reports_failure(jobs):
+    scheduler = worker.Scheduler()
+    assert scheduler.run_job("test_ok") is True
+    assert scheduler.run_job("test_boom") is False
+
+
+def test_one_shot_runs_exit_non_zero_when_a_job_fails(jobs):
+    assert worker.main(["--job", "test_ok"]) == 0
+    assert worker.main(["--job", "test_boom"]) == 1